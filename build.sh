@@ -5,3 +5,5 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py build_network_snapshot
+python manage.py build_station_matrix
@@ -5,3 +5,9 @@ class MeetupConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meetup'
     verbose_name = 'Meetup Spot Calculator'
+
+    def ready(self):
+        from .services import graph
+        if graph.WARM_UP_ON_START:
+            graph.start_warm_up()
+        graph.start_reload_watcher()
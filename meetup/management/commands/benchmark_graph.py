@@ -0,0 +1,233 @@
+"""
+Management command to benchmark routing.
+
+Times a cold build of the network from the CSVs, loading the compiled
+snapshot, single-pair queries with each search method over a seeded
+random sample of station pairs, one-to-all searches, and full
+calculate_meetup_spots calls for groups of 2-20 people, plus the largest
+group again with some lines closed, which runs on the shortest-path tree
+cache (its hit rate, evictions and memory are reported). Latencies are
+reported as p50/p95/p99 alongside nodes settled, and everything is
+written to a JSON report (sorted keys, fixed seed) so two runs can be
+diffed. Each section also records what the queries returned (total
+journey minutes, top stations), so a routing change shows up in the diff
+as well as a slowdown.
+"""
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from meetup.services.graph import (
+    COMPILED_DIR, reset_cache, get_network, get_stations, get_tree_cache,
+    data_checksum, warm_up, write_network_snapshot,
+)
+from meetup.services.optimizer import calculate_meetup_spots
+from meetup.services.routing import INF, SEARCH_METHODS, dijkstra
+from meetup.services.snapshot import load_snapshot
+
+REPORT_PATH = COMPILED_DIR / 'benchmark.json'
+
+
+def _percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def _summary(seconds, settled=None):
+    """p50/p95/p99 of latencies (in ms) and, if given, nodes settled."""
+    ms = sorted(s * 1000 for s in seconds)
+    summary = {
+        'count': len(ms),
+        'p50_ms': round(_percentile(ms, 50), 3),
+        'p95_ms': round(_percentile(ms, 95), 3),
+        'p99_ms': round(_percentile(ms, 99), 3),
+        'mean_ms': round(sum(ms) / len(ms), 3),
+    }
+    if settled is not None:
+        ordered = sorted(settled)
+        summary['settled'] = {
+            'p50': _percentile(ordered, 50),
+            'p95': _percentile(ordered, 95),
+            'p99': _percentile(ordered, 99),
+            'mean': round(sum(ordered) / len(ordered), 1),
+        }
+    return summary
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Benchmark routing latency and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Seed for the random pairs and groups')
+        parser.add_argument('--pairs', type=int, default=500,
+                            help='Station pairs per search method')
+        parser.add_argument('--sources', type=int, default=50,
+                            help='One-to-all searches to run')
+        parser.add_argument('--groups', type=int, default=10,
+                            help='Meetup calculations per group size')
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[2, 5, 10, 20],
+                            help='Group sizes for the meetup calculations')
+        parser.add_argument('--closed', nargs='+', default=['Central'],
+                            help='Lines closed for the disrupted meetups')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Cold builds and snapshot loads to time')
+        parser.add_argument('--output', type=Path, default=REPORT_PATH,
+                            help='Where to write the JSON report')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        report = {
+            'seed': options['seed'],
+            'build': self._bench_build(options['repeat']),
+        }
+
+        reset_cache()
+        warm_up()
+        network = get_network()
+        stations = get_stations()
+        station_ids = sorted(sid for sid in stations
+                             if network.hub(sid) is not None)
+        report['network'] = {
+            'nodes': network.number_of_nodes(),
+            'edges': network.number_of_edges(),
+            'stations': len(station_ids),
+        }
+
+        self.stdout.write('Queries:')
+        pairs = [tuple(rng.sample(station_ids, 2))
+                 for _ in range(options['pairs'])]
+        report['single_pair'] = {
+            method: self._bench_pairs(network, method, pairs)
+            for method in sorted(SEARCH_METHODS)
+        }
+
+        sources = rng.sample(station_ids,
+                             min(options['sources'], len(station_ids)))
+        report['one_to_all'] = self._bench_one_to_all(network, sources)
+
+        self.stdout.write('Meetups:')
+        report['meetup'] = {
+            str(size): self._bench_meetups(
+                stations, station_ids, rng, size, options['groups'])
+            for size in options['sizes']
+        }
+        excluded_lines = network.line_mask(options['closed'])
+        report['disrupted_meetup'] = self._bench_meetups(
+            stations, station_ids, rng, max(options['sizes']),
+            options['groups'], excluded_lines)
+        report['tree_cache'] = get_tree_cache().stats()
+        self.stdout.write(
+            f'  tree cache: {report["tree_cache"]["trees"]} trees, '
+            f'hit rate {report["tree_cache"]["hit_rate"]}, '
+            f'{report["tree_cache"]["evictions"]} evictions, '
+            f'{report["tree_cache"]["bytes"] / 1024:.0f} KB')
+
+        path = options['output']
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
+
+    def _line(self, label, summary):
+        text = (f'  {label}: p50 {summary["p50_ms"]:.2f} ms, '
+                f'p95 {summary["p95_ms"]:.2f} ms, '
+                f'p99 {summary["p99_ms"]:.2f} ms')
+        if 'settled' in summary:
+            text += f', {summary["settled"]["mean"]:.0f} nodes settled'
+        self.stdout.write(text)
+
+    def _bench_build(self, repeat):
+        """Cold build from the CSVs, and mapping the snapshot it writes."""
+        self.stdout.write('Build:')
+        builds = []
+        loads = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'network.bin'
+            for _ in range(repeat):
+                reset_cache()
+                _network, elapsed = _timed(write_network_snapshot, path)
+                builds.append(elapsed)
+                checksum = data_checksum()
+                snapshot, elapsed = _timed(load_snapshot, path, checksum)
+                loads.append(elapsed)
+                del snapshot
+        result = {
+            'cold_build': _summary(builds),
+            'snapshot_load': _summary(loads),
+        }
+        self._line('cold build', result['cold_build'])
+        self._line('snapshot load', result['snapshot_load'])
+        return result
+
+    def _bench_pairs(self, network, method, pairs):
+        search = SEARCH_METHODS[method]
+        seconds = []
+        settled = []
+        total = 0.0
+        unreachable = 0
+        for a, b in pairs:
+            (journey_time, _path, count), elapsed = _timed(
+                search, network, network.hub(a), network.hub(b))
+            seconds.append(elapsed)
+            settled.append(count)
+            if journey_time == INF:
+                unreachable += 1
+            else:
+                total += journey_time
+        result = _summary(seconds, settled)
+        result['total_minutes'] = round(total, 3)
+        result['unreachable'] = unreachable
+        self._line(f'{method} single pair', result)
+        return result
+
+    def _bench_one_to_all(self, network, sources):
+        seconds = []
+        settled = []
+        for sid in sources:
+            (dist, _pred), elapsed = _timed(
+                dijkstra, network, {network.hub(sid): 0.0})
+            seconds.append(elapsed)
+            settled.append(sum(1 for d in dist if d != INF))
+        result = _summary(seconds, settled)
+        self._line('one to all', result)
+        return result
+
+    def _bench_meetups(self, stations, station_ids, rng, size, groups,
+                       excluded_lines=0):
+        """Groups start and end at random stations."""
+        seconds = []
+        top = []
+        for _ in range(groups):
+            people = []
+            for i in range(size):
+                origin = stations[rng.choice(station_ids)]
+                home = stations[rng.choice(station_ids)]
+                people.append({
+                    'name': f'Person {i + 1}',
+                    'origin_lat': origin['lat'], 'origin_lon': origin['lon'],
+                    'home_lat': home['lat'], 'home_lon': home['lon'],
+                })
+            results, elapsed = _timed(calculate_meetup_spots, people,
+                                      excluded_lines)
+            seconds.append(elapsed)
+            best = results.get('fairness') or [None]
+            top.append(best[0] and best[0]['station_id'])
+        result = _summary(seconds)
+        result['top_stations'] = top
+        label = f'meetup for {size}'
+        if excluded_lines:
+            label += ' (disrupted)'
+        self._line(label, result)
+        return result
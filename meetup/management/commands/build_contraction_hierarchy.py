@@ -0,0 +1,34 @@
+"""
+Management command to build the optional contraction hierarchy index.
+
+Preprocesses the compiled network into a contraction hierarchy and writes
+it to CONTRACTION_PATH. Once present (and built from the current data
+files), point-to-point journeys that the station matrix can't answer use
+it instead of a plain Dijkstra search.
+"""
+import time
+from django.core.management.base import BaseCommand
+from meetup.services.graph import (
+    CONTRACTION_PATH, reset_cache, write_contraction_index,
+)
+
+
+class Command(BaseCommand):
+    help = 'Build the contraction hierarchy index for point-to-point queries'
+
+    def handle(self, *args, **options):
+        reset_cache()
+
+        self.stdout.write('Building contraction hierarchy...')
+        start = time.perf_counter()
+        ch = write_contraction_index()
+        elapsed = time.perf_counter() - start
+
+        size_kb = CONTRACTION_PATH.stat().st_size / 1024
+        self.stdout.write(f'  Nodes: {len(ch.rank)}')
+        self.stdout.write(f'  Upward edges: {len(ch.up_targets)}')
+        self.stdout.write(f'  Shortcuts: {ch.number_of_shortcuts()}')
+        self.stdout.write(f'  File size: {size_kb:.0f} KB')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {CONTRACTION_PATH} in {elapsed:.1f}s'))
@@ -0,0 +1,51 @@
+"""
+Management command to build the hub-label distance oracle.
+
+Computes pruned landmark labels over the compiled network and writes the
+station hub labels to LABELS_PATH. Used for station-to-station times when
+MEETUP_DISTANCE_ORACLE=labels, as a compact alternative to the dense
+station matrix.
+"""
+import time
+from django.core.management.base import BaseCommand
+from meetup.services.graph import (
+    LABELS_PATH, reset_cache, get_network, get_stations, data_checksum,
+)
+from meetup.services.hub_labels import (
+    build_hub_labels, write_hub_labels, load_hub_labels,
+)
+
+
+class Command(BaseCommand):
+    help = 'Build the hub-label index for station-to-station times'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild even if the existing labels are up to date',
+        )
+
+    def handle(self, *args, **options):
+        reset_cache()
+        checksum = data_checksum()
+
+        if not options['force'] and load_hub_labels(LABELS_PATH, checksum):
+            self.stdout.write(
+                self.style.SUCCESS(f'Hub labels up to date: {LABELS_PATH}'))
+            return
+
+        self.stdout.write('Building hub labels...')
+        start = time.perf_counter()
+        labels = build_hub_labels(get_network(), get_stations())
+        write_hub_labels(LABELS_PATH, labels, checksum)
+        elapsed = time.perf_counter() - start
+
+        entries = labels.number_of_entries()
+        size_kb = LABELS_PATH.stat().st_size / 1024
+        self.stdout.write(f'  Stations: {len(labels)}')
+        self.stdout.write(f'  Label entries: {entries} '
+                          f'({entries / len(labels):.1f} per station)')
+        self.stdout.write(f'  File size: {size_kb:.0f} KB')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {LABELS_PATH} in {elapsed:.1f}s'))
@@ -0,0 +1,32 @@
+"""
+Management command to compile the network into a binary snapshot.
+
+Parses the CSV data files, builds and compiles the graph, and writes the
+result to SNAPSHOT_PATH so workers can load it with a single read instead
+of rebuilding the graph on their first request.
+"""
+import time
+from django.core.management.base import BaseCommand
+from meetup.services.graph import (
+    SNAPSHOT_PATH, reset_cache, write_network_snapshot,
+)
+
+
+class Command(BaseCommand):
+    help = 'Compile the network data into a binary snapshot for fast startup'
+
+    def handle(self, *args, **options):
+        reset_cache()
+
+        self.stdout.write('Compiling network snapshot...')
+        start = time.perf_counter()
+        network = write_network_snapshot()
+        elapsed = time.perf_counter() - start
+
+        size_kb = SNAPSHOT_PATH.stat().st_size / 1024
+        self.stdout.write(f'  Nodes: {network.number_of_nodes()}')
+        self.stdout.write(f'  Edges: {network.number_of_edges()}')
+        self.stdout.write(f'  File size: {size_kb:.0f} KB')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {SNAPSHOT_PATH} in {elapsed:.2f}s'))
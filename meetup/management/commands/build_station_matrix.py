@@ -0,0 +1,68 @@
+"""
+Management command to precompute the all-pairs station time matrix.
+
+Builds the matrix from the current network data and writes it to
+MATRIX_PATH, where meetup.services.graph memory-maps it at runtime.
+Run as part of the build so workers never have to rebuild it themselves.
+
+If a matrix from older data is on disk and only connection or interchange
+times have changed, it is repaired instead: only the stations whose
+shortest-path trees use a re-timed edge are searched again. Pass --force
+to always rebuild from scratch.
+"""
+import time
+from django.core.management.base import BaseCommand
+from meetup.services.graph import (
+    MATRIX_PATH, reset_cache, get_network, get_stations, data_checksum,
+)
+from meetup.services.matrix import (
+    build_station_matrix, write_station_matrix, load_station_matrix,
+    repair_station_matrix,
+)
+
+
+class Command(BaseCommand):
+    help = 'Precompute the station-to-station travel time matrix'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild even if the existing matrix is up to date',
+        )
+
+    def handle(self, *args, **options):
+        reset_cache()
+        checksum = data_checksum()
+
+        if (not options['force']
+                and load_station_matrix(MATRIX_PATH, checksum)):
+            self.stdout.write(self.style.SUCCESS(
+                f'Station matrix up to date: {MATRIX_PATH}'))
+            return
+
+        network = get_network()
+        stations = get_stations()
+        start = time.perf_counter()
+        result = None
+        if not options['force']:
+            stale = load_station_matrix(MATRIX_PATH)
+            if stale is not None:
+                result = repair_station_matrix(stale, network, stations)
+        if result is not None:
+            matrix, repaired = result
+            self.stdout.write(
+                f'Repaired station matrix: searched {repaired} of '
+                f'{len(matrix)} stations again')
+        else:
+            self.stdout.write('Building station matrix...')
+            matrix = build_station_matrix(network, stations)
+        write_station_matrix(MATRIX_PATH, matrix, checksum)
+        elapsed = time.perf_counter() - start
+
+        size_kb = MATRIX_PATH.stat().st_size / 1024
+        self.stdout.write(f'  Hubs: {len(matrix)}')
+        self.stdout.write(f'  Nodes: {matrix.n_nodes}')
+        self.stdout.write(f'  File size: {size_kb:.0f} KB')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {MATRIX_PATH} in {elapsed:.1f}s'))
@@ -10,8 +10,9 @@ Checks for:
 import networkx as nx
 from django.core.management.base import BaseCommand
 from meetup.services.graph import (
-    reset_cache, get_graph, get_stations, get_journey_time,
+    reset_cache, get_graph, get_stations, get_station_index,
 )
+from meetup.services.routing import RoutingNetwork, point_to_point
 
 
 class Command(BaseCommand):
@@ -21,8 +22,10 @@ class Command(BaseCommand):
         self.stdout.write('Validating graph data...\n')
         reset_cache()
 
-        stations = get_stations()
+        # The graph first: it reads stations.csv itself, so the stations
+        # below come from the CSVs too rather than a compiled snapshot
         graph = get_graph()
+        stations = get_stations()
 
         self.stdout.write(f'  Stations loaded: {len(stations)}')
         self.stdout.write(f'  Graph nodes: {graph.number_of_nodes()}')
@@ -51,12 +54,10 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS('  All stations connected'))
 
-        # Validate known routes
-        def find_station(name):
-            for sid, info in stations.items():
-                if info['name'].lower() == name.lower():
-                    return sid
-            return None
+        # Validate known routes, searching a network compiled from the
+        # graph just built rather than the snapshot or precomputed matrix
+        find_station = get_station_index().find
+        network = RoutingNetwork.from_graph(graph)
 
         known_routes = [
             ('Bank', 'Brixton', 10, 25),
@@ -75,7 +76,8 @@ class Command(BaseCommand):
                 errors += 1
                 continue
 
-            time = get_journey_time(graph, str(s_id), str(e_id))
+            time, _path, settled = point_to_point(network, str(s_id),
+                                                  str(e_id))
             if time is None:
                 self.stdout.write(
                     self.style.ERROR(f'  NO PATH: {start} -> {end}'))
@@ -88,7 +90,8 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(
                     self.style.SUCCESS(
-                        f'  {start} -> {end}: {time:.1f} min OK'))
+                        f'  {start} -> {end}: {time:.1f} min OK '
+                        f'({settled} nodes settled)'))
 
         if errors:
             self.stdout.write(
@@ -0,0 +1,307 @@
+"""
+Contraction hierarchy over the routing network.
+
+Preprocessing contracts nodes one at a time, least important first, adding
+a shortcut edge between two neighbours whenever the only shortest path
+between them ran through the node being removed. Every node gets a rank
+(its contraction order) and keeps its edges to higher-ranked nodes.
+
+A query is then a bidirectional Dijkstra that only ever moves upward in
+rank from both ends, which settles a few dozen nodes instead of a large
+share of the network. Each shortcut remembers the node it bypassed, so a
+route is unpacked back into the original "station:line" node path and
+get_lines_used keeps working on it.
+
+The hierarchy is optional and built offline (see the
+build_contraction_hierarchy management command). Like the other compiled
+artefacts it is stamped with a checksum of the data files.
+"""
+import heapq
+import os
+import struct
+from array import array
+
+from .routing import INF
+
+MAGIC = b'MCHX'
+FORMAT_VERSION = 1
+
+# magic, version, sha256 of data files, node count, upward edge count
+HEADER = struct.Struct('<4sI32sII')
+
+# Nodes a witness search may settle before giving up and keeping the
+# shortcut. Extra shortcuts never make answers wrong, only the index bigger.
+WITNESS_SETTLE_LIMIT = 60
+
+
+class ContractionHierarchy:
+    """
+    Upward CSR graph plus node ranks. Edge e of node u goes to the
+    higher-ranked node up_targets[e]; up_middle[e] is the contracted node
+    a shortcut bypasses, or -1 for an original edge.
+    """
+
+    def __init__(self, network, rank, up_offsets, up_targets, up_weights,
+                 up_middle):
+        self.network = network
+        self.rank = rank
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_middle = up_middle
+
+    def number_of_shortcuts(self):
+        return sum(1 for m in self.up_middle if m != -1)
+
+    def _middle(self, u, v):
+        """Bypassed node on the upward edge between u and v, or -1."""
+        if self.rank[u] > self.rank[v]:
+            u, v = v, u
+        best_weight = INF
+        middle = -1
+        for e in range(self.up_offsets[u], self.up_offsets[u + 1]):
+            if self.up_targets[e] == v and self.up_weights[e] < best_weight:
+                best_weight = self.up_weights[e]
+                middle = self.up_middle[e]
+        return middle
+
+    def _unpack(self, u, v, out):
+        """Append the original nodes after u on the edge u -> v to `out`."""
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            m = self._middle(a, b)
+            if m == -1:
+                out.append(b)
+            else:
+                # Process (a, m) before (m, b)
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def query(self, from_node, to_node):
+        """
+        Shortest (time, path) between two node IDs, with the path unpacked
+        into original node IDs. Returns (None, None) if either node is
+        missing or there is no path.
+        """
+        s = self.network.node_index(from_node)
+        t = self.network.node_index(to_node)
+        if s is None or t is None:
+            return None, None
+        if s == t:
+            return 0.0, [from_node]
+
+        up_offsets = self.up_offsets
+        up_targets = self.up_targets
+        up_weights = self.up_weights
+
+        # dist/pred per direction: 0 = forward from s, 1 = backward from t
+        dist = ({s: 0.0}, {t: 0.0})
+        pred = ({s: -1}, {t: -1})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        done = (set(), set())
+        best = INF
+        meet = -1
+
+        while heaps[0] or heaps[1]:
+            # Expand whichever frontier is currently closer
+            if not heaps[1] or (heaps[0] and heaps[0][0][0] <= heaps[1][0][0]):
+                side = 0
+            else:
+                side = 1
+            d, u = heapq.heappop(heaps[side])
+            if d >= best:
+                # Nothing left on this side can improve the answer
+                heaps[side].clear()
+                continue
+            if u in done[side]:
+                continue
+            done[side].add(u)
+
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best = d + other
+                meet = u
+
+            my_dist = dist[side]
+            for e in range(up_offsets[u], up_offsets[u + 1]):
+                v = up_targets[e]
+                nd = d + up_weights[e]
+                if nd < my_dist.get(v, INF):
+                    my_dist[v] = nd
+                    pred[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+
+        if meet == -1:
+            return None, None
+
+        # Upward chains s -> meet and t -> meet, then unpack every edge
+        forward = [meet]
+        while pred[0][forward[-1]] != -1:
+            forward.append(pred[0][forward[-1]])
+        forward.reverse()
+        backward = [meet]
+        while pred[1][backward[-1]] != -1:
+            backward.append(pred[1][backward[-1]])
+        chain = forward + backward[1:]
+
+        path = [chain[0]]
+        for a, b in zip(chain, chain[1:]):
+            self._unpack(a, b, path)
+        return best, [self.network.node_id(i) for i in path]
+
+
+def _witness_distance(adj, contracted, source, target, excluded, limit):
+    """
+    Bounded Dijkstra from source to target among uncontracted nodes, not
+    passing through `excluded`. Gives up (returns INF) past `limit`
+    minutes or WITNESS_SETTLE_LIMIT settled nodes.
+    """
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist.get(u, INF):
+            continue
+        if u == target:
+            return d
+        if d > limit:
+            break
+        settled += 1
+        if settled > WITNESS_SETTLE_LIMIT:
+            break
+        for v, (w, _middle) in adj[u].items():
+            if v == excluded or contracted[v]:
+                continue
+            nd = d + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return INF
+
+
+def _shortcuts_for(adj, contracted, v):
+    """Shortcuts (u, w, weight) needed if v were contracted now."""
+    neighbours = [(u, w) for u, (w, _m) in adj[v].items() if not contracted[u]]
+    shortcuts = []
+    for i, (u, wu) in enumerate(neighbours):
+        for x, wx in neighbours[i + 1:]:
+            via = wu + wx
+            existing = adj[u].get(x)
+            if existing is not None and existing[0] <= via:
+                continue
+            if _witness_distance(adj, contracted, u, x, v, via) > via:
+                shortcuts.append((u, x, via))
+    return shortcuts
+
+
+def build_contraction_hierarchy(network):
+    """Contract every node of `network` and return the hierarchy."""
+    n = len(network)
+    # adj[u][v] = (weight, middle); parallel edges keep the lightest
+    adj = [{} for _ in range(n)]
+    for u in range(n):
+        for e in range(network.offsets[u], network.offsets[u + 1]):
+            v = network.targets[e]
+            w = network.weights[e]
+            if v != u and (v not in adj[u] or w < adj[u][v][0]):
+                adj[u][v] = (w, -1)
+
+    contracted = bytearray(n)
+    deleted_neighbours = [0] * n
+    rank = array('i', [0] * n)
+    upward = [None] * n
+
+    def priority(v):
+        degree = sum(1 for u in adj[v] if not contracted[u])
+        return (len(_shortcuts_for(adj, contracted, v)) - degree
+                + deleted_neighbours[v])
+
+    heap = [(priority(v), v) for v in range(n)]
+    heapq.heapify(heap)
+    order = 0
+    while heap:
+        _p, v = heapq.heappop(heap)
+        if contracted[v]:
+            continue
+        # Lazy update: re-check the priority, defer if it got worse
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        for u, x, weight in _shortcuts_for(adj, contracted, v):
+            adj[u][x] = (weight, v)
+            adj[x][u] = (weight, v)
+
+        upward[v] = [(u, w, m) for u, (w, m) in adj[v].items()
+                     if not contracted[u]]
+        for u, _w, _m in upward[v]:
+            deleted_neighbours[u] += 1
+        contracted[v] = 1
+        rank[v] = order
+        order += 1
+
+    up_offsets = array('i', [0])
+    up_targets = array('i')
+    up_weights = array('d')
+    up_middle = array('i')
+    for v in range(n):
+        for u, w, m in upward[v]:
+            up_targets.append(u)
+            up_weights.append(w)
+            up_middle.append(m)
+        up_offsets.append(len(up_targets))
+
+    return ContractionHierarchy(network, rank, up_offsets, up_targets,
+                                up_weights, up_middle)
+
+
+def write_contraction_hierarchy(path, ch, checksum):
+    """Write a hierarchy to `path`, replacing any existing file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, checksum,
+                            len(ch.rank), len(ch.up_targets)))
+        for part in (ch.up_weights, ch.rank, ch.up_offsets, ch.up_targets,
+                     ch.up_middle):
+            f.write(array(part.typecode, part).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_contraction_hierarchy(path, network, checksum):
+    """
+    Load a hierarchy for `network`. Returns None if the file is missing,
+    from an older format, or built from different data files.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, file_checksum, n_nodes, n_up = HEADER.unpack_from(data)
+    expected_size = HEADER.size + 8 * n_up + 4 * n_nodes + 4 * (n_nodes + 1) \
+        + 8 * n_up
+    if (magic != MAGIC or version != FORMAT_VERSION
+            or file_checksum != checksum or n_nodes != len(network)
+            or len(data) != expected_size):
+        return None
+
+    offset = HEADER.size
+    parts = []
+    for typecode, count in (('d', n_up), ('i', n_nodes), ('i', n_nodes + 1),
+                            ('i', n_up), ('i', n_up)):
+        part = array(typecode)
+        size = part.itemsize * count
+        part.frombytes(data[offset:offset + size])
+        offset += size
+        parts.append(part)
+    up_weights, rank, up_offsets, up_targets, up_middle = parts
+
+    return ContractionHierarchy(network, rank, up_offsets, up_targets,
+                                up_weights, up_middle)
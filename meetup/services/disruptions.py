@@ -20,6 +20,11 @@ TFL_LINE_STATUS_URL = (
 
 REQUEST_TIMEOUT = 5  # seconds
 
+# TfL severities meaning the whole line isn't running: Closed, Suspended,
+# Planned Closure. Part closures don't say which stretch, so routing
+# doesn't avoid those lines.
+LINE_CLOSED_SEVERITIES = (1, 2, 4)
+
 
 def get_line_disruptions(lines_to_check=None):
     """
@@ -30,7 +35,8 @@ def get_line_disruptions(lines_to_check=None):
                         If None, returns all disruptions.
 
     Returns:
-        list of dicts with 'line', 'status', 'reason' for disrupted lines.
+        list of dicts with 'line', 'status', 'severity', 'reason' for
+        disrupted lines.
         Returns empty list if the API call fails (fails silently).
     """
     disruptions = []
@@ -73,6 +79,7 @@ def get_line_disruptions(lines_to_check=None):
                     disruptions.append({
                         'line': line_name,
                         'status': status.get('statusSeverityDescription', 'Unknown'),
+                        'severity': severity,
                         'reason': status.get('reason', ''),
                     })
 
@@ -80,3 +87,20 @@ def get_line_disruptions(lines_to_check=None):
         logger.warning("TfL API request failed: %s", e)
 
     return disruptions
+
+
+def disrupted_lines_mask(network, disruptions, closed_only=False):
+    """
+    Bitmask of the network's lines named in `disruptions` (as returned by
+    get_line_disruptions), matched case-insensitively. Test a journey
+    against it with `journey_mask & disrupted`.
+
+    With closed_only=True, only lines that aren't running at all count,
+    giving the mask of lines for routing to avoid.
+    """
+    disrupted = {d['line'].lower() for d in disruptions
+                 if not closed_only
+                 or d.get('severity') in LINE_CLOSED_SEVERITIES}
+    return network.line_mask(
+        line for line in network.lines
+        if line is not None and line.lower() in disrupted)
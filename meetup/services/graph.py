@@ -5,20 +5,148 @@ Builds a NetworkX weighted graph from static CSV data files.
 Stations are nodes, connections are edges weighted by travel time in minutes.
 Transfer edges connect different lines at interchange stations.
 
-The graph is loaded once and cached in memory. It's small (~400 nodes, ~500 edges)
-so this is essentially free.
+The graph is loaded once and cached in memory. It's small (~400 nodes,
+~500 edges) so this is essentially free. Journey queries run on a compiled
+CSR copy of the graph (see routing.py) rather than through NetworkX.
+Workers load that compiled network from a prebuilt snapshot (see
+snapshot.py) when it matches the data files, and only fall back to
+parsing the CSVs when it doesn't. Station-to-station queries are answered
+from a precomputed distance oracle: by default a memory-mapped time matrix
+(see matrix.py), or hub labels (see hub_labels.py) when
+MEETUP_DISTANCE_ORACLE=labels. Earliest arrivals with change counts come
+from a round-based planner over line patterns (see raptor.py).
+
+All cached data hangs off one NetworkState. With MEETUP_RELOAD_INTERVAL
+set, a background thread watches the data files and swaps in a freshly
+built state when they change.
 """
 import csv
+import hashlib
+import logging
+import mmap
 import os
+import sys
+import threading
+import time
 import networkx as nx
+from collections import OrderedDict
 from pathlib import Path
 
+from .contraction import (
+    build_contraction_hierarchy, write_contraction_hierarchy,
+    load_contraction_hierarchy,
+)
+from .hub_labels import build_hub_labels, write_hub_labels, load_hub_labels
+from .matrix import (
+    StationMatrix, build_station_matrix, write_station_matrix,
+    load_station_matrix, repair_station_matrix,
+)
+from .routing import (
+    DEFAULT_SEARCH_METHOD, INF, RoutingNetwork, ShortestPathTree,
+    shortest_path, point_to_point, journeys_from, lines_on_path,
+    stations_within,
+)
+from .raptor import build_pattern_network, raptor
+from .snapshot import write_snapshot, load_snapshot
+from .station_search import StationIndex
+from .tree_cache import TreeCache
+
+logger = logging.getLogger(__name__)
+
 DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+DATA_FILES = ('stations.csv', 'connections.csv', 'interchanges.csv')
+
+# Build artefacts derived from the data files (not checked in)
+COMPILED_DIR = DATA_DIR / 'compiled'
+MATRIX_PATH = COMPILED_DIR / 'station_matrix.bin'
+SNAPSHOT_PATH = COMPILED_DIR / 'network.bin'
+CONTRACTION_PATH = COMPILED_DIR / 'contraction.bin'
+LABELS_PATH = COMPILED_DIR / 'hub_labels.bin'
+
+# Which precomputed structure answers station-to-station times: 'matrix'
+# (dense, O(1) lookups) or 'labels' (hub labels, memory grows with label
+# size rather than stations squared)
+DISTANCE_ORACLE = os.environ.get('MEETUP_DISTANCE_ORACLE', 'matrix')
+
+# Station matrices kept for disruption states (sets of closed lines);
+# each takes well under a second to build and a few MB of memory
+MAX_DISRUPTION_VARIANTS = 4
+
+# Isochrone results kept per network state, most recently used first out
+MAX_ISOCHRONES = 256
 
-# Module-level cache
-_graph = None
-_stations = None
-_station_lookup = None
+# Full shortest-path trees kept per network state, keyed by source hub and
+# disruption state; each takes about 11 KB, so the default holds a tree
+# from every hub for one disruption state (see tree_cache.py)
+TREE_CACHE_SIZE = int(os.environ.get('MEETUP_TREE_CACHE_SIZE', '512'))
+
+# Seconds between checks of the data files for changes; 0 turns hot
+# reloading off
+RELOAD_INTERVAL = float(os.environ.get('MEETUP_RELOAD_INTERVAL', '0'))
+
+# Load the network in the background as each worker starts, rather than
+# on its first request (see MeetupConfig.ready)
+WARM_UP_ON_START = os.environ.get('MEETUP_WARM_UP', 'False').lower() == 'true'
+
+# Marks optional artefacts that haven't been looked for yet
+_NOT_LOADED = object()
+
+
+class NetworkState:
+    """
+    Everything derived from one version of the data files, filled in
+    lazily. A reload builds a whole new state and swaps it in with a single
+    assignment to `_state`, so a request that already holds the old
+    network, stations or oracle finishes on that version.
+
+    Lazy fills are single-flight: they check, take `lock`, and check again,
+    so concurrent first requests wait for one build instead of each
+    running their own.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.mtimes = _data_mtimes()
+        self.pending_mtimes = None
+        self.checksum = data_checksum()
+        self.graph = None
+        self.network = None
+        self.stations = None
+        self.station_lookup = None
+        self.station_index = None
+        self.station_matrix = None
+        self.hub_labels = None
+        self.contraction_hierarchy = _NOT_LOADED
+        self.pattern_network = None
+        self.oracle_variants = OrderedDict()
+        self.isochrones = OrderedDict()
+        self.tree_cache = None
+
+
+# Module-level cache: the current NetworkState, created on first use
+_state = None
+_state_lock = threading.Lock()
+_reload_thread = None
+
+# Set once start-up warm-up has finished (or when there is none to wait for)
+_ready = threading.Event()
+_ready.set()
+_warm_up_error = None
+
+
+def _data_mtimes():
+    """Modification times of the data files, a cheap first check for edits."""
+    return tuple((DATA_DIR / filename).stat().st_mtime_ns
+                 for filename in DATA_FILES)
+
+
+def data_checksum():
+    """SHA-256 digest of the network data files, versioning artefacts."""
+    digest = hashlib.sha256()
+    for filename in DATA_FILES:
+        digest.update(filename.encode('utf-8'))
+        digest.update((DATA_DIR / filename).read_bytes())
+    return digest.digest()
 
 
 def _load_stations():
@@ -71,6 +199,63 @@ def _load_interchanges():
     return interchanges
 
 
+def _hub_link_times(stations, station_lines, interchanges):
+    """
+    Time to get between a station's entrance (its hub) and the platform of
+    each line serving it, as {(station_id, line): minutes}. Changing lines
+    at a station costs the two link times added together.
+    """
+    interchange_times = {}
+    for ic in interchanges:
+        key = (ic['station_name'].lower(), ic['from_line'], ic['to_line'])
+        interchange_times[key] = ic['transfer_time_minutes']
+        # Also store reverse
+        key_rev = (ic['station_name'].lower(), ic['to_line'], ic['from_line'])
+        interchange_times[key_rev] = ic['transfer_time_minutes']
+
+    link_times = {}
+    for station_id, lines in station_lines.items():
+        if station_id not in stations:
+            continue
+        station_name_lower = stations[station_id]['name'].lower()
+
+        if len(lines) == 1:
+            # Single line station - connect directly to hub with 0 weight
+            link_times[(station_id, next(iter(lines)))] = 0
+            continue
+
+        # Multi-line station - connect each line node to hub with transfer time
+        lines_list = sorted(lines)
+        for line in lines_list:
+            # Default transfer time
+            default_transfer = 4.0
+
+            # Try to find specific transfer time from interchanges data
+            # Use the minimum transfer time to any other line at this station
+            min_transfer = default_transfer
+            for other_line in lines_list:
+                if other_line == line:
+                    continue
+                key = (station_name_lower, line, other_line)
+                if key in interchange_times:
+                    min_transfer = min(min_transfer,
+                                       interchange_times[key] / 2.0)
+
+            # Hub-to-line edge weight is half the transfer time
+            # (full transfer = hub_to_line_A + hub_to_line_B)
+            link_times[(station_id, line)] = min_transfer
+    return link_times
+
+
+def _station_lines(connections):
+    """Map each station ID to the set of lines serving it."""
+    station_lines = {}
+    for conn in connections:
+        station_lines.setdefault(conn['station1_id'], set()).add(conn['line'])
+        station_lines.setdefault(conn['station2_id'], set()).add(conn['line'])
+    return station_lines
+
+
 def _build_graph(stations, connections, interchanges):
     """
     Build a NetworkX graph from station, connection, and interchange data.
@@ -84,56 +269,34 @@ def _build_graph(stations, connections, interchanges):
     """
     G = nx.Graph()
 
-    # Track which lines serve each station
-    station_lines = {}  # station_id -> set of line names
-
     for conn in connections:
         s1 = conn['station1_id']
         s2 = conn['station2_id']
         line = conn['line']
         time = conn['time_minutes']
 
-        station_lines.setdefault(s1, set()).add(line)
-        station_lines.setdefault(s2, set()).add(line)
-
         # Create line-specific node IDs
         node1 = f"{s1}:{line}"
         node2 = f"{s2}:{line}"
 
+        # Station attributes (name, coordinates) live on the hub only
         if s1 in stations:
-            G.add_node(node1, station_id=s1, line=line,
-                       name=stations[s1]['name'],
-                       lat=stations[s1]['lat'],
-                       lon=stations[s1]['lon'])
+            G.add_node(node1, station_id=s1, line=line)
         if s2 in stations:
-            G.add_node(node2, station_id=s2, line=line,
-                       name=stations[s2]['name'],
-                       lat=stations[s2]['lat'],
-                       lon=stations[s2]['lon'])
+            G.add_node(node2, station_id=s2, line=line)
 
         G.add_edge(node1, node2, weight=time, line=line, edge_type='connection')
 
-    # Build interchange name -> station_id lookup
-    name_to_id = {}
-    for sid, info in stations.items():
-        name_to_id[info['name'].lower()] = sid
-
-    # Add hub nodes and transfer edges
-    # For each station served by multiple lines, create a hub node
-    # and connect each line-specific node to the hub
-    interchange_times = {}
-    for ic in interchanges:
-        key = (ic['station_name'].lower(), ic['from_line'], ic['to_line'])
-        interchange_times[key] = ic['transfer_time_minutes']
-        # Also store reverse
-        key_rev = (ic['station_name'].lower(), ic['to_line'], ic['from_line'])
-        interchange_times[key_rev] = ic['transfer_time_minutes']
+    # Track which lines serve each station
+    station_lines = _station_lines(connections)
+    link_times = _hub_link_times(stations, station_lines, interchanges)
 
+    # Add hub nodes and transfer edges: each station gets a hub node
+    # connected to each of its line-specific nodes
     for station_id, lines in station_lines.items():
         if station_id not in stations:
             continue
         station_info = stations[station_id]
-        station_name_lower = station_info['name'].lower()
 
         # Create hub node for this station
         hub_node = str(station_id)
@@ -143,102 +306,531 @@ def _build_graph(stations, connections, interchanges):
                     lon=station_info['lon'],
                     is_hub=True)
 
-        if len(lines) == 1:
-            # Single line station - connect directly to hub with 0 weight
-            line = next(iter(lines))
-            line_node = f"{station_id}:{line}"
-            G.add_edge(hub_node, line_node, weight=0, line='transfer',
-                       edge_type='hub_link')
-        else:
-            # Multi-line station - connect each line node to hub with transfer time
-            lines_list = sorted(lines)
-            for line in lines_list:
-                line_node = f"{station_id}:{line}"
-                # Default transfer time
-                default_transfer = 4.0
-
-                # Try to find specific transfer time from interchanges data
-                # Use the minimum transfer time to any other line at this station
-                min_transfer = default_transfer
-                for other_line in lines_list:
-                    if other_line == line:
-                        continue
-                    key = (station_name_lower, line, other_line)
-                    if key in interchange_times:
-                        min_transfer = min(min_transfer,
-                                           interchange_times[key] / 2.0)
-
-                # Hub-to-line edge weight is half the transfer time
-                # (full transfer = hub_to_line_A + hub_to_line_B)
-                G.add_edge(hub_node, line_node, weight=min_transfer,
-                           line='transfer', edge_type='hub_link')
+        for line in sorted(lines):
+            G.add_edge(hub_node, f"{station_id}:{line}",
+                       weight=link_times[(station_id, line)],
+                       line='transfer', edge_type='hub_link')
 
     return G
 
 
+def _current_state():
+    """The current NetworkState, creating it on first use."""
+    global _state
+    state = _state
+    if state is None:
+        with _state_lock:
+            state = _state
+            if state is None:
+                state = _state = NetworkState()
+    return state
+
+
+def _graph_for(state):
+    if state.graph is None:
+        with state.lock:
+            if state.graph is None:
+                if state.stations is None:
+                    state.stations = _load_stations()
+                connections = _load_connections()
+                interchanges = _load_interchanges()
+                state.graph = _build_graph(state.stations, connections,
+                                           interchanges)
+    return state.graph
+
+
 def get_graph():
     """Get the cached network graph, building it if necessary."""
-    global _graph, _stations
-    if _graph is None:
-        _stations = _load_stations()
-        connections = _load_connections()
-        interchanges = _load_interchanges()
-        _graph = _build_graph(_stations, connections, interchanges)
-    return _graph
+    return _graph_for(_current_state())
+
+
+def _load_network(state):
+    """
+    Populate the network and station caches, from the compiled snapshot if
+    it was built from the current data files, otherwise from the CSVs.
+    """
+    snapshot = load_snapshot(SNAPSHOT_PATH, state.checksum)
+    if snapshot is None:
+        logger.info("Network snapshot missing or stale, building from CSV")
+        network = RoutingNetwork.from_graph(_graph_for(state))
+        # Write it back so this and other workers can map the same file
+        try:
+            write_snapshot(SNAPSHOT_PATH, network, state.stations,
+                           state.checksum)
+        except OSError as e:
+            logger.warning("Could not write network snapshot: %s", e)
+        else:
+            snapshot = load_snapshot(SNAPSHOT_PATH, state.checksum)
+        if snapshot is None:
+            state.network = network
+            return
+
+    state.network = snapshot.network
+    if state.stations is None:
+        state.stations = snapshot.stations
+    logger.info("Network mapped from snapshot: %d bytes shared, "
+                "%d bytes private",
+                snapshot.mapped_bytes,
+                _private_bytes((snapshot.network, state.stations)))
+
+
+def _network_for(state):
+    if state.network is None:
+        with state.lock:
+            if state.network is None:
+                _load_network(state)
+    return state.network
+
+
+def get_network():
+    """Get the compiled routing network for the cached graph."""
+    return _network_for(_current_state())
+
+
+def write_network_snapshot(path=SNAPSHOT_PATH):
+    """
+    Compile the network from the CSV data files and write it as a snapshot.
+    Returns the compiled network.
+    """
+    stations = _load_stations()
+    interchanges = _load_interchanges()
+    graph = _build_graph(stations, _load_connections(), interchanges)
+    network = RoutingNetwork.from_graph(graph)
+    write_snapshot(path, network, stations, data_checksum())
+    return network
+
+
+def compile_graph(graph):
+    """
+    Get a RoutingNetwork for `graph`. The cached graph reuses the cached
+    network; any other graph is compiled on the spot, so callers running
+    many queries on their own graph should compile it once and pass the
+    result around instead.
+    """
+    if isinstance(graph, RoutingNetwork):
+        return graph
+    state = _current_state()
+    if graph is state.graph:
+        return _network_for(state)
+    return RoutingNetwork.from_graph(graph)
+
+
+def _stations_for(state):
+    if state.stations is None:
+        with state.lock:
+            if state.stations is None:
+                # This populates stations as a side effect
+                _load_network(state)
+    return state.stations
 
 
 def get_stations():
     """Get the cached station data dict."""
-    global _stations
-    if _stations is None:
-        get_graph()  # This populates _stations as a side effect
-    return _stations
+    return _stations_for(_current_state())
+
+
+def _station_lookup_for(state):
+    if state.station_lookup is None:
+        with state.lock:
+            if state.station_lookup is None:
+                lookup = {}
+                for sid, info in _stations_for(state).items():
+                    lookup[info['name'].lower()] = sid
+                state.station_lookup = lookup
+    return state.station_lookup
 
 
 def get_station_lookup():
     """Get a name -> station_id lookup dict."""
-    global _station_lookup
-    if _station_lookup is None:
-        stations = get_stations()
-        _station_lookup = {}
-        for sid, info in stations.items():
-            _station_lookup[info['name'].lower()] = sid
-    return _station_lookup
+    return _station_lookup_for(_current_state())
 
 
-def get_journey(graph, from_node, to_node):
+def _station_index_for(state):
+    if state.station_index is None:
+        with state.lock:
+            if state.station_index is None:
+                state.station_index = StationIndex(_stations_for(state))
+    return state.station_index
+
+
+def get_station_index():
+    """Get the fuzzy station-name index (see station_search.py)."""
+    return _station_index_for(_current_state())
+
+
+def _load_or_build(state, name, path, load, build, write, repair=None):
     """
-    Get shortest journey time and path between two nodes in a single
-    Dijkstra call. Returns (time_in_minutes, path_list) or (None, None)
-    if no path exists.
+    Load a compiled artefact from `path`, or build it if the file is
+    missing or was built from different data files. If `repair` is given,
+    a stale file is first offered to repair(stale, network, stations),
+    which returns the updated artefact or None if it must be rebuilt. The
+    new artefact is written back; if that fails it is kept in memory
+    instead.
     """
+    checksum = state.checksum
+    artefact = load(path, checksum)
+    if artefact is not None:
+        return artefact
+    if repair is not None:
+        stale = load(path, None)
+        if stale is not None:
+            artefact = repair(stale, _network_for(state),
+                              _stations_for(state))
+    if artefact is None:
+        logger.info("%s missing or stale, rebuilding", name)
+        artefact = build(_network_for(state), _stations_for(state))
     try:
-        length, path = nx.single_source_dijkstra(
-            graph, from_node, to_node, weight='weight')
-        return length, path
-    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        write(path, artefact, checksum)
+    except OSError as e:
+        logger.warning("Could not write %s: %s", name, e)
+    else:
+        artefact = load(path, checksum) or artefact
+    return artefact
+
+
+def _repair_station_matrix(stale, network, stations):
+    """Repair a stale station matrix in place of a rebuild, if possible."""
+    start = time.perf_counter()
+    result = repair_station_matrix(stale, network, stations)
+    if result is None:
+        logger.info("Network structure changed, station matrix needs a "
+                    "full rebuild")
+        return None
+    matrix, repaired = result
+    logger.info("Station matrix repaired: %d of %d rows searched again "
+                "in %.2fs", repaired, len(matrix),
+                time.perf_counter() - start)
+    return matrix
+
+
+def _station_matrix_for(state):
+    if state.station_matrix is None:
+        with state.lock:
+            if state.station_matrix is None:
+                state.station_matrix = _load_or_build(
+                    state, 'Station matrix', MATRIX_PATH,
+                    load_station_matrix, build_station_matrix,
+                    write_station_matrix, _repair_station_matrix)
+    return state.station_matrix
+
+
+def get_station_matrix():
+    """Get the station time matrix, memory-mapped from MATRIX_PATH."""
+    return _station_matrix_for(_current_state())
+
+
+def _hub_labels_for(state):
+    if state.hub_labels is None:
+        with state.lock:
+            if state.hub_labels is None:
+                state.hub_labels = _load_or_build(
+                    state, 'Hub labels', LABELS_PATH, load_hub_labels,
+                    build_hub_labels, write_hub_labels)
+    return state.hub_labels
+
+
+def get_hub_labels():
+    """Get the station hub labels, loaded from LABELS_PATH."""
+    return _hub_labels_for(_current_state())
+
+
+def _oracle_for(state, excluded_lines=0):
+    if excluded_lines:
+        return _disruption_oracle(state, excluded_lines)
+    if DISTANCE_ORACLE == 'labels':
+        return _hub_labels_for(state)
+    return _station_matrix_for(state)
+
+
+def get_station_oracle(excluded_lines=0):
+    """
+    Get the structure answering station-to-station times, as chosen by
+    DISTANCE_ORACLE. Both kinds support `sid in oracle`, time(a, b) and
+    journeys_from(seeds, targets, network).
+
+    With an `excluded_lines` mask (lines closed by disruptions), returns a
+    station matrix for that disruption state instead; see
+    _disruption_oracle.
+    """
+    return _oracle_for(_current_state(), excluded_lines)
+
+
+def _disruption_oracle(state, excluded_lines):
+    """
+    Station matrix avoiding the lines in `excluded_lines`, built in memory
+    the first time that disruption state is seen. The mask is the state's
+    fingerprint: line bits are fixed for a compiled network, and variants
+    belong to the NetworkState they were built from. Keeps the
+    MAX_DISRUPTION_VARIANTS most recently used states, so requests share
+    one matrix per state. The build runs outside the state lock so other
+    lookups aren't held up by it; two requests seeing a new state at once
+    may both build, and the first result installed is kept.
+    """
+    variants = state.oracle_variants
+    with state.lock:
+        matrix = variants.get(excluded_lines)
+        if matrix is not None:
+            variants.move_to_end(excluded_lines)
+            return matrix
+
+    network = _network_for(state)
+    stations = _stations_for(state)
+    logger.info('Building station matrix avoiding %s',
+                ', '.join(sorted(network.line_names(excluded_lines))))
+    matrix = build_station_matrix(network, stations, excluded_lines)
+    with state.lock:
+        matrix = variants.setdefault(excluded_lines, matrix)
+        variants.move_to_end(excluded_lines)
+        while len(variants) > MAX_DISRUPTION_VARIANTS:
+            variants.popitem(last=False)
+    return matrix
+
+
+def _tree_cache_for(state):
+    if state.tree_cache is None:
+        with state.lock:
+            if state.tree_cache is None:
+                state.tree_cache = TreeCache(_network_for(state),
+                                             TREE_CACHE_SIZE)
+    return state.tree_cache
+
+
+def get_tree_cache():
+    """
+    Get the cache of full shortest-path trees from station hubs, per
+    disruption state. Its stats() report hits, misses, evictions and
+    memory use.
+    """
+    return _tree_cache_for(_current_state())
+
+
+def _contraction_hierarchy_for(state):
+    if state.contraction_hierarchy is _NOT_LOADED:
+        with state.lock:
+            if state.contraction_hierarchy is _NOT_LOADED:
+                state.contraction_hierarchy = load_contraction_hierarchy(
+                    CONTRACTION_PATH, _network_for(state), state.checksum)
+    return state.contraction_hierarchy
+
+
+def get_contraction_hierarchy():
+    """
+    Get the contraction hierarchy for the cached network, or None if it
+    hasn't been built for the current data files. Unlike the station matrix
+    it is never built on demand; run build_contraction_hierarchy.
+    """
+    return _contraction_hierarchy_for(_current_state())
+
+
+def write_contraction_index(path=CONTRACTION_PATH):
+    """Build the contraction hierarchy for the cached network and write it."""
+    ch = build_contraction_hierarchy(get_network())
+    write_contraction_hierarchy(path, ch, data_checksum())
+    return ch
+
+
+def get_pattern_network():
+    """
+    Get the cached line patterns for the round-based planner, built
+    straight from the CSVs (no hub/line-node graph involved).
+    """
+    state = _current_state()
+    if state.pattern_network is None:
+        with state.lock:
+            if state.pattern_network is None:
+                stations = _stations_for(state)
+                connections = _load_connections()
+                link_times = _hub_link_times(
+                    stations, _station_lines(connections),
+                    _load_interchanges())
+                state.pattern_network = build_pattern_network(connections,
+                                                              link_times)
+    return state.pattern_network
+
+
+def get_earliest_arrivals(origins, max_transfers=None):
+    """
+    Earliest arrival at every station from one or many origins, with the
+    fewest changes of line that achieve it. `origins` is a station ID or a
+    {station_id: starting cost} dict. Returns a RaptorResult of
+    ({station_id: minutes}, {station_id: changes}, rounds run).
+    """
+    if not isinstance(origins, dict):
+        origins = {origins: 0.0}
+    return raptor(get_pattern_network(), origins, max_transfers)
+
+
+def get_stations_within(seeds, minutes, excluded_lines=0):
+    """
+    Stations reachable within `minutes` from `seeds` ({hub node ID:
+    starting cost}), as {station_id: minutes}, from a single search with a
+    time cutoff. Results are kept per seed set, budget and disruption mask
+    (up to MAX_ISOCHRONES), so callers that snap a location before finding
+    its seeds share entries. Treat the returned dict as read-only.
+    """
+    state = _current_state()
+    key = (tuple(sorted(seeds.items())), minutes, excluded_lines)
+    isochrones = state.isochrones
+    with state.lock:
+        times = isochrones.get(key)
+        if times is not None:
+            isochrones.move_to_end(key)
+            return times
+
+    times = stations_within(_network_for(state), seeds, minutes,
+                            excluded_lines)
+    with state.lock:
+        isochrones[key] = times
+        while len(isochrones) > MAX_ISOCHRONES:
+            isochrones.popitem(last=False)
+    return times
+
+
+def get_station_time(from_station_id, to_station_id, excluded_lines=0):
+    """
+    Travel time in minutes between two stations' hubs, looked up in the
+    station oracle. Returns None if either station isn't on the network.
+    """
+    return get_station_oracle(excluded_lines).time(from_station_id,
+                                                   to_station_id)
+
+
+def _hub_station_id(node):
+    """Station ID for a hub node ID like "123", or None for other nodes."""
+    if isinstance(node, str) and node.isdigit():
+        return int(node)
+    return None
+
+
+def get_journey(graph, from_node, to_node, excluded_lines=0):
+    """
+    Get shortest journey time and path between two nodes in a single
+    point-to-point search. Returns (time_in_minutes, path_list) or
+    (None, None) if no path exists.
+
+    `graph` may be a NetworkX graph or a compiled RoutingNetwork. Hub to
+    hub journeys on the cached network come straight from the station
+    matrix without searching; other journeys on it use the contraction
+    hierarchy when one has been built. Lines in the `excluded_lines` mask
+    (see RoutingNetwork.line_mask) aren't used; the matrix and hierarchy
+    only describe the full network, so journeys from a hub then follow
+    its cached tree for that disruption state instead.
+    """
+    network = compile_graph(graph)
+    state = _current_state()
+    if network is state.network:
+        from_sid = _hub_station_id(from_node)
+        to_sid = _hub_station_id(to_node)
+        if excluded_lines:
+            if from_sid is not None and network.hub(from_sid) is not None:
+                return _tree_cache_journey(state, network, from_sid, to_node,
+                                           excluded_lines)
+            return shortest_path(network, from_node, to_node,
+                                 excluded_lines)
+        matrix = _oracle_for(state)
+        if (isinstance(matrix, StationMatrix)
+                and from_sid in matrix and to_sid in matrix):
+            path = matrix.path(from_sid, to_sid)
+            if path is None:
+                return None, None
+            return (matrix.time(from_sid, to_sid),
+                    [network.node_id(i) for i in path])
+        ch = _contraction_hierarchy_for(state)
+        if ch is not None:
+            return ch.query(from_node, to_node)
+    return shortest_path(network, from_node, to_node, excluded_lines)
+
+
+def _tree_cache_journey(state, network, from_sid, to_node, excluded_lines):
+    """(time, path) to `to_node` from the cached tree of a station's hub."""
+    target = network.node_index(to_node)
+    if target is None:
         return None, None
+    dist, pred = _tree_cache_for(state).tree(network.hub(from_sid),
+                                             excluded_lines)
+    if dist[target] == INF:
+        return None, None
+    return dist[target], ShortestPathTree(network, pred).path(to_node)
+
+
+def find_journey(graph, from_node, to_node, method=DEFAULT_SEARCH_METHOD,
+                 excluded_lines=0):
+    """
+    Run a point-to-point search with a specific method ('dijkstra',
+    'astar', 'alt' or 'bidirectional'), bypassing the precomputed indexes.
+    Returns a JourneySearch (time, path, settled), where `settled` is how
+    many nodes the search expanded; time and path are None if there is no
+    route.
+    """
+    return point_to_point(compile_graph(graph), from_node, to_node, method,
+                          excluded_lines)
 
 
-def get_journey_time(graph, from_node, to_node):
+def get_journeys_from(graph, source, targets, excluded_lines=0):
+    """
+    Get journey times from one node to many in a single search, which stops
+    as soon as every target is settled.
+
+    `source` is a node ID, or a dict of {node ID: starting cost} seeds for a
+    multi-source search (e.g. a person's nearest station hubs with their
+    walking times), so callers never need to add nodes to the graph.
+    Lines in the `excluded_lines` mask aren't used.
+
+    Returns (times, tree): `times` maps each reachable target node ID to
+    minutes, and `tree.path(node)` rebuilds the path to any of them. When
+    the seeds are station hubs on the cached network, the answer is
+    composed instead of searched for: from the station oracle if the
+    targets are station hubs too and no lines are excluded, otherwise
+    from each seed's cached tree for that disruption state.
+    """
+    targets = list(targets)
+    seeds = source if isinstance(source, dict) else {source: 0.0}
+    network = compile_graph(graph)
+    state = _current_state()
+    if network is state.network and seeds:
+        seed_sids = {_hub_station_id(node): cost
+                     for node, cost in seeds.items()}
+        if not excluded_lines:
+            oracle = _oracle_for(state)
+            target_sids = [_hub_station_id(t) for t in targets]
+            if (all(sid in oracle for sid in seed_sids)
+                    and all(sid in oracle for sid in target_sids)):
+                sid_times, tree = oracle.journeys_from(
+                    seed_sids, target_sids, network)
+                times = {node: sid_times[sid]
+                         for node, sid in zip(targets, target_sids)
+                         if sid in sid_times}
+                return times, tree
+        if all(sid is not None and network.hub(sid) is not None
+               for sid in seed_sids):
+            result = _tree_cache_for(state).journeys_from(seeds, targets,
+                                                          excluded_lines)
+            if result is not None:
+                return result
+    return journeys_from(network, seeds, targets, excluded_lines)
+
+
+def get_journey_time(graph, from_node, to_node, excluded_lines=0):
     """
     Get shortest journey time between two nodes in the graph.
     Returns time in minutes, or None if no path exists.
     """
-    time, _path = get_journey(graph, from_node, to_node)
+    time, _path = get_journey(graph, from_node, to_node, excluded_lines)
     return time
 
 
-def get_journey_path(graph, from_node, to_node):
+def get_journey_path(graph, from_node, to_node, excluded_lines=0):
     """
     Get shortest path between two nodes. Returns list of node IDs.
     """
-    _time, path = get_journey(graph, from_node, to_node)
+    _time, path = get_journey(graph, from_node, to_node, excluded_lines)
     return path
 
 
 def get_lines_used(graph, path):
     """Extract the lines used in a journey path."""
+    if isinstance(graph, RoutingNetwork):
+        return lines_on_path(graph, path)
     lines = set()
     for i in range(len(path) - 1):
         edge_data = graph.get_edge_data(path[i], path[i + 1])
@@ -247,9 +839,157 @@ def get_lines_used(graph, path):
     return lines
 
 
+def _private_bytes(obj, seen=None):
+    """
+    Rough size in bytes of the Python objects reachable from `obj`,
+    skipping memory-mapped data (mmaps and memoryviews into them).
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, (mmap.mmap, memoryview, type)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _private_bytes(key, seen) + _private_bytes(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _private_bytes(item, seen)
+    elif hasattr(obj, '__dict__'):
+        size += _private_bytes(vars(obj), seen)
+    return size
+
+
+def _mapped_bytes(obj):
+    """Size of the file mapping behind a loaded artefact, or 0."""
+    mapping = getattr(obj, '_mapping', None)
+    return len(mapping) if mapping is not None else 0
+
+
+def memory_report():
+    """
+    Bytes of the current network data shared with other workers (files
+    mapped read-only: the snapshot and station matrix) and private to this
+    process (node index, station table, and anything built in memory).
+    Private figures are estimates from sys.getsizeof.
+    """
+    state = _current_state()
+    shared = sum(_mapped_bytes(obj)
+                 for obj in (state.network, state.station_matrix))
+    return {
+        'shared_bytes': shared,
+        'private_bytes': _private_bytes(state),
+    }
+
+
+def _warm(state):
+    """Load or build everything a request might need from `state`."""
+    _network_for(state)
+    _station_lookup_for(state)
+    _station_index_for(state)
+    _oracle_for(state)
+    _contraction_hierarchy_for(state)
+
+
+def warm_up():
+    """
+    Load everything the first request would otherwise wait for: network,
+    stations, station lookup and name index, station oracle and any
+    contraction hierarchy. Marks the worker ready when done.
+    """
+    global _warm_up_error
+    try:
+        state = _current_state()
+        _warm(state)
+        logger.info("Network warm: %(shared_bytes)d bytes shared, "
+                    "%(private_bytes)d bytes private", memory_report())
+    except Exception as e:
+        logger.exception("Network warm-up failed")
+        _warm_up_error = str(e)
+        return
+    _warm_up_error = None
+    _ready.set()
+
+
+def start_warm_up():
+    """Run warm_up on a background thread; not ready until it's done."""
+    _ready.clear()
+    thread = threading.Thread(target=warm_up, name='meetup-warm-up',
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness():
+    """
+    (ready, error) for the readiness check: ready once warm-up has finished
+    (always, if no warm-up was started); error is the warm-up failure, if
+    any.
+    """
+    return _ready.is_set(), _warm_up_error
+
+
+def reload_if_changed():
+    """
+    Check whether the data files have changed and, if so, build a new
+    NetworkState and swap it in. The files must look the same on two
+    checks in a row first, so a half-written edit is never loaded. If the
+    new data fails to build, the current network stays in service.
+    Returns True if a new state was swapped in.
+    """
+    global _state
+    state = _state
+    if state is None:
+        return False
+    mtimes = _data_mtimes()
+    if mtimes == state.mtimes:
+        state.pending_mtimes = None
+        return False
+    if state.pending_mtimes != mtimes:
+        # Changed since the last check; wait for the files to settle
+        state.pending_mtimes = mtimes
+        return False
+    if data_checksum() == state.checksum:
+        # Touched but not edited
+        state.mtimes = mtimes
+        return False
+
+    try:
+        new_state = NetworkState()
+        _warm(new_state)
+    except Exception:
+        logger.exception("Reloading network data failed, keeping the "
+                         "current network")
+        state.mtimes = mtimes
+        return False
+    _state = new_state
+    logger.info("Reloaded network data")
+    return True
+
+
+def _watch_data_files(interval):
+    while True:
+        time.sleep(interval)
+        reload_if_changed()
+
+
+def start_reload_watcher(interval=RELOAD_INTERVAL):
+    """
+    Start a daemon thread that calls reload_if_changed every `interval`
+    seconds, so rebuilds never run on a request. Does nothing if the
+    interval is 0 or a watcher is already running.
+    """
+    global _reload_thread
+    if interval <= 0 or _reload_thread is not None:
+        return
+    _reload_thread = threading.Thread(
+        target=_watch_data_files, args=(interval,),
+        name='meetup-reload', daemon=True)
+    _reload_thread.start()
+
+
 def reset_cache():
     """Reset the module cache. Useful for testing."""
-    global _graph, _stations, _station_lookup
-    _graph = None
-    _stations = None
-    _station_lookup = None
+    global _state
+    _state = None
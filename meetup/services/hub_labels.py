@@ -0,0 +1,245 @@
+"""
+Hub-labelling distance oracle for station-to-station times.
+
+Every node gets a label: a list of (hub, distance) pairs, sorted by hub,
+chosen so that for any two nodes the shortest path passes through a hub
+the two labels share (a 2-hop cover). A query is then a linear merge of
+two sorted lists, taking the smallest summed distance over common hubs.
+
+Labels are built with pruned landmark labelling: nodes are processed in
+order of importance (busiest interchanges first), each running a Dijkstra
+that stops expanding wherever the labels built so far already give the
+right distance. Only station hub labels are kept afterwards, so memory
+grows with total label size rather than with the square of the station
+count like the dense matrix in matrix.py.
+
+Layout on disk:
+
+    header      magic, format version, data checksum, station count,
+                label entry count
+    dists       float32 x entries   (all journey times are whole or half
+                                     minutes, so float32 is exact)
+    station ids int32 x stations
+    offsets     int32 x (stations + 1)
+    hubs        int32 x entries
+"""
+import heapq
+import os
+import struct
+from array import array
+
+from .routing import INF, path_line_mask, shortest_path
+
+MAGIC = b'MHLB'
+FORMAT_VERSION = 1
+
+# magic, version, sha256 of data files, station count, label entry count
+HEADER = struct.Struct('<4sI32sII')
+
+
+class HubLabels:
+    """
+    Station hub labels in CSR form: the label of station row i is
+    hubs/dists[offsets[i]:offsets[i + 1]], sorted by hub.
+    """
+
+    def __init__(self, station_ids, offsets, hubs, dists):
+        self.station_ids = station_ids
+        self.offsets = offsets
+        self.hubs = hubs
+        self.dists = dists
+        self.row = {sid: i for i, sid in enumerate(station_ids)}
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def __contains__(self, station_id):
+        return station_id in self.row
+
+    def number_of_entries(self):
+        return len(self.hubs)
+
+    def time(self, from_station_id, to_station_id):
+        """Travel time in minutes between two station hubs, or None."""
+        i = self.row.get(from_station_id)
+        j = self.row.get(to_station_id)
+        if i is None or j is None:
+            return None
+
+        hubs = self.hubs
+        dists = self.dists
+        a, a_end = self.offsets[i], self.offsets[i + 1]
+        b, b_end = self.offsets[j], self.offsets[j + 1]
+        best = INF
+        while a < a_end and b < b_end:
+            ha = hubs[a]
+            hb = hubs[b]
+            if ha == hb:
+                d = dists[a] + dists[b]
+                if d < best:
+                    best = d
+                a += 1
+                b += 1
+            elif ha < hb:
+                a += 1
+            else:
+                b += 1
+        return None if best == INF else best
+
+    def journeys_from(self, seeds, targets, network):
+        """
+        Compose times from seed station hubs to target station hubs, each
+        target taking the best seed cost plus label distance. `seeds` maps
+        station ID to starting cost. Returns ({target: time}, tree); labels
+        hold no paths, so the tree searches for a path when asked.
+        """
+        times = {}
+        roots = {}
+        for target in targets:
+            best = INF
+            for sid, cost in seeds.items():
+                t = self.time(sid, target)
+                if t is not None and cost + t < best:
+                    best = cost + t
+                    roots[target] = sid
+            if best != INF:
+                times[target] = best
+        return times, LabelTree(network, roots)
+
+
+class LabelTree:
+    """
+    Path lookup for hub-label answers: runs a point-to-point search from
+    the seed hub each target was reached from. Only used for the handful
+    of journeys whose lines are actually shown.
+    """
+
+    def __init__(self, network, roots):
+        self.network = network
+        self.roots = roots
+
+    def path(self, node):
+        """Node IDs from the chosen seed hub to the hub `node`."""
+        _time, path = shortest_path(self.network,
+                                    str(self.roots[int(node)]), node)
+        return path
+
+    def line_mask(self, node):
+        """Bitmask of the service lines on the path to `node`."""
+        return path_line_mask(self.network, self.path(node))
+
+
+def _label_order(network):
+    """Node indices, most connected first (ties by index for stability)."""
+    degree = [network.offsets[u + 1] - network.offsets[u]
+              for u in range(len(network))]
+    return sorted(range(len(network)), key=lambda u: (-degree[u], u))
+
+
+def build_hub_labels(network, station_ids):
+    """Build pruned landmark labels and keep those of station hubs."""
+    n = len(network)
+    offsets = network.offsets
+    targets = network.targets
+    weights = network.weights
+
+    # labels[u] = ([hub ranks], [dists]), appended in increasing rank
+    label_hubs = [[] for _ in range(n)]
+    label_dists = [[] for _ in range(n)]
+    root_dist = [INF] * n  # root's own label, indexed by hub rank
+
+    for rank, root in enumerate(_label_order(network)):
+        for h, d in zip(label_hubs[root], label_dists[root]):
+            root_dist[h] = d
+
+        dist = {root: 0.0}
+        heap = [(0.0, root)]
+        done = set()
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+
+            # Prune if the labels so far already cover root -> u
+            covered = INF
+            for h, hd in zip(label_hubs[u], label_dists[u]):
+                total = root_dist[h] + hd
+                if total < covered:
+                    covered = total
+            if covered <= d:
+                continue
+
+            label_hubs[u].append(rank)
+            label_dists[u].append(d)
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+
+        for h in label_hubs[root]:
+            root_dist[h] = INF
+
+    station_ids = [sid for sid in sorted(station_ids)
+                   if network.hub(sid) is not None]
+    out_offsets = array('i', [0])
+    out_hubs = array('i')
+    out_dists = array('f')
+    for sid in station_ids:
+        u = network.hub(sid)
+        out_hubs.extend(label_hubs[u])
+        out_dists.extend(label_dists[u])
+        out_offsets.append(len(out_hubs))
+
+    return HubLabels(array('i', station_ids), out_offsets, out_hubs,
+                     out_dists)
+
+
+def write_hub_labels(path, labels, checksum):
+    """Write labels to `path`, replacing any existing file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, checksum,
+                            len(labels.station_ids), len(labels.hubs)))
+        for part in (labels.dists, labels.station_ids, labels.offsets,
+                     labels.hubs):
+            f.write(array(part.typecode, part).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_hub_labels(path, checksum):
+    """
+    Load labels from `path`. Returns None if the file is missing, from an
+    older format, or built from different data files.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, file_checksum, n_stations, n_entries = \
+        HEADER.unpack_from(data)
+    expected_size = (HEADER.size + 8 * n_entries + 4 * n_stations
+                     + 4 * (n_stations + 1))
+    if (magic != MAGIC or version != FORMAT_VERSION
+            or file_checksum != checksum or len(data) != expected_size):
+        return None
+
+    offset = HEADER.size
+    parts = []
+    for typecode, count in (('f', n_entries), ('i', n_stations),
+                            ('i', n_stations + 1), ('i', n_entries)):
+        part = array(typecode)
+        size = part.itemsize * count
+        part.frombytes(data[offset:offset + size])
+        offset += size
+        parts.append(part)
+    dists, station_ids, offsets, hubs = parts
+
+    return HubLabels(station_ids, offsets, hubs, dists)
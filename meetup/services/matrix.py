@@ -0,0 +1,337 @@
+"""
+Precomputed all-pairs station time matrix.
+
+Runs one full Dijkstra from every station hub and stores the hub-to-hub
+travel times plus each hub's predecessor tree over the whole network, so a
+station-to-station time is a single array lookup and the route can be walked
+back without searching.
+
+The file is plain binary, laid out so it can be memory-mapped and read in
+place:
+
+    header      magic, format version, data checksum, hub count, node
+                count, directed edge count
+    station ids int32 x hubs
+    hub nodes   int32 x hubs      (index of each hub in the routing network)
+    times       float64 x hubs x hubs
+    weights     float64 x edges   (the network the matrix was built over)
+    preds       int32 x hubs x nodes
+    offsets     int32 x (nodes + 1)
+    targets     int32 x edges
+
+The data checksum ties the file to the CSVs it was built from; a file built
+from different data is treated as stale. A stale matrix can still be
+repaired rather than rebuilt (see repair_station_matrix): the network's
+CSR arrays in the file say which edges the new data changed, and only the
+rows whose shortest-path trees those edges affect are searched again.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+from .routing import INF, ShortestPathTree, dijkstra
+
+MAGIC = b'MMTX'
+FORMAT_VERSION = 2
+
+# magic, version, sha256 of data files, hub count, node count, directed
+# edge count (padded to keep the arrays after it 8-byte aligned)
+HEADER = struct.Struct('<4sI32sIII4x')
+
+
+class StationMatrix:
+    """
+    Hub-to-hub times and per-hub predecessor rows for a routing network.
+    offsets/targets/weights are that network's CSR arrays, kept so a later
+    version of the data can be diffed against them.
+    """
+
+    def __init__(self, station_ids, hub_nodes, times, preds, n_nodes,
+                 offsets, targets, weights, mapping=None):
+        self.station_ids = station_ids
+        self.hub_nodes = hub_nodes
+        self.times = times
+        self.preds = preds
+        self.n_nodes = n_nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.row = {sid: i for i, sid in enumerate(station_ids)}
+        # Keeps the mmap alive while the memoryviews above point into it
+        self._mapping = mapping
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def __contains__(self, station_id):
+        return station_id in self.row
+
+    def time(self, from_station_id, to_station_id):
+        """Travel time in minutes between two station hubs, or None."""
+        i = self.row.get(from_station_id)
+        j = self.row.get(to_station_id)
+        if i is None or j is None:
+            return None
+        t = self.times[i * len(self.station_ids) + j]
+        return None if t == INF else t
+
+    def tree(self, from_station_id, network):
+        """ShortestPathTree rooted at a station hub, read from its row."""
+        offset = self.row[from_station_id] * self.n_nodes
+        return ShortestPathTree(network, self.preds, offset=offset)
+
+    def journeys_from(self, seeds, targets, network):
+        """
+        Compose times from seed station hubs to target station hubs: each
+        target's time is the best seed cost plus matrix time over the seeds.
+        `seeds` maps station ID to starting cost, `targets` are station IDs.
+        Returns ({target: time}, tree) like routing.journeys_from.
+        """
+        n_hubs = len(self.station_ids)
+        times_table = self.times
+        seed_rows = [(self.row[sid], cost, sid) for sid, cost in seeds.items()
+                     if sid in self.row]
+
+        times = {}
+        roots = {}
+        for target in targets:
+            j = self.row.get(target)
+            if j is None:
+                continue
+            best = INF
+            for i, cost, sid in seed_rows:
+                t = cost + times_table[i * n_hubs + j]
+                if t < best:
+                    best = t
+                    roots[target] = sid
+            if best != INF:
+                times[target] = best
+        return times, SeededMatrixTree(self, network, roots)
+
+    def path(self, from_station_id, to_station_id):
+        """
+        Node indices from one station hub to another, following the source
+        hub's predecessor row. Returns None if there is no route.
+        """
+        if self.time(from_station_id, to_station_id) is None:
+            return None
+        preds = self.preds
+        base = self.row[from_station_id] * self.n_nodes
+        v = self.hub_nodes[self.row[to_station_id]]
+        path = [v]
+        while preds[base + v] != -1:
+            v = preds[base + v]
+            path.append(v)
+        path.reverse()
+        return path
+
+
+class SeededMatrixTree:
+    """
+    Path lookup for a multi-seed composition: each target's path follows
+    the predecessor row of the seed hub it was reached from.
+    """
+
+    def __init__(self, matrix, network, roots):
+        self.matrix = matrix
+        self.network = network
+        self.roots = roots
+        self._trees = {}
+
+    def _tree_for(self, node):
+        sid = self.roots[int(node)]
+        tree = self._trees.get(sid)
+        if tree is None:
+            tree = self._trees[sid] = self.matrix.tree(sid, self.network)
+        return tree
+
+    def path(self, node):
+        """Node IDs from the chosen seed hub to the hub `node`."""
+        return self._tree_for(node).path(node)
+
+    def line_mask(self, node):
+        """Bitmask of the service lines on the path to `node`."""
+        return self._tree_for(node).line_mask(node)
+
+
+def build_station_matrix(network, station_ids, excluded_lines=0):
+    """
+    Run a full search from each station hub in `network`, avoiding lines
+    in the `excluded_lines` mask.
+    """
+    station_ids = [sid for sid in sorted(station_ids)
+                   if network.hub(sid) is not None]
+    hub_nodes = array('i', (network.hub(sid) for sid in station_ids))
+
+    times = array('d')
+    preds = array('i')
+    for source in hub_nodes:
+        dist, pred = dijkstra(network, {source: 0.0},
+                              excluded_lines=excluded_lines)
+        times.extend(dist[h] for h in hub_nodes)
+        preds.extend(pred)
+
+    return StationMatrix(array('i', station_ids), hub_nodes, times, preds,
+                         len(network), network.offsets, network.targets,
+                         network.weights)
+
+
+def _same_values(a, b):
+    """Whether two int arrays or memoryviews hold the same values."""
+    return (len(a) == len(b)
+            and memoryview(a).tobytes() == memoryview(b).tobytes())
+
+
+def _changed_edges(previous, network):
+    """(u, v, old weight, new weight) for each directed edge that changed."""
+    changed = []
+    for u in range(network.number_of_nodes()):
+        for e in range(network.offsets[u], network.offsets[u + 1]):
+            if previous.weights[e] != network.weights[e]:
+                changed.append((u, network.targets[e], previous.weights[e],
+                                network.weights[e]))
+    return changed
+
+
+def _tree_affected(previous, base, root, changed):
+    """
+    Whether the changed edges invalidate the predecessor tree at
+    previous.preds[base:base + nodes]. It stays a shortest-path tree unless
+    one of its own edges changed, or a changed edge now gives some node a
+    shorter route than the tree's (tree distances are walked up from the
+    edge's end with the old weights).
+    """
+    preds = previous.preds
+    offsets = previous.offsets
+    targets = previous.targets
+    weights = previous.weights
+    dist = {root: 0.0}
+
+    def tree_distance(v):
+        chain = []
+        while v not in dist:
+            if preds[base + v] == -1:
+                return INF
+            chain.append(v)
+            v = preds[base + v]
+        d = dist[v]
+        for x in reversed(chain):
+            p = preds[base + x]
+            for e in range(offsets[p], offsets[p + 1]):
+                if targets[e] == x:
+                    d += weights[e]
+                    break
+            dist[x] = d
+        return d
+
+    for u, v, old, new in changed:
+        if preds[base + v] == u:
+            return True
+        if new < old and tree_distance(u) + new < tree_distance(v):
+            return True
+    return False
+
+
+def repair_station_matrix(previous, network, station_ids):
+    """
+    Bring a matrix built from an earlier version of the data up to date
+    with `network`, searching again only from the hubs whose trees a
+    changed edge affects. Only edge weights (connection and interchange
+    times) can change: if stations, nodes or edges were added or removed,
+    returns None and the matrix must be rebuilt.
+
+    Returns (matrix, rows searched again).
+    """
+    station_ids = [sid for sid in sorted(station_ids)
+                   if network.hub(sid) is not None]
+    hub_nodes = array('i', (network.hub(sid) for sid in station_ids))
+    n = len(network)
+    if (previous.n_nodes != n
+            or not _same_values(previous.station_ids,
+                                array('i', station_ids))
+            or not _same_values(previous.hub_nodes, hub_nodes)
+            or not _same_values(previous.offsets, network.offsets)
+            or not _same_values(previous.targets, network.targets)):
+        return None
+
+    changed = _changed_edges(previous, network)
+    n_hubs = len(hub_nodes)
+    times = array('d')
+    times.frombytes(memoryview(previous.times).tobytes())
+    preds = array('i')
+    preds.frombytes(memoryview(previous.preds).tobytes())
+    repaired = 0
+    for i, source in enumerate(hub_nodes):
+        if not _tree_affected(previous, i * n, source, changed):
+            continue
+        dist, pred = dijkstra(network, {source: 0.0})
+        times[i * n_hubs:(i + 1) * n_hubs] = array(
+            'd', (dist[h] for h in hub_nodes))
+        preds[i * n:(i + 1) * n] = array('i', pred)
+        repaired += 1
+
+    matrix = StationMatrix(array('i', station_ids), hub_nodes, times, preds,
+                           n, network.offsets, network.targets,
+                           network.weights)
+    return matrix, repaired
+
+
+def write_station_matrix(path, matrix, checksum):
+    """Write a matrix to `path`, replacing any existing file atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, checksum,
+                            len(matrix.station_ids), matrix.n_nodes,
+                            len(matrix.targets)))
+        for part in (matrix.station_ids, matrix.hub_nodes, matrix.times,
+                     matrix.weights, matrix.preds, matrix.offsets,
+                     matrix.targets):
+            f.write(memoryview(part).tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_station_matrix(path, checksum=None):
+    """
+    Memory-map a matrix file. Returns None if the file is missing, from an
+    older format, or was built from different data files (pass checksum
+    None to accept a stale matrix, e.g. to repair it).
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    (magic, version, file_checksum, n_hubs, n_nodes,
+     n_edges) = HEADER.unpack_from(mapping)
+    expected_size = (HEADER.size + n_hubs * (8 + 8 * n_hubs + 4 * n_nodes)
+                     + 8 * n_edges + 4 * (n_nodes + 1) + 4 * n_edges)
+    if (magic != MAGIC or version != FORMAT_VERSION
+            or checksum not in (None, file_checksum)
+            or len(mapping) != expected_size):
+        mapping.close()
+        return None
+
+    view = memoryview(mapping)
+    offset = HEADER.size
+    station_ids = view[offset:offset + 4 * n_hubs].cast('i')
+    offset += 4 * n_hubs
+    hub_nodes = view[offset:offset + 4 * n_hubs].cast('i')
+    offset += 4 * n_hubs
+    times = view[offset:offset + 8 * n_hubs * n_hubs].cast('d')
+    offset += 8 * n_hubs * n_hubs
+    weights = view[offset:offset + 8 * n_edges].cast('d')
+    offset += 8 * n_edges
+    preds = view[offset:offset + 4 * n_hubs * n_nodes].cast('i')
+    offset += 4 * n_hubs * n_nodes
+    offsets = view[offset:offset + 4 * (n_nodes + 1)].cast('i')
+    offset += 4 * (n_nodes + 1)
+    targets = view[offset:offset + 4 * n_edges].cast('i')
+
+    return StationMatrix(station_ids, hub_nodes, times, preds, n_nodes,
+                         offsets, targets, weights, mapping=mapping)
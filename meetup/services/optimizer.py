@@ -7,11 +7,15 @@ Selects candidate meeting stations and scores them by different criteria:
 - Quick arrival: same as fairness, outbound only
 - Easy trip home: minimise the longest individual return journey
 
-Uses the local NetworkX graph for all journey time calculations.
+Uses the shared, read-only compiled network for all journey time
+calculations. People join the network as search seeds (their nearest
+stations plus walking time), so no per-request graph copy is needed.
 """
 import math
 import networkx as nx
-from .graph import get_graph, get_stations, get_journey, get_lines_used
+from .graph import (
+    get_network, get_stations, get_journeys_from, get_stations_within,
+)
 from .walking import find_nearest_stations, haversine_distance
 
 # How far from the centroid to search for candidate stations (km)
@@ -20,6 +24,10 @@ CANDIDATE_RADIUS_KM = 8.0
 # Maximum number of results to return
 MAX_RESULTS = 5
 
+# Isochrone origins are rounded to this many decimal places (about 100 m)
+# so nearby requests share cached results
+ISOCHRONE_SNAP_DECIMALS = 3
+
 
 def _compute_centroid(locations):
     """Compute geographic centroid of a list of (lat, lon) tuples."""
@@ -59,57 +67,65 @@ def _get_candidate_stations(origins, radius_km=CANDIDATE_RADIUS_KM):
     return list(candidates)
 
 
-def _connect_person_to_graph(graph, person_id, lat, lon):
+def _person_seeds(lat, lon):
     """
-    Add a virtual person node to the graph, connected to their nearest stations
-    via walking-time edges.
-
-    Returns the virtual node ID.
+    Seed costs for searching from (or to) a person's location: the hub
+    nodes of their nearest stations, each with its walking time.
     """
-    virtual_node = f"person_{person_id}"
-    nearest = find_nearest_stations(lat, lon)
-
-    graph.add_node(virtual_node, name=f"Person {person_id}",
-                   lat=lat, lon=lon, is_virtual=True)
-
-    for station_id, info, dist_km, walk_minutes in nearest:
-        # Connect to the station's hub node
+    network = get_network()
+    seeds = {}
+    for station_id, info, dist_km, walk_minutes in find_nearest_stations(lat,
+                                                                         lon):
         hub_node = str(station_id)
-        if hub_node in graph:
-            graph.add_edge(virtual_node, hub_node,
-                           weight=walk_minutes, line='walking',
-                           edge_type='walking')
-
-    return virtual_node
-
-
-def _remove_virtual_nodes(graph):
-    """Remove all virtual person nodes from the graph."""
-    virtual_nodes = [n for n in graph.nodes()
-                     if str(n).startswith('person_')]
-    graph.remove_nodes_from(virtual_nodes)
+        if hub_node in network:
+            seeds[hub_node] = walk_minutes
+    return seeds
 
 
-def _get_journey_details(graph, from_node, to_station_id):
+def _add_journey_details(network, people, station, outbound_searches,
+                         return_searches):
     """
-    Get detailed journey info from a node to a station hub.
-    Returns dict with time, lines used, and path info.
-    Uses a single Dijkstra call for both time and path.
-    """
-    hub_node = str(to_station_id)
-    time, path = get_journey(graph, from_node, hub_node)
-    if time is None:
-        return None
-
-    lines = get_lines_used(graph, path) if path else set()
-
-    return {
-        'time_minutes': round(time, 1),
-        'lines': sorted(lines),
-    }
+    Fill in per-person journey details and lines for a ranked station.
+    Only called for stations that are actually shown, since walking the
+    search trees costs far more than reading times.
 
-
-def calculate_meetup_spots(people):
+    Lines come from each tree as bitmasks, which don't depend on the
+    direction of travel, so return journeys (searched from home) need no
+    path reversal. The station's mask is the OR of its journeys' masks.
+    """
+    hub_node = str(station['station_id'])
+    station_mask = 0
+
+    outbound_details = []
+    for i, (_times, tree) in enumerate(outbound_searches):
+        mask = tree.line_mask(hub_node)
+        station_mask |= mask
+        outbound_details.append({
+            'person': people[i]['name'],
+            'direction': 'outbound',
+            'time_minutes': station['outbound_times'][i],
+            'lines': sorted(network.line_names(mask)),
+        })
+
+    return_details = []
+    for i, (_times, tree) in enumerate(return_searches):
+        time = station['return_times'][i]
+        mask = 0 if time is None else tree.line_mask(hub_node)
+        station_mask |= mask
+        return_details.append({
+            'person': people[i]['name'],
+            'direction': 'return',
+            'time_minutes': time,
+            'lines': sorted(network.line_names(mask)),
+        })
+
+    station['outbound_details'] = outbound_details
+    station['return_details'] = return_details
+    station['lines_mask'] = station_mask
+    station['lines_used'] = sorted(network.line_names(station_mask))
+
+
+def calculate_meetup_spots(people, excluded_lines=0):
     """
     Calculate the best meeting stations for a group of people.
 
@@ -118,6 +134,8 @@ def calculate_meetup_spots(people):
             - name: str
             - origin_lat, origin_lon: float (where they're coming from)
             - home_lat, home_lon: float (where they'll go home to)
+        excluded_lines: bitmask of lines to route around (e.g. suspended
+            lines, see disruptions.disrupted_lines_mask)
 
     Returns:
         dict with keys: 'fairness', 'efficiency', 'quick_arrival', 'easy_home'
@@ -125,154 +143,203 @@ def calculate_meetup_spots(people):
             - station_id, station_name, lat, lon
             - score (the metric value)
             - journeys: per-person journey details
+            - lines_used, and lines_mask: the same lines as a bitmask over
+              the network's line bits
     """
     if len(people) < 2:
         return {'error': 'Need at least 2 people'}
 
-    graph = get_graph()
+    network = get_network()
     stations = get_stations()
 
-    # Work on a copy so we can add virtual nodes without polluting the cache
-    g = graph.copy()
-
-    try:
-        # Connect each person's origin and home to the graph
-        origin_nodes = []
-        home_nodes = []
-        for i, person in enumerate(people):
-            origin_node = _connect_person_to_graph(
-                g, f"origin_{i}", person['origin_lat'], person['origin_lon'])
-            origin_nodes.append(origin_node)
-
-            home_node = _connect_person_to_graph(
-                g, f"home_{i}", person['home_lat'], person['home_lon'])
-            home_nodes.append(home_node)
-
-        # Get candidate stations
-        origins = [(p['origin_lat'], p['origin_lon']) for p in people]
-        candidates = _get_candidate_stations(origins)
-
-        if not candidates:
-            return {'error': 'No candidate stations found near the group'}
-
-        # Score each candidate station
-        scored = []
-        for station_id in candidates:
-            hub_node = str(station_id)
-            if hub_node not in g:
-                continue
-
-            # Compute outbound journey times (origin -> station)
-            outbound_times = []
-            outbound_details = []
-            all_reachable = True
-            for i, origin_node in enumerate(origin_nodes):
-                details = _get_journey_details(g, origin_node, station_id)
-                if details is None:
-                    all_reachable = False
-                    break
-                outbound_times.append(details['time_minutes'])
-                outbound_details.append({
-                    'person': people[i]['name'],
-                    'direction': 'outbound',
-                    'time_minutes': details['time_minutes'],
-                    'lines': details['lines'],
-                })
-
-            if not all_reachable:
-                continue
-
-            # Compute return journey times (station -> home)
-            return_times = []
-            return_details = []
-            for i, home_node in enumerate(home_nodes):
-                details = _get_journey_details(g, hub_node, home_node)
-                if details is None:
-                    # If return journey not found, still allow station but
-                    # mark return as unknown
-                    return_times.append(None)
-                    return_details.append({
-                        'person': people[i]['name'],
-                        'direction': 'return',
-                        'time_minutes': None,
-                        'lines': [],
-                    })
-                else:
-                    return_times.append(details['time_minutes'])
-                    return_details.append({
-                        'person': people[i]['name'],
-                        'direction': 'return',
-                        'time_minutes': details['time_minutes'],
-                        'lines': details['lines'],
-                    })
-
-            station_info = stations[station_id]
-
-            # Collect all lines used across all journeys for disruption checking
-            all_lines = set()
-            for d in outbound_details + return_details:
-                all_lines.update(d.get('lines', []))
-
-            scored.append({
-                'station_id': station_id,
-                'station_name': station_info['name'],
-                'lat': station_info['lat'],
-                'lon': station_info['lon'],
-                'outbound_times': outbound_times,
-                'return_times': return_times,
-                'outbound_details': outbound_details,
-                'return_details': return_details,
-                'lines_used': sorted(all_lines),
-                # Scores
-                'score_fairness': max(outbound_times) + (
-                    max(t for t in return_times if t is not None)
-                    if any(t is not None for t in return_times) else 0
-                ),
-                'score_efficiency': sum(outbound_times),
-                'score_quick_arrival': max(outbound_times),
-                'score_easy_home': (
-                    max(t for t in return_times if t is not None)
-                    if any(t is not None for t in return_times) else float('inf')
-                ),
+    # Seed each person's origin and home from their nearest stations
+    origin_seeds = [
+        _person_seeds(p['origin_lat'], p['origin_lon']) for p in people]
+    home_seeds = [
+        _person_seeds(p['home_lat'], p['home_lon']) for p in people]
+
+    # Get candidate stations
+    origins = [(p['origin_lat'], p['origin_lon']) for p in people]
+    candidates = _get_candidate_stations(origins)
+
+    if not candidates:
+        return {'error': 'No candidate stations found near the group'}
+
+    candidates = [sid for sid in candidates if str(sid) in network]
+
+    # One search per origin covers every candidate's outbound journey.
+    # Return journeys use one search rooted at each home: the graph is
+    # undirected, so home -> station time equals station -> home time.
+    candidate_nodes = [str(sid) for sid in candidates]
+    outbound_searches = [
+        get_journeys_from(network, seeds, candidate_nodes, excluded_lines)
+        for seeds in origin_seeds
+    ]
+    return_searches = [
+        get_journeys_from(network, seeds, candidate_nodes, excluded_lines)
+        for seeds in home_seeds
+    ]
+
+    # Score each candidate station on journey times alone; paths and
+    # lines are only rebuilt for the stations that make the results
+    scored = []
+    for station_id in candidates:
+        hub_node = str(station_id)
+
+        # Compute outbound journey times (origin -> station)
+        outbound_times = []
+        all_reachable = True
+        for times, _tree in outbound_searches:
+            time = times.get(hub_node)
+            if time is None:
+                all_reachable = False
+                break
+            outbound_times.append(round(time, 1))
+
+        if not all_reachable:
+            continue
+
+        # Compute return journey times (station -> home); if a return
+        # journey isn't found, still allow the station but mark it unknown
+        return_times = []
+        for times, _tree in return_searches:
+            time = times.get(hub_node)
+            return_times.append(None if time is None else round(time, 1))
+
+        station_info = stations[station_id]
+        known_returns = [t for t in return_times if t is not None]
+
+        scored.append({
+            'station_id': station_id,
+            'station_name': station_info['name'],
+            'lat': station_info['lat'],
+            'lon': station_info['lon'],
+            'outbound_times': outbound_times,
+            'return_times': return_times,
+            # Scores
+            'score_fairness': max(outbound_times) + (
+                max(known_returns) if known_returns else 0
+            ),
+            'score_efficiency': sum(outbound_times),
+            'score_quick_arrival': max(outbound_times),
+            'score_easy_home': (
+                max(known_returns) if known_returns else float('inf')
+            ),
+        })
+
+    if not scored:
+        return {'error': 'Could not find reachable stations for all people'}
+
+    # Sort by each scoring mode and take top results
+    modes = [
+        ('fairness', 'score_fairness'),
+        ('efficiency', 'score_efficiency'),
+        ('quick_arrival', 'score_quick_arrival'),
+        ('easy_home', 'score_easy_home'),
+    ]
+    ranked = {
+        mode: sorted(scored, key=lambda x: x[key])[:MAX_RESULTS]
+        for mode, key in modes
+    }
+
+    # Rebuild paths once per shown station, across all modes
+    shown = {s['station_id']: s for top in ranked.values() for s in top}
+    for s in shown.values():
+        _add_journey_details(network, people, s, outbound_searches,
+                             return_searches)
+
+    results = {}
+    for mode, key in modes:
+        results[mode] = []
+        for s in ranked[mode]:
+            google_maps_url = (
+                f"https://www.google.com/maps/search/"
+                f"?api=1&query={s['lat']},{s['lon']}"
+            )
+            results[mode].append({
+                'station_id': s['station_id'],
+                'station_name': s['station_name'],
+                'lat': s['lat'],
+                'lon': s['lon'],
+                'score': round(s[key], 1),
+                'score_fairness': round(s['score_fairness'], 1),
+                'score_efficiency': round(s['score_efficiency'], 1),
+                'score_quick_arrival': round(s['score_quick_arrival'], 1),
+                'score_easy_home': round(s['score_easy_home'], 1),
+                'outbound_details': s['outbound_details'],
+                'return_details': s['return_details'],
+                'lines_used': s['lines_used'],
+                'lines_mask': s['lines_mask'],
+                'google_maps_url': google_maps_url,
             })
 
-        if not scored:
-            return {'error': 'Could not find reachable stations for all people'}
-
-        # Sort by each scoring mode and take top results
-        results = {}
-        for mode, key in [
-            ('fairness', 'score_fairness'),
-            ('efficiency', 'score_efficiency'),
-            ('quick_arrival', 'score_quick_arrival'),
-            ('easy_home', 'score_easy_home'),
-        ]:
-            sorted_stations = sorted(scored, key=lambda x: x[key])
-            results[mode] = []
-            for s in sorted_stations[:MAX_RESULTS]:
-                google_maps_url = (
-                    f"https://www.google.com/maps/search/"
-                    f"?api=1&query={s['lat']},{s['lon']}"
-                )
-                results[mode].append({
-                    'station_id': s['station_id'],
-                    'station_name': s['station_name'],
-                    'lat': s['lat'],
-                    'lon': s['lon'],
-                    'score': round(s[key], 1),
-                    'score_fairness': round(s['score_fairness'], 1),
-                    'score_efficiency': round(s['score_efficiency'], 1),
-                    'score_quick_arrival': round(s['score_quick_arrival'], 1),
-                    'score_easy_home': round(s['score_easy_home'], 1),
-                    'outbound_details': s['outbound_details'],
-                    'return_details': s['return_details'],
-                    'lines_used': s['lines_used'],
-                    'google_maps_url': google_maps_url,
-                })
-
-        return results
-
-    finally:
-        # Clean up virtual nodes from the copy (not strictly necessary
-        # since we're working on a copy, but good practice)
-        pass
+    return results
+
+
+def _point_seeds(point):
+    """Search seeds for a matrix point: a station hub, or a location."""
+    if 'station_id' in point:
+        return {str(point['station_id']): 0.0}
+    return _person_seeds(point['lat'], point['lon'])
+
+
+def calculate_travel_times(origins, destinations, excluded_lines=0):
+    """
+    Travel-time matrix between points, each a dict with either a
+    station_id or lat/lon (joined to the network at its nearest stations,
+    with walking time, as for people).
+
+    Runs one search per origin to every destination's seed stations (or
+    composes the answer from the station oracle when every point is a
+    station), so the cost grows with the number of origins, not pairs.
+    Returns a list of rows of minutes, None where a destination can't be
+    reached.
+    """
+    destination_seeds = [_point_seeds(p) for p in destinations]
+    targets = sorted({node for seeds in destination_seeds for node in seeds})
+    network = get_network()
+
+    rows = []
+    for origin in origins:
+        seeds = _point_seeds(origin)
+        times = {}
+        if seeds and targets:
+            times, _tree = get_journeys_from(network, seeds, targets,
+                                             excluded_lines)
+        row = []
+        for seeds in destination_seeds:
+            best = min((times[node] + walk for node, walk in seeds.items()
+                        if node in times), default=None)
+            row.append(None if best is None else round(best, 1))
+        rows.append(row)
+    return rows
+
+
+def calculate_isochrone(lat, lon, minutes, excluded_lines=0):
+    """
+    Every station reachable within `minutes` of a location, walking to its
+    nearest stations first and avoiding `excluded_lines`. The location is
+    snapped to a grid of ISOCHRONE_SNAP_DECIMALS so repeated and nearby
+    requests are answered from the cache.
+
+    Returns (origin, stations): the snapped (lat, lon), and a list of
+    station dicts (station_id, name, lat, lon, minutes), nearest first.
+    """
+    lat = round(lat, ISOCHRONE_SNAP_DECIMALS)
+    lon = round(lon, ISOCHRONE_SNAP_DECIMALS)
+    times = get_stations_within(_person_seeds(lat, lon), minutes,
+                                excluded_lines)
+
+    stations = get_stations()
+    reachable = []
+    for sid, time in sorted(times.items(),
+                            key=lambda item: (item[1], item[0])):
+        info = stations[sid]
+        reachable.append({
+            'station_id': sid,
+            'name': info['name'],
+            'lat': info['lat'],
+            'lon': info['lon'],
+            'minutes': round(time, 1),
+        })
+    return (lat, lon), reachable
@@ -0,0 +1,248 @@
+"""
+Round-based (RAPTOR-style) journey planner over line patterns.
+
+Instead of the hub/line-node graph, the network is held as patterns:
+ordered stop sequences along each line, cut at branch points and
+terminals, stored back to back in flat arrays. Each stop on a pattern is
+a "slot", a (station, line) pair with the time it takes to get between
+the station entrance and that line's platform.
+
+Round k finds the best arrival at every station using exactly k rides.
+It boards every line at the stations that improved in round k - 1, then
+scans that line's patterns in both directions, carrying the best on-board
+time from stop to stop. A line's patterns meet at its branch points, and
+staying on the same line through one isn't a change (the graph doesn't
+count it as one either), so a line's scans repeat until no on-board time
+improves. Arrival times match a graph search, and the round a station was
+last improved in gives its fewest-changes count for free.
+
+There are no timetables, so on-board time is simply the boarding time
+plus the running times.
+"""
+from array import array
+from collections import namedtuple
+
+from .routing import INF
+
+# best time per station ID, and the changes used to reach it in that time
+RaptorResult = namedtuple('RaptorResult', ['times', 'transfers', 'rounds'])
+
+
+class PatternNetwork:
+    """
+    Line patterns in flat arrays. Pattern p covers positions
+    pattern_offsets[p]:pattern_offsets[p + 1] of pattern_slots and
+    pattern_times, where pattern_times holds the running time from the
+    previous stop (0 for the first). Slot s is a stop of station
+    slot_station[s] on line slot_line[s], with link time slot_link[s].
+    """
+
+    def __init__(self, lines, slot_station, slot_line, slot_link,
+                 pattern_offsets, pattern_slots, pattern_times,
+                 pattern_line):
+        self.lines = lines
+        self.slot_station = slot_station
+        self.slot_line = slot_line
+        self.slot_link = slot_link
+        self.pattern_offsets = pattern_offsets
+        self.pattern_slots = pattern_slots
+        self.pattern_times = pattern_times
+        self.pattern_line = pattern_line
+
+        self.line_patterns = [[] for _ in lines]
+        for p, line in enumerate(pattern_line):
+            self.line_patterns[line].append(p)
+        # Stations you can enter or leave by (those with a link time)
+        self.station_slots = {}
+        for slot, sid in enumerate(slot_station):
+            if slot_link[slot] != INF:
+                self.station_slots.setdefault(sid, []).append(slot)
+
+    def number_of_patterns(self):
+        return len(self.pattern_line)
+
+    def __contains__(self, station_id):
+        return station_id in self.station_slots
+
+
+def _line_chains(adjacency):
+    """
+    Cut one line's track graph into maximal chains of stations, breaking
+    at branch points and terminals (any station without exactly two
+    neighbours). Loops with no such station are cut at their first stop.
+    """
+    used = set()
+    chains = []
+
+    def walk(start, nxt):
+        chain = [start]
+        prev, here = start, nxt
+        while True:
+            used.add(frozenset((prev, here)))
+            chain.append(here)
+            if len(adjacency[here]) != 2 or here == start:
+                return chain
+            onward = [v for v in adjacency[here]
+                      if frozenset((here, v)) not in used]
+            if not onward:
+                return chain
+            prev, here = here, onward[0]
+
+    for station, neighbours in adjacency.items():
+        if len(neighbours) == 2:
+            continue
+        for v in neighbours:
+            if frozenset((station, v)) not in used:
+                chains.append(walk(station, v))
+
+    for station, neighbours in adjacency.items():
+        for v in neighbours:
+            if frozenset((station, v)) not in used:
+                chains.append(walk(station, v))
+    return chains
+
+
+def build_pattern_network(connections, link_times):
+    """
+    Build line patterns from connection rows (station1_id, station2_id,
+    line, time_minutes) and hub link times {(station_id, line): minutes}.
+    Stations without a link time can be ridden through but not used to
+    get on or off.
+    """
+    lines = []
+    line_ids = {}
+    tracks = {}  # line -> {station: {neighbour: minutes}}
+    for conn in connections:
+        line = conn['line']
+        if line not in line_ids:
+            line_ids[line] = len(lines)
+            lines.append(line)
+        adjacency = tracks.setdefault(line, {})
+        s1 = conn['station1_id']
+        s2 = conn['station2_id']
+        adjacency.setdefault(s1, {})[s2] = conn['time_minutes']
+        adjacency.setdefault(s2, {})[s1] = conn['time_minutes']
+
+    slot_ids = {}
+    slot_station = array('i')
+    slot_line = array('i')
+    slot_link = array('d')
+    pattern_offsets = array('i', [0])
+    pattern_slots = array('i')
+    pattern_times = array('d')
+    pattern_line = array('i')
+
+    for line in lines:
+        adjacency = tracks[line]
+        for station in adjacency:
+            slot_ids[(station, line)] = len(slot_station)
+            slot_station.append(station)
+            slot_line.append(line_ids[line])
+            slot_link.append(link_times.get((station, line), INF))
+
+        for chain in _line_chains(adjacency):
+            prev = None
+            for station in chain:
+                pattern_slots.append(slot_ids[(station, line)])
+                pattern_times.append(
+                    0.0 if prev is None else adjacency[prev][station])
+                prev = station
+            pattern_offsets.append(len(pattern_slots))
+            pattern_line.append(line_ids[line])
+
+    return PatternNetwork(lines, slot_station, slot_line, slot_link,
+                          pattern_offsets, pattern_slots, pattern_times,
+                          pattern_line)
+
+
+def _scan_line(patterns, line, ride):
+    """
+    Carry on-board times along every pattern of `line`, both ways, until
+    none improves. `ride` maps slot to best on-board time this round and
+    is updated in place.
+    """
+    offsets = patterns.pattern_offsets
+    slots = patterns.pattern_slots
+    times = patterns.pattern_times
+    changed = True
+    while changed:
+        changed = False
+        for p in patterns.line_patterns[line]:
+            start, end = offsets[p], offsets[p + 1]
+            # Forward: running time into position i is times[i]
+            carry = INF
+            for i in range(start, end):
+                carry += times[i]
+                slot = slots[i]
+                best = ride.get(slot, INF)
+                if best < carry:
+                    carry = best
+                elif carry < best:
+                    ride[slot] = carry
+                    changed = True
+            # Backward: running time out of position i is times[i]
+            carry = INF
+            for i in range(end - 1, start - 1, -1):
+                slot = slots[i]
+                best = ride.get(slot, INF)
+                if best < carry:
+                    carry = best
+                elif carry < best:
+                    ride[slot] = carry
+                    changed = True
+                carry += times[i]
+
+
+def raptor(patterns, seeds, max_transfers=None):
+    """
+    Earliest arrival at every station from `seeds`, a {station_id:
+    starting cost} dict (one or many origins, e.g. nearest stations with
+    walking times). Runs rounds until nothing improves, or until
+    max_transfers changes have been allowed.
+
+    Returns a RaptorResult: `times` maps station ID to minutes, and
+    `transfers` to the fewest changes of line that reach it in that time
+    (0 for a single ride, or for a seed station itself).
+    """
+    slot_station = patterns.slot_station
+    slot_line = patterns.slot_line
+    slot_link = patterns.slot_link
+    station_slots = patterns.station_slots
+
+    best = {}
+    transfers = {}
+    marked = {}
+    for sid, cost in seeds.items():
+        if sid in station_slots and cost < best.get(sid, INF):
+            best[sid] = float(cost)
+            transfers[sid] = 0
+            marked[sid] = float(cost)
+
+    max_rounds = INF if max_transfers is None else max_transfers + 1
+    rounds = 0
+    while marked and rounds < max_rounds:
+        rounds += 1
+
+        # Board every line at the stations improved last round
+        ride = {}
+        lines = set()
+        for sid, time in marked.items():
+            for slot in station_slots[sid]:
+                boarding = time + slot_link[slot]
+                if boarding < ride.get(slot, INF):
+                    ride[slot] = boarding
+                    lines.add(slot_line[slot])
+        for line in lines:
+            _scan_line(patterns, line, ride)
+
+        # Get off wherever that beats every earlier round
+        marked = {}
+        for slot, time in ride.items():
+            arrival = time + slot_link[slot]
+            sid = slot_station[slot]
+            if arrival < best.get(sid, INF):
+                best[sid] = arrival
+                transfers[sid] = rounds - 1
+                marked[sid] = arrival
+
+    return RaptorResult(best, transfers, rounds)
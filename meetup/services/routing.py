@@ -0,0 +1,886 @@
+"""
+Compiled routing engine for the meetup network.
+
+Flattens a NetworkX graph into integer-indexed CSR (compressed sparse row)
+arrays and runs a heap-based Dijkstra directly over them. Node IDs are only
+parsed and rendered at the edges of a query, so the hot loop never touches
+strings or NetworkX's per-edge attribute dicts.
+
+Edges of node i live at positions offsets[i]:offsets[i + 1] of the targets,
+weights and edge_lines arrays. The graph is undirected, so every edge is
+stored once in each direction.
+
+Each line gets a bit (its index in `lines`), so the lines used on a
+journey, a station's journeys or a whole request are int bitmasks that
+combine with `|` and only turn back into names for display.
+
+Point-to-point searches run as A* guided by landmark (ALT) bounds by
+default: exact times from a few far-flung station hubs which, by the
+triangle inequality, bound the time between any two nodes from below and
+follow the real line topology. They can also run bidirectionally, growing
+from both ends until the frontiers meet, or as A* guided by straight-line
+distance to the target divided by the fastest speed seen on any edge.
+"""
+import heapq
+import math
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
+
+INF = float('inf')
+
+EARTH_RADIUS_KM = 6371.0
+
+# Point-to-point search used when callers don't ask for a specific one
+DEFAULT_SEARCH_METHOD = 'alt'
+
+# Landmark station hubs picked for ALT bounds
+LANDMARK_COUNT = 8
+
+# Result of a point-to-point search; `settled` counts nodes expanded
+JourneySearch = namedtuple('JourneySearch', ['time', 'path', 'settled'])
+
+# Edge "lines" that aren't real services and shouldn't be reported to users
+NON_SERVICE_LINES = ('transfer', 'walking')
+
+
+class NodeIds(Sequence):
+    """
+    Read-only sequence of a network's node IDs, rendered on access from
+    the compact node tables rather than held as strings.
+    """
+
+    def __init__(self, network):
+        self.network = network
+
+    def __len__(self):
+        return len(self.network.node_station)
+
+    def __getitem__(self, i):
+        # Index through a range so negative indices and slices behave as
+        # they would on a list
+        if isinstance(i, slice):
+            return [self.network.node_id(u) for u in range(len(self))[i]]
+        return self.network.node_id(range(len(self))[i])
+
+
+class NodeIndex:
+    """
+    Node ID to node index lookups, parsed from the ID (see
+    RoutingNetwork.node_index) instead of kept in a dict of strings.
+    """
+
+    def __init__(self, network):
+        self.network = network
+
+    def __contains__(self, node):
+        return self.network.node_index(node) is not None
+
+    def __getitem__(self, node):
+        u = self.network.node_index(node)
+        if u is None:
+            raise KeyError(node)
+        return u
+
+    def get(self, node, default=None):
+        u = self.network.node_index(node)
+        return default if u is None else u
+
+
+class RoutingNetwork:
+    """
+    Read-only CSR representation of a weighted undirected graph.
+
+    Nodes are dense integers. Station attributes live once per station, in
+    the station_ids/station_lat/station_lon table; node_station gives each
+    node's row in it and node_line its line's index in `lines` (-1 for a
+    station hub). Node IDs ("123" for a hub, "123:Victoria" for a line
+    node) are only rendered when a result is returned, and parsed back by
+    node_index. Nodes that aren't station nodes (node_station -1) keep
+    their IDs in `other_ids`, a {node index: ID} dict that is empty for
+    the meetup network.
+
+    Line i has bit 1 << i in line masks; service_mask covers every line
+    except transfers and walking.
+
+    max_speed is the fastest straight-line speed over any edge, in km per
+    minute; with the station coordinates (NaN if unknown) it bounds the
+    time left to any target for A*.
+
+    landmarks are the node indices of the ALT landmarks and landmark_dist
+    their times to every node (landmark i's time to node v at
+    landmark_dist[i * nodes + v]); both None until landmark_tables()
+    computes them or they are loaded from a snapshot.
+
+    The arrays may be any indexable sequences of the right type: arrays
+    when compiled in process, or memoryviews into a mapped snapshot.
+    """
+
+    def __init__(self, offsets, targets, weights, edge_lines, lines,
+                 station_ids, station_lat, station_lon, node_station,
+                 node_line, other_ids=None, max_speed=None, landmarks=None,
+                 landmark_dist=None, mapping=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.edge_lines = edge_lines
+        self.lines = lines
+        self.line_bits = {line: 1 << i for i, line in enumerate(lines)}
+        self.service_mask = 0
+        for line, bit in self.line_bits.items():
+            if line is not None and line not in NON_SERVICE_LINES:
+                self.service_mask |= bit
+        self._blocked = {}
+
+        self.station_ids = station_ids
+        self.station_lat = station_lat
+        self.station_lon = station_lon
+        self.node_station = node_station
+        self.node_line = node_line
+        self.other_ids = other_ids or {}
+        self.node_ids = NodeIds(self)
+        self.index = NodeIndex(self)
+        self._index_nodes()
+
+        self._set_unit_vectors()
+        self.max_speed = (self._measure_max_speed() if max_speed is None
+                          else max_speed)
+        self.landmarks = landmarks
+        self.landmark_dist = landmark_dist
+        # Keeps a file mapping alive while the arrays are views into it
+        self._mapping = mapping
+
+    def _index_nodes(self):
+        """
+        Group node indices by station row (station r's nodes are
+        station_nodes[station_node_offsets[r]:station_node_offsets[r + 1]])
+        so an ID can be parsed back to its node without a string dict.
+        """
+        self._station_row = {sid: r for r, sid in enumerate(self.station_ids)}
+        self._line_ids = {line: i for i, line in enumerate(self.lines)}
+        self._other_index = {node: u for u, node in self.other_ids.items()}
+
+        counts = array('i', [0] * (len(self.station_ids) + 1))
+        for row in self.node_station:
+            if row >= 0:
+                counts[row + 1] += 1
+        for r in range(len(self.station_ids)):
+            counts[r + 1] += counts[r]
+        self.station_node_offsets = counts
+        self.station_nodes = array('i', [0] * counts[-1])
+        fill = array('i', counts)
+        for u, row in enumerate(self.node_station):
+            if row >= 0:
+                self.station_nodes[fill[row]] = u
+                fill[row] += 1
+
+    def _set_unit_vectors(self):
+        """
+        Each node's position on the unit sphere, or None if unknown. A
+        station's nodes share one tuple.
+        """
+        station_xyz = []
+        for lat, lon in zip(self.station_lat, self.station_lon):
+            if math.isnan(lat) or math.isnan(lon):
+                station_xyz.append(None)
+                continue
+            lat = math.radians(lat)
+            lon = math.radians(lon)
+            station_xyz.append((math.cos(lat) * math.cos(lon),
+                                math.cos(lat) * math.sin(lon),
+                                math.sin(lat)))
+        self.node_xyz = [None if row < 0 else station_xyz[row]
+                         for row in self.node_station]
+
+    def node_id(self, u):
+        """Render the ID of node index `u`."""
+        row = self.node_station[u]
+        if row < 0:
+            return self.other_ids[u]
+        sid = self.station_ids[row]
+        line = self.node_line[u]
+        return str(sid) if line < 0 else f'{sid}:{self.lines[line]}'
+
+    def node_index(self, node):
+        """Index of the node with ID `node`, or None if there isn't one."""
+        u = self._other_index.get(node)
+        if u is not None or not isinstance(node, str):
+            return u
+        sid, sep, line = node.partition(':')
+        if not sid.isdigit() or str(int(sid)) != sid:
+            return None
+        if not sep:
+            return self.hub(int(sid))
+        line = self._line_ids.get(line)
+        row = self._station_row.get(int(sid))
+        if line is None or row is None:
+            return None
+        return self._station_node(row, line)
+
+    def hub(self, station_id):
+        """Node index of a station's hub, or None."""
+        row = self._station_row.get(station_id)
+        if row is None:
+            return None
+        return self._station_node(row, -1)
+
+    def _station_node(self, row, line):
+        for k in range(self.station_node_offsets[row],
+                       self.station_node_offsets[row + 1]):
+            u = self.station_nodes[k]
+            if self.node_line[u] == line:
+                return u
+        return None
+
+    def node_coordinates(self, u):
+        """(lat, lon) of node index `u`, or None if unknown."""
+        row = self.node_station[u]
+        if row < 0 or math.isnan(self.station_lat[row]):
+            return None
+        return self.station_lat[row], self.station_lon[row]
+
+    def distance_km(self, u, v):
+        """
+        Straight-line (chord) distance between two nodes in km, or None if
+        either has no coordinates. The chord never exceeds the haversine
+        distance and needs no trig per call, so it is what A* uses.
+        """
+        a = self.node_xyz[u]
+        b = self.node_xyz[v]
+        if a is None or b is None:
+            return None
+        return EARTH_RADIUS_KM * math.dist(a, b)
+
+    def _measure_max_speed(self):
+        """
+        Fastest km-per-minute over any edge with both ends located. Zero
+        time over a real distance makes the bound useless, so gives INF.
+        """
+        fastest = 0.0
+        for u in range(len(self)):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                km = self.distance_km(u, self.targets[e])
+                if not km:
+                    continue
+                if self.weights[e] <= 0:
+                    return INF
+                fastest = max(fastest, km / self.weights[e])
+        return fastest or INF
+
+    def landmark_tables(self):
+        """
+        (landmarks, landmark_dist), picking the landmarks now if the
+        network wasn't loaded with them (as when writing a snapshot).
+        """
+        if self.landmarks is None:
+            self.landmarks, self.landmark_dist = select_landmarks(self)
+        return self.landmarks, self.landmark_dist
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Compile a NetworkX graph into CSR arrays. Nodes with a station_id
+        attribute become station nodes: hubs if is_hub is set, otherwise
+        line nodes on their `line`. Station coordinates come from whichever
+        of a station's nodes carries lat/lon (the hub, in the meetup graph).
+        """
+        node_list = list(graph.nodes())
+        position = {node: i for i, node in enumerate(node_list)}
+
+        lines = []
+        line_ids = {}
+        offsets = array('i', [0])
+        targets = array('i')
+        weights = array('d')
+        edge_lines = array('i')
+
+        for node in node_list:
+            for neighbour, data in graph.adj[node].items():
+                line = data.get('line')
+                if line not in line_ids:
+                    line_ids[line] = len(lines)
+                    lines.append(line)
+                targets.append(position[neighbour])
+                weights.append(float(data.get('weight', 1)))
+                edge_lines.append(line_ids[line])
+            offsets.append(len(targets))
+
+        station_ids = array('i')
+        station_lat = array('d')
+        station_lon = array('d')
+        station_rows = {}
+        node_station = array('i')
+        node_line = array('i')
+        other_ids = {}
+        for u, node in enumerate(node_list):
+            attrs = graph.nodes[node]
+            sid = attrs.get('station_id')
+            hub = bool(attrs.get('is_hub'))
+            line = attrs.get('line')
+            rendered = (str(sid) if hub else f'{sid}:{line}')
+            if not isinstance(sid, int) or node != rendered:
+                node_station.append(-1)
+                node_line.append(-1)
+                other_ids[u] = node
+                continue
+            if sid not in station_rows:
+                station_rows[sid] = len(station_ids)
+                station_ids.append(sid)
+                station_lat.append(math.nan)
+                station_lon.append(math.nan)
+            row = station_rows[sid]
+            if 'lat' in attrs and 'lon' in attrs:
+                station_lat[row] = float(attrs['lat'])
+                station_lon[row] = float(attrs['lon'])
+            if hub:
+                node_line.append(-1)
+            else:
+                if line not in line_ids:
+                    line_ids[line] = len(lines)
+                    lines.append(line)
+                node_line.append(line_ids[line])
+            node_station.append(row)
+
+        return cls(offsets, targets, weights, edge_lines, lines, station_ids,
+                   station_lat, station_lon, node_station, node_line,
+                   other_ids)
+
+    def __len__(self):
+        return len(self.node_station)
+
+    def __contains__(self, node):
+        return self.node_index(node) is not None
+
+    def number_of_nodes(self):
+        return len(self.node_station)
+
+    def number_of_edges(self):
+        return len(self.targets) // 2
+
+    def edge_line(self, u, v):
+        """Line name on the edge between node indices u and v, or None."""
+        for e in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[e] == v:
+                return self.lines[self.edge_lines[e]]
+        return None
+
+    def edge_mask(self, u, v):
+        """Line bit of the edge between node indices u and v, or 0."""
+        for e in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[e] == v:
+                return 1 << self.edge_lines[e]
+        return 0
+
+    def line_mask(self, names):
+        """Bitmask of the named lines; names not in the network are ignored."""
+        mask = 0
+        for name in names:
+            mask |= self.line_bits.get(name, 0)
+        return mask
+
+    def blocked_edges(self, excluded_lines):
+        """
+        Per-edge flags (a bytearray) for edges on any line in the
+        `excluded_lines` mask, or None if the mask is empty. Built once per
+        mask, so searches skip closed lines without copying the network.
+        """
+        if not excluded_lines:
+            return None
+        blocked = self._blocked.get(excluded_lines)
+        if blocked is None:
+            blocked = bytearray(
+                1 if (1 << line) & excluded_lines else 0
+                for line in self.edge_lines)
+            self._blocked[excluded_lines] = blocked
+        return blocked
+
+    def line_names(self, mask):
+        """Set of line names whose bits are set in `mask`."""
+        names = set()
+        i = 0
+        while mask:
+            if mask & 1:
+                names.add(self.lines[i])
+            mask >>= 1
+            i += 1
+        return names
+
+
+def dijkstra(network, sources, targets=None, excluded_lines=0,
+             max_time=INF, potential=None):
+    """
+    Run Dijkstra over the CSR arrays from `sources`, a mapping of node index
+    to starting cost. Several seeds make it a multi-source search, e.g. a
+    person's nearest stations seeded with their walking times.
+
+    If `targets` (node indices) is given, stops as soon as all of them are
+    settled; otherwise searches the whole network. Edges on lines in the
+    `excluded_lines` mask are skipped, and nodes further than `max_time`
+    are never reached. With a `potential` (a consistent lower bound on a
+    node's time to the targets, such as landmark_potential for a single
+    target) the heap is ordered A*-style, so fewer nodes are settled
+    before the targets; other nodes' distances may then be upper bounds.
+    Returns (dist, pred) lists indexed by node; unreached nodes have dist
+    INF and pred -1.
+    """
+    offsets = network.offsets
+    edge_targets = network.targets
+    weights = network.weights
+    blocked = network.blocked_edges(excluded_lines)
+
+    n = len(network)
+    dist = [INF] * n
+    pred = [-1] * n
+    done = bytearray(n)
+    bound = None if potential is None else {}
+    heap = []
+    for source, cost in sources.items():
+        if cost < dist[source]:
+            dist[source] = float(cost)
+            h = 0.0 if bound is None else potential(source)
+            heap.append((dist[source] + h, source))
+    heapq.heapify(heap)
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+
+    if targets is not None:
+        pending = bytearray(n)
+        for t in targets:
+            pending[t] = 1
+        remaining = sum(pending)
+        if remaining == 0:
+            return dist, pred
+    else:
+        pending = None
+        remaining = -1
+
+    while heap:
+        _key, u = heappop(heap)
+        if done[u]:
+            continue
+        done[u] = 1
+        if pending is not None and pending[u]:
+            remaining -= 1
+            if remaining == 0:
+                break
+        d = dist[u]
+        for e in range(offsets[u], offsets[u + 1]):
+            if blocked is not None and blocked[e]:
+                continue
+            v = edge_targets[e]
+            nd = d + weights[e]
+            if nd < dist[v]:
+                if nd > max_time:
+                    continue
+                dist[v] = nd
+                pred[v] = u
+                if bound is None:
+                    heappush(heap, (nd, v))
+                else:
+                    h = bound.get(v)
+                    if h is None:
+                        h = bound[v] = potential(v)
+                    heappush(heap, (nd + h, v))
+
+    return dist, pred
+
+
+def build_path(pred, target):
+    """Walk a predecessor list back from `target`. Returns node indices."""
+    path = [target]
+    while pred[path[-1]] != -1:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
+
+
+class ShortestPathTree:
+    """
+    Predecessor tree from a single search, for rebuilding paths to any node
+    the search settled. Paths start at whichever seed the node was reached
+    from. `pred` is indexed by node and may be any int
+    sequence (list, array, or a memoryview into a mapped file).
+    """
+
+    def __init__(self, network, pred, offset=0):
+        self.network = network
+        self.pred = pred
+        self.offset = offset
+        self._masks = {}
+
+    def path(self, node):
+        """Node IDs from the root of the tree to `node`."""
+        pred = self.pred
+        offset = self.offset
+        v = self.network.index[node]
+        path = [v]
+        while pred[offset + v] != -1:
+            v = pred[offset + v]
+            path.append(v)
+        path.reverse()
+        return [self.network.node_id(i) for i in path]
+
+    def line_mask(self, node):
+        """
+        Service lines on the path to `node`, as a bitmask. Masks propagate
+        down the tree (a node's mask is its parent's plus the edge between
+        them) and are memoised, so paths sharing a prefix share the work.
+        """
+        network = self.network
+        pred = self.pred
+        offset = self.offset
+        masks = self._masks
+        v = network.index[node]
+        chain = []
+        while v not in masks and pred[offset + v] != -1:
+            chain.append(v)
+            v = pred[offset + v]
+        mask = masks.get(v, 0)
+        for v in reversed(chain):
+            mask |= network.edge_mask(pred[offset + v], v)
+            masks[v] = mask
+        return mask & network.service_mask
+
+
+def stations_within(network, seeds, max_time, excluded_lines=0):
+    """
+    Every station whose hub is reachable from `seeds` ({node ID: starting
+    cost}) within `max_time` minutes, as {station_id: minutes}. One
+    search, cut off at the time limit.
+    """
+    sources = {}
+    for node, cost in seeds.items():
+        u = network.node_index(node)
+        if u is not None and cost <= max_time:
+            sources[u] = cost
+    dist, _pred = dijkstra(network, sources, excluded_lines=excluded_lines,
+                           max_time=max_time)
+    return {network.station_ids[network.node_station[u]]: dist[u]
+            for u in range(len(network))
+            if dist[u] <= max_time and network.node_line[u] == -1
+            and network.node_station[u] >= 0}
+
+
+def journeys_from(network, from_node, to_nodes, excluded_lines=0):
+    """
+    One search from `from_node`, stopping once every node in `to_nodes` is
+    settled. `from_node` is a node ID, or a {node ID: starting cost} dict of
+    seeds. Lines in the `excluded_lines` mask aren't used. Returns
+    ({node: time} for reachable targets, ShortestPathTree). Unknown
+    sources or targets give no times.
+    """
+    if not isinstance(from_node, dict):
+        from_node = {from_node: 0.0}
+    sources = {}
+    for node, cost in from_node.items():
+        u = network.node_index(node)
+        if u is not None:
+            sources[u] = cost
+    if not sources:
+        return {}, None
+    targets = {}
+    for node in to_nodes:
+        u = network.node_index(node)
+        if u is not None:
+            targets[u] = node
+
+    # A single target gets a goal-directed search if landmarks are loaded
+    potential = None
+    if len(targets) == 1 and network.landmarks is not None:
+        potential = landmark_potential(network, next(iter(targets)))
+    dist, pred = dijkstra(network, sources, targets, excluded_lines,
+                          potential=potential)
+    times = {node: dist[t] for t, node in targets.items() if dist[t] != INF}
+    return times, ShortestPathTree(network, pred)
+
+
+def geographic_potential(network, target):
+    """
+    A* heuristic towards `target`: straight-line distance divided by the
+    network's fastest speed. No edge covers ground faster than max_speed,
+    so this never overestimates the remaining time (it is admissible, and
+    consistent, so A* settles each node once). Nodes without coordinates
+    get 0.
+    """
+    target_xyz = network.node_xyz[target]
+    if target_xyz is None or network.max_speed == INF:
+        return lambda v: 0.0
+    scale = EARTH_RADIUS_KM / network.max_speed
+    node_xyz = network.node_xyz
+
+    def potential(v):
+        xyz = node_xyz[v]
+        if xyz is None:
+            return 0.0
+        return scale * math.dist(xyz, target_xyz)
+
+    return potential
+
+
+def select_landmarks(network, count=LANDMARK_COUNT):
+    """
+    Pick up to `count` station hubs as ALT landmarks by farthest-point
+    selection: first the hub farthest from an arbitrary one, then each
+    time the hub farthest from its nearest landmark so far. Landmarks on
+    the edges of the network give the tightest bounds, and hubs no
+    landmark reaches count as farthest, so every connected part gets one.
+    Returns (landmark node indices, landmark_dist) arrays.
+    """
+    n = len(network)
+    hubs = [u for u in range(n)
+            if network.node_line[u] == -1 and network.node_station[u] >= 0]
+    landmarks = array('i')
+    landmark_dist = array('d')
+    if not hubs:
+        return landmarks, landmark_dist
+
+    dist, _pred = dijkstra(network, {hubs[0]: 0.0})
+    landmark = max(hubs, key=lambda u: -1.0 if dist[u] == INF else dist[u])
+    nearest = {u: INF for u in hubs}
+    while len(landmarks) < count:
+        dist, _pred = dijkstra(network, {landmark: 0.0})
+        landmarks.append(landmark)
+        landmark_dist.extend(dist)
+        for u in hubs:
+            if dist[u] < nearest[u]:
+                nearest[u] = dist[u]
+        landmark = max(hubs, key=nearest.__getitem__)
+        if nearest[landmark] == 0:
+            break  # every hub is already a landmark
+    return landmarks, landmark_dist
+
+
+def landmark_potential(network, target):
+    """
+    ALT heuristic towards node index `target`. By the triangle inequality
+    a node v is at least |d(L, target) - d(L, v)| from the target for
+    every landmark L; the potential is the largest of these. Each term
+    changes by at most an edge's weight along that edge, so it is
+    consistent. Landmarks that don't reach both nodes give no bound.
+    """
+    landmarks, landmark_dist = network.landmark_tables()
+    n = len(network)
+    tables = []
+    for i in range(len(landmarks)):
+        t = landmark_dist[i * n + target]
+        if t != INF:
+            tables.append((i * n, t))
+
+    def potential(v):
+        best = 0.0
+        for offset, t in tables:
+            x = landmark_dist[offset + v]
+            if x != INF:
+                b = t - x if t > x else x - t
+                if b > best:
+                    best = b
+        return best
+
+    return potential
+
+
+def goal_directed_search(network, source, target, potential,
+                         excluded_lines=0):
+    """
+    A* from node index `source` to `target`, ordering the heap by distance
+    plus `potential(v)`, a consistent lower bound on v's time to target.
+    Closing lines only lengthens journeys, so the bound still holds with
+    an `excluded_lines` mask. Returns (time or INF, pred list, nodes
+    settled).
+    """
+    offsets = network.offsets
+    edge_targets = network.targets
+    weights = network.weights
+    blocked = network.blocked_edges(excluded_lines)
+
+    n = len(network)
+    dist = [INF] * n
+    pred = [-1] * n
+    done = bytearray(n)
+    bound = {}
+    dist[source] = 0.0
+    heap = [(potential(source), source)]
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+    settled = 0
+
+    while heap:
+        _f, u = heappop(heap)
+        if done[u]:
+            continue
+        done[u] = 1
+        settled += 1
+        if u == target:
+            break
+        du = dist[u]
+        for e in range(offsets[u], offsets[u + 1]):
+            if blocked is not None and blocked[e]:
+                continue
+            v = edge_targets[e]
+            nd = du + weights[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                h = bound.get(v)
+                if h is None:
+                    h = bound[v] = potential(v)
+                heappush(heap, (nd + h, v))
+
+    return dist[target], pred, settled
+
+
+def bidirectional_search(network, source, target, excluded_lines=0):
+    """
+    Dijkstra from both ends at once, always expanding the side whose
+    frontier is nearer. The graph is undirected, so the backward search
+    uses the same edges. Stops once the two frontier minimums add up to
+    at least the best meeting distance, at which point no unexplored
+    path can be shorter. Edges on lines in the `excluded_lines` mask are
+    skipped. Returns (time or INF, index path or None, nodes settled).
+    """
+    if source == target:
+        return 0.0, [source], 1
+
+    offsets = network.offsets
+    edge_targets = network.targets
+    weights = network.weights
+    blocked = network.blocked_edges(excluded_lines)
+
+    n = len(network)
+    # index 0 = forward from source, 1 = backward from target
+    dist = ([INF] * n, [INF] * n)
+    pred = ([-1] * n, [-1] * n)
+    done = (bytearray(n), bytearray(n))
+    dist[0][source] = 0.0
+    dist[1][target] = 0.0
+    heaps = ([(0.0, source)], [(0.0, target)])
+    heappop = heapq.heappop
+    heappush = heapq.heappush
+    best = INF
+    meet = -1
+    settled = 0
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d, u = heappop(heaps[side])
+        my_done = done[side]
+        if my_done[u]:
+            continue
+        my_done[u] = 1
+        settled += 1
+
+        my_dist = dist[side]
+        my_pred = pred[side]
+        other_dist = dist[1 - side]
+        for e in range(offsets[u], offsets[u + 1]):
+            if blocked is not None and blocked[e]:
+                continue
+            v = edge_targets[e]
+            nd = d + weights[e]
+            if nd < my_dist[v]:
+                my_dist[v] = nd
+                my_pred[v] = u
+                heappush(heaps[side], (nd, v))
+            # Every relaxed edge is a candidate meeting point
+            total = nd + other_dist[v]
+            if total < best:
+                best = total
+                meet = v
+
+    if meet == -1:
+        return INF, None, settled
+
+    path = build_path(pred[0], meet)
+    v = meet
+    while pred[1][v] != -1:
+        v = pred[1][v]
+        path.append(v)
+    return best, path, settled
+
+
+def _search_with(potential_factory):
+    """Wrap goal_directed_search with a potential into a search method."""
+    def search(network, source, target, excluded_lines=0):
+        potential = potential_factory(network, target)
+        time, pred, settled = goal_directed_search(network, source, target,
+                                                   potential, excluded_lines)
+        if time == INF:
+            return INF, None, settled
+        return time, build_path(pred, target), settled
+    return search
+
+
+def _no_potential(network, target):
+    return lambda v: 0.0
+
+
+_alt_search = _search_with(landmark_potential)
+
+
+def landmark_search(network, source, target, excluded_lines=0):
+    """
+    A* with landmark bounds. Picking landmarks costs a full search per
+    landmark, far more than one query, so a network compiled without them
+    (an ad-hoc graph, say) is searched bidirectionally instead.
+    """
+    if network.landmarks is None:
+        return bidirectional_search(network, source, target, excluded_lines)
+    return _alt_search(network, source, target, excluded_lines)
+
+
+# Point-to-point search methods: name -> search(network, source, target,
+# excluded_lines=0) over node indices, returning (time or INF, index path
+# or None, settled). Plain Dijkstra is A* with a zero potential.
+SEARCH_METHODS = {
+    'dijkstra': _search_with(_no_potential),
+    'astar': _search_with(geographic_potential),
+    'alt': landmark_search,
+    'bidirectional': bidirectional_search,
+}
+
+
+def point_to_point(network, from_node, to_node,
+                   method=DEFAULT_SEARCH_METHOD, excluded_lines=0):
+    """
+    Search between two node IDs with the named method, avoiding lines in
+    the `excluded_lines` mask. Returns a JourneySearch; time and path are
+    None if there is no route.
+    """
+    source = network.node_index(from_node)
+    target = network.node_index(to_node)
+    if source is None or target is None:
+        return JourneySearch(None, None, 0)
+
+    time, path, settled = SEARCH_METHODS[method](network, source, target,
+                                                 excluded_lines)
+    if time == INF:
+        return JourneySearch(None, None, settled)
+
+    return JourneySearch(time, [network.node_id(i) for i in path], settled)
+
+
+def shortest_path(network, from_node, to_node, excluded_lines=0):
+    """
+    Shortest (time, path) between two node IDs, with the path as node IDs,
+    avoiding lines in the `excluded_lines` mask. Returns (None, None) if
+    either node is missing or no path exists.
+    """
+    time, path, _settled = point_to_point(network, from_node, to_node,
+                                          excluded_lines=excluded_lines)
+    return time, path
+
+
+def path_line_mask(network, path):
+    """Bitmask of the service lines used along a path of node IDs."""
+    nodes = [network.index[node] for node in path]
+    mask = 0
+    for u, v in zip(nodes, nodes[1:]):
+        mask |= network.edge_mask(u, v)
+    return mask & network.service_mask
+
+
+def lines_on_path(network, path):
+    """Service lines used along a path of node IDs."""
+    return network.line_names(path_line_mask(network, path))
@@ -0,0 +1,173 @@
+"""
+Compiled network snapshot.
+
+Serialises everything a worker needs to answer journey queries (the
+station table and the routing network's node tables, CSR adjacency arrays
+and landmark tables) into one binary file, so a worker can start from a
+single read instead of parsing the CSVs and rebuilding the graph.
+
+Layout:
+
+    header      magic, format version, data checksum, section sizes
+    arrays      weights, landmark times, station lat/lon (float64), then
+                offsets, targets, edge lines, station ids, node station
+                rows, node lines, landmark nodes (int32), each padded to
+                8 bytes
+    metadata    UTF-8 JSON: line names, max edge speed, station names and
+                zones, IDs of any non-station nodes
+
+The network's station table is the station table: every station gets a
+row, in the order of the stations dict, and nodes refer to their row.
+
+Like the station matrix, the file carries a checksum of the data files it
+was built from and is ignored once they change. It is memory-mapped
+read-only and the arrays are views into the mapping, so every worker
+using the same file shares one copy of their pages; only the per-station
+node grouping, metadata and stations dict are private to each process.
+"""
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from .routing import RoutingNetwork
+
+MAGIC = b'MNET'
+FORMAT_VERSION = 4
+
+# magic, version, sha256 of data files, node count, directed edge count,
+# station count, landmark count, metadata size
+HEADER = struct.Struct('<4sI32sIIIII')
+
+
+class NetworkSnapshot:
+    """
+    A routing network plus the tables it was compiled from. `mapped_bytes`
+    is the size of the file mapping the network's arrays point into.
+    """
+
+    def __init__(self, network, stations, mapped_bytes=0):
+        self.network = network
+        self.stations = stations
+        self.mapped_bytes = mapped_bytes
+
+
+def _padded(data):
+    return data + b'\0' * (-len(data) % 8)
+
+
+def write_snapshot(path, network, stations, checksum):
+    """Write a snapshot to `path`, replacing any existing file atomically."""
+    station_ids = list(stations)
+    landmarks, landmark_dist = network.landmark_tables()
+    row = {sid: i for i, sid in enumerate(station_ids)}
+    meta = json.dumps({
+        'lines': network.lines,
+        'max_speed': network.max_speed,
+        'stations': [[stations[sid]['name'], stations[sid]['zone']]
+                     for sid in station_ids],
+        'other_ids': sorted(network.other_ids.items()),
+    }).encode('utf-8')
+
+    sections = [
+        array('d', network.weights),
+        array('d', landmark_dist),
+        array('d', (stations[sid]['lat'] for sid in station_ids)),
+        array('d', (stations[sid]['lon'] for sid in station_ids)),
+        array('i', network.offsets),
+        array('i', network.targets),
+        array('i', network.edge_lines),
+        array('i', station_ids),
+        array('i', (-1 if r < 0 else row[network.station_ids[r]]
+                    for r in network.node_station)),
+        array('i', network.node_line),
+        array('i', landmarks),
+    ]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Per-process temporary name: several workers may rebuild at once
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_padded(HEADER.pack(
+            MAGIC, FORMAT_VERSION, checksum, len(network),
+            len(network.targets), len(station_ids), len(landmarks),
+            len(meta))))
+        for section in sections:
+            f.write(_padded(section.tobytes()))
+        f.write(meta)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path, checksum):
+    """
+    Memory-map a snapshot. Returns None if the file is missing, from an
+    older format, or built from different data files.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    (magic, version, file_checksum, n_nodes, n_edges, n_stations,
+     n_landmarks, meta_size) = HEADER.unpack_from(mapping)
+    offset = len(_padded(bytes(HEADER.size)))
+    section_sizes = [8 * n_edges, 8 * n_landmarks * n_nodes, 8 * n_stations,
+                     8 * n_stations, 4 * (n_nodes + 1), 4 * n_edges,
+                     4 * n_edges, 4 * n_stations, 4 * n_nodes, 4 * n_nodes,
+                     4 * n_landmarks]
+    expected_size = (offset + sum(size + (-size % 8) for size in section_sizes)
+                     + meta_size)
+    if (magic != MAGIC or version != FORMAT_VERSION
+            or file_checksum != checksum or len(mapping) != expected_size):
+        mapping.close()
+        return None
+
+    try:
+        meta = json.loads(mapping[len(mapping) - meta_size:])
+    except ValueError:
+        mapping.close()
+        return None
+
+    view = memoryview(mapping)
+
+    def take(typecode, count):
+        nonlocal offset
+        size = struct.calcsize(typecode) * count
+        section = view[offset:offset + size].cast(typecode)
+        offset += size + (-size % 8)
+        return section
+
+    weights = take('d', n_edges)
+    landmark_dist = take('d', n_landmarks * n_nodes)
+    lats = take('d', n_stations)
+    lons = take('d', n_stations)
+    offsets = take('i', n_nodes + 1)
+    targets = take('i', n_edges)
+    edge_lines = take('i', n_edges)
+    station_ids = take('i', n_stations)
+    node_station = take('i', n_nodes)
+    node_line = take('i', n_nodes)
+    landmarks = take('i', n_landmarks)
+
+    stations = {}
+    for i, (name, zone) in enumerate(meta['stations']):
+        sid = station_ids[i]
+        stations[sid] = {
+            'id': sid,
+            'name': name,
+            'lat': lats[i],
+            'lon': lons[i],
+            'zone': zone,
+        }
+
+    network = RoutingNetwork(offsets, targets, weights, edge_lines,
+                             meta['lines'], station_ids, lats, lons,
+                             node_station, node_line,
+                             dict(meta['other_ids']), meta['max_speed'],
+                             landmarks, landmark_dist, mapping=mapping)
+    return NetworkSnapshot(network, stations, len(mapping))
@@ -0,0 +1,167 @@
+"""
+Fuzzy station-name search.
+
+Names and aliases are normalised (lowercase, "&" as "and", punctuation and
+words like "station" dropped, "saint" as "st") and indexed two ways:
+
+    prefix      every normalised name and each of its word suffixes
+                ("kings cross st pancras", "cross st pancras", ...), sorted,
+                so a bisect finds names or words starting with the query
+    trigram     each padded word's three-letter grams, mapped to the
+                entries containing them, for typos and partial words
+
+A query is ranked exact match, then name prefix, then word prefix, then
+trigram similarity (Jaccard over the gram sets), shortest name first
+within a tier. Everything is in memory and built once from the stations
+table, so a lookup takes microseconds.
+"""
+import re
+from bisect import bisect_left
+from collections import namedtuple
+
+# Match tiers, best first
+EXACT = 0
+PREFIX = 1
+WORD_PREFIX = 2
+FUZZY = 3
+
+# Trigram similarity below this isn't reported as a fuzzy match
+MIN_SIMILARITY = 0.35
+
+# Other names people use for stations, by station name
+STATION_ALIASES = {
+    "King's Cross St. Pancras": ['Kings Cross', 'St Pancras', 'KX'],
+    'Heathrow Terminals 2 & 3': ['Heathrow', 'Heathrow Terminal 2',
+                                 'Heathrow Terminal 3'],
+    'Elephant & Castle': ['Elephant'],
+    'Tottenham Court Road': ['TCR'],
+    'Kensington (Olympia)': ['Olympia'],
+    'Harrow-on-the-Hill': ['Harrow'],
+    'London City Airport': ['City Airport'],
+    'Battersea Power Station': ['Battersea'],
+    'Charing Cross': ['Trafalgar Square'],
+}
+
+# Words that don't help tell stations apart
+NOISE_WORDS = {'station', 'tube', 'underground', 'the'}
+WORD_SYNONYMS = {'saint': 'st'}
+
+# station_id, the station's name, and the tier it matched at; similarity
+# is the trigram score for FUZZY matches and 1.0 otherwise
+StationMatch = namedtuple('StationMatch',
+                          ['station_id', 'name', 'tier', 'similarity'])
+
+
+def normalise_name(text):
+    """Lowercase words of `text` for matching, e.g. "king's x" -> "kings x"."""
+    text = text.lower().replace('&', ' and ')
+    text = re.sub(r"['’.]", '', text)
+    words = [WORD_SYNONYMS.get(word, word)
+             for word in re.findall(r'[a-z0-9]+', text)
+             if word not in NOISE_WORDS]
+    return ' '.join(words)
+
+
+def _trigrams(text):
+    """Three-letter grams of each word, padded to mark word starts."""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class StationIndex:
+    """
+    Prefix and trigram index over station names and aliases. Entry i is
+    the normalised text entry_text[i] naming station entry_station[i].
+    """
+
+    def __init__(self, stations, aliases=STATION_ALIASES):
+        self.names = {sid: info['name'] for sid, info in stations.items()}
+        self.entry_text = []
+        self.entry_station = []
+        by_name = {info['name']: sid for sid, info in stations.items()}
+        for sid, info in stations.items():
+            self._add_entry(info['name'], sid)
+        for name, names in aliases.items():
+            if name in by_name:
+                for alias in names:
+                    self._add_entry(alias, by_name[name])
+
+        # (key, entry, whole name?) for every name and word suffix
+        keys = []
+        self.grams = {}
+        self.gram_counts = []
+        for entry, text in enumerate(self.entry_text):
+            words = text.split()
+            for i in range(len(words)):
+                keys.append((' '.join(words[i:]), entry, i == 0))
+            grams = _trigrams(text)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(entry)
+        keys.sort()
+        self.keys = keys
+
+    def _add_entry(self, text, station_id):
+        text = normalise_name(text)
+        if text:
+            self.entry_text.append(text)
+            self.entry_station.append(station_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=5):
+        """
+        Best station matches for `query`, best first, at most one per
+        station. Returns a list of StationMatch.
+        """
+        text = normalise_name(query)
+        if not text:
+            return []
+
+        best = {}  # station_id -> (tier, -similarity, entry)
+
+        def offer(entry, tier, similarity):
+            sid = self.entry_station[entry]
+            key = (tier, -similarity, entry)
+            if sid not in best or key < best[sid]:
+                best[sid] = key
+
+        keys = self.keys
+        i = bisect_left(keys, (text,))
+        while i < len(keys) and keys[i][0].startswith(text):
+            key, entry, whole = keys[i]
+            if whole:
+                offer(entry, EXACT if key == text else PREFIX, 1.0)
+            else:
+                offer(entry, WORD_PREFIX, 1.0)
+            i += 1
+
+        grams = _trigrams(text)
+        shared = {}
+        for gram in grams:
+            for entry in self.grams.get(gram, ()):
+                shared[entry] = shared.get(entry, 0) + 1
+        for entry, count in shared.items():
+            similarity = count / (len(grams) + self.gram_counts[entry]
+                                  - count)
+            if similarity >= MIN_SIMILARITY:
+                offer(entry, FUZZY, similarity)
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (item[1][0], item[1][1],
+                              len(self.names[item[0]]), self.names[item[0]]))
+        return [StationMatch(sid, self.names[sid], tier, -negative)
+                for sid, (tier, negative, _entry) in ranked[:limit]]
+
+    def find(self, name):
+        """Station ID whose name or alias is exactly `name`, or None."""
+        matches = self.search(name, limit=1)
+        if matches and matches[0].tier == EXACT:
+            return matches[0].station_id
+        return None
@@ -0,0 +1,139 @@
+"""
+Bounded cache of full shortest-path trees, keyed by source hub and
+disruption state.
+
+People join the network through their few nearest station hubs, so
+requests from the same neighbourhoods keep searching from the same hubs.
+A search from a hub with a given set of closed lines (an excluded_lines
+mask) runs once over the whole network and is kept as two compact
+arrays, dist (float64) and pred (int32), about 12 bytes a node. A
+person's times are then composed from their seeds' cached trees plus
+walking minutes, without searching at all on a hit.
+
+The least recently used trees are dropped beyond `max_trees`. Hits,
+misses, evictions and the bytes held are counted so the size can be
+tuned.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+
+from .routing import INF, ShortestPathTree, dijkstra
+
+
+class TreeCache:
+    """
+    LRU of (dist, pred) arrays for one network, keyed by (source node
+    index, excluded_lines). Safe to share between threads: searches run
+    outside the lock, so two requests missing on the same tree may both
+    search, and the second result replaces the first.
+    """
+
+    def __init__(self, network, max_trees):
+        self.network = network
+        self.max_trees = max_trees
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        # Node IDs seen so far and their indices; at most one per node
+        self._node_index = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._trees)
+
+    def tree(self, source, excluded_lines=0):
+        """(dist, pred) arrays for a full search from node index `source`."""
+        key = (source, excluded_lines)
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None:
+                self._trees.move_to_end(key)
+                self.hits += 1
+                return tree
+            self.misses += 1
+
+        dist, pred = dijkstra(self.network, {source: 0.0},
+                              excluded_lines=excluded_lines)
+        tree = (array('d', dist), array('i', pred))
+        with self._lock:
+            self._trees[key] = tree
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+                self.evictions += 1
+        return tree
+
+    def _index(self, node):
+        u = self._node_index.get(node)
+        if u is None:
+            u = self.network.node_index(node)
+            if u is not None:
+                self._node_index[node] = u
+        return u
+
+    def journeys_from(self, seeds, targets, excluded_lines=0):
+        """
+        Compose times from `seeds` ({node ID: starting cost}) to `targets`
+        (node IDs) out of each seed's cached tree, each target taking the
+        best seed cost plus tree distance. Returns ({target: time}, tree)
+        like routing.journeys_from, or None if a seed isn't a node.
+        """
+        trees = {}
+        for node, cost in seeds.items():
+            u = self._index(node)
+            if u is None:
+                return None
+            trees[u] = (cost, self.tree(u, excluded_lines))
+
+        times = {}
+        roots = {}
+        for target in targets:
+            v = self._index(target)
+            if v is None:
+                continue
+            best = INF
+            for u, (cost, (dist, _pred)) in trees.items():
+                if cost + dist[v] < best:
+                    best = cost + dist[v]
+                    roots[target] = u
+            if best != INF:
+                times[target] = best
+        return times, CachedTreePaths(self.network, trees, roots)
+
+    def stats(self):
+        """Counters and memory use, for tuning max_trees."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'trees': len(self._trees),
+                'max_trees': self.max_trees,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'bytes': sum(dist.itemsize * len(dist)
+                             + pred.itemsize * len(pred)
+                             for dist, pred in self._trees.values()),
+            }
+
+
+class CachedTreePaths:
+    """
+    Path lookup for a composition from cached trees: each target's path
+    follows the tree of the seed it was reached from.
+    """
+
+    def __init__(self, network, trees, roots):
+        self.network = network
+        self.roots = roots
+        self._trees = {u: ShortestPathTree(network, pred)
+                       for u, (_cost, (_dist, pred)) in trees.items()}
+
+    def path(self, node):
+        """Node IDs from the chosen seed to `node`."""
+        return self._trees[self.roots[node]].path(node)
+
+    def line_mask(self, node):
+        """Bitmask of the service lines on the path to `node`."""
+        return self._trees[self.roots[node]].line_mask(node)
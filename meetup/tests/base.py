@@ -0,0 +1,36 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from django.test import TestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import reset_cache
+
+
+def compiled_path_patches(compiled):
+    """Patches pointing every compiled artefact into directory `compiled`."""
+    return [
+        patch.object(graph_module, 'SNAPSHOT_PATH', compiled / 'network.bin'),
+        patch.object(graph_module, 'MATRIX_PATH',
+                     compiled / 'station_matrix.bin'),
+        patch.object(graph_module, 'LABELS_PATH', compiled / 'hub_labels.bin'),
+        patch.object(graph_module, 'CONTRACTION_PATH',
+                     compiled / 'contraction.bin'),
+    ]
+
+
+class CompiledDirTestCase(TestCase):
+    """
+    Writes compiled artefacts into a temporary directory for the class, so
+    tests never touch meetup/data/compiled.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        tmpdir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmpdir.cleanup)
+        for p in compiled_path_patches(Path(tmpdir.name)):
+            p.start()
+            cls.addClassCleanup(p.stop)
+        cls.addClassCleanup(reset_cache)
@@ -0,0 +1,60 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.graph import reset_cache
+
+
+class BenchmarkCommandTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.tmpdir.name) / 'report.json'
+        call_command('benchmark_graph', pairs=20, sources=3, groups=2,
+                     sizes=[2, 3], repeat=1, output=cls.path,
+                     stdout=StringIO())
+        cls.report = json.loads(cls.path.read_text())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        reset_cache()
+        super().tearDownClass()
+
+    def test_report_sections(self):
+        self.assertEqual(set(self.report), {
+            'seed', 'build', 'network', 'single_pair', 'one_to_all',
+            'meetup', 'disrupted_meetup', 'tree_cache'})
+        self.assertEqual(set(self.report['meetup']), {'2', '3'})
+        for summary in self.report['single_pair'].values():
+            self.assertEqual(summary['count'], 20)
+            self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+            self.assertIn('settled', summary)
+
+    def test_methods_agree(self):
+        """Every search method should find the same journey times."""
+        totals = {summary['total_minutes']
+                  for summary in self.report['single_pair'].values()}
+        self.assertEqual(len(totals), 1)
+
+    def test_seeded_runs_match(self):
+        """The same seed should pick the same pairs and groups."""
+        path = Path(self.tmpdir.name) / 'again.json'
+        call_command('benchmark_graph', pairs=20, sources=3, groups=2,
+                     sizes=[2, 3], repeat=1, output=path, stdout=StringIO())
+        again = json.loads(path.read_text())
+        self.assertEqual(again['single_pair']['dijkstra']['total_minutes'],
+                         self.report['single_pair']['dijkstra']
+                         ['total_minutes'])
+        self.assertEqual(again['meetup']['3']['top_stations'],
+                         self.report['meetup']['3']['top_stations'])
+
+    def test_disrupted_meetups_use_tree_cache(self):
+        stats = self.report['tree_cache']
+        self.assertEqual(self.report['disrupted_meetup']['count'], 2)
+        self.assertGreater(stats['misses'], 0)
+        self.assertGreater(stats['bytes'], 0)
@@ -0,0 +1,102 @@
+import random
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import graph as graph_module
+from meetup.services.contraction import (
+    build_contraction_hierarchy, write_contraction_hierarchy,
+    load_contraction_hierarchy,
+)
+from meetup.services.graph import (
+    get_network, get_journey, get_lines_used, get_contraction_hierarchy,
+    write_contraction_index, reset_cache,
+)
+from meetup.services.routing import shortest_path
+
+
+class ContractionHierarchyTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.ch = build_contraction_hierarchy(cls.network)
+        rng = random.Random(42)
+        cls.pairs = [(rng.choice(cls.network.node_ids),
+                      rng.choice(cls.network.node_ids)) for _ in range(200)]
+
+    def test_times_match_dijkstra(self):
+        """CH queries should return exactly the Dijkstra shortest time."""
+        for a, b in self.pairs:
+            expected, _path = shortest_path(self.network, a, b)
+            time, _path = self.ch.query(a, b)
+            self.assertAlmostEqual(time, expected, places=6, msg=f'{a}->{b}')
+
+    def test_paths_unpack_to_original_edges(self):
+        """Unpacked paths should only use original network edges."""
+        index = self.network.index
+        for a, b in self.pairs[:50]:
+            _time, path = self.ch.query(a, b)
+            self.assertEqual(path[0], a)
+            self.assertEqual(path[-1], b)
+            for u, v in zip(path, path[1:]):
+                self.assertIsNotNone(
+                    self.network.edge_line(index[u], index[v]))
+
+    def test_lines_used_on_unpacked_path(self):
+        """get_lines_used should report real lines on an unpacked path."""
+        hubs = [n for n in self.network.node_ids if n.isdigit()]
+        _time, path = self.ch.query(hubs[0], hubs[-1])
+        lines = get_lines_used(self.network, path)
+        self.assertGreater(len(lines), 0)
+        self.assertNotIn('transfer', lines)
+
+    def test_same_node(self):
+        node = self.network.node_ids[0]
+        self.assertEqual(self.ch.query(node, node), (0.0, [node]))
+
+    def test_missing_node(self):
+        self.assertEqual(self.ch.query('nope', '12'), (None, None))
+
+    def test_round_trip_through_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'ch.bin'
+            write_contraction_hierarchy(path, self.ch, b'x' * 32)
+            loaded = load_contraction_hierarchy(path, self.network, b'x' * 32)
+            self.assertIsNotNone(loaded)
+            a, b = self.pairs[0]
+            self.assertEqual(loaded.query(a, b), self.ch.query(a, b))
+            self.assertIsNone(
+                load_contraction_hierarchy(path, self.network, b'y' * 32))
+
+
+class ContractionIndexLookupTest(CompiledDirTestCase):
+    def tearDown(self):
+        reset_cache()
+
+    def test_missing_index_is_optional(self):
+        reset_cache()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch.object(graph_module, 'CONTRACTION_PATH',
+                              Path(tmpdir) / 'missing.bin'):
+                self.assertIsNone(get_contraction_hierarchy())
+
+    def test_get_journey_uses_index(self):
+        """Non-hub journeys on the cached network should go through the CH."""
+        reset_cache()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'ch.bin'
+            with patch.object(graph_module, 'CONTRACTION_PATH', path):
+                write_contraction_index(path)
+                ch = get_contraction_hierarchy()
+                self.assertIsNotNone(ch)
+                network = get_network()
+                a = next(n for n in network.node_ids if ':' in n)
+                b = network.node_ids[-1]
+                with patch.object(ch, 'query',
+                                  wraps=ch.query) as query:
+                    time, path_nodes = get_journey(network, a, b)
+                query.assert_called_once_with(a, b)
+                expected, _ = shortest_path(network, a, b)
+                self.assertAlmostEqual(time, expected, places=6)
@@ -1,9 +1,12 @@
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
-from meetup.services.disruptions import get_line_disruptions
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.disruptions import (
+    get_line_disruptions, disrupted_lines_mask,
+)
+from meetup.services.graph import get_network, reset_cache
 
 
-class DisruptionsTest(TestCase):
+class DisruptionsTest(CompiledDirTestCase):
     @patch('meetup.services.disruptions.requests.get')
     def test_returns_disrupted_lines(self, mock_get):
         """Lines with severity < 10 should be returned as disruptions."""
@@ -118,3 +121,38 @@ class DisruptionsTest(TestCase):
         # Query with different case
         disruptions = get_line_disruptions(['central'])
         self.assertEqual(len(disruptions), 1)
+
+
+class DisruptedLinesMaskTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+
+    def test_mask_covers_disrupted_lines(self):
+        disruptions = [
+            {'line': 'central', 'status': 'Part Suspended', 'reason': ''},
+            {'line': 'Victoria', 'status': 'Minor Delays', 'reason': ''},
+            {'line': 'Not A Line', 'status': 'Closed', 'reason': ''},
+        ]
+        mask = disrupted_lines_mask(self.network, disruptions)
+        self.assertEqual(self.network.line_names(mask),
+                         {'Central', 'Victoria'})
+
+    def test_closed_only(self):
+        """Only whole-line closures should count as lines to avoid."""
+        disruptions = [
+            {'line': 'Central', 'status': 'Suspended', 'severity': 2,
+             'reason': ''},
+            {'line': 'Victoria', 'status': 'Minor Delays', 'severity': 9,
+             'reason': ''},
+            {'line': 'Jubilee', 'status': 'Part Suspended', 'severity': 3,
+             'reason': ''},
+        ]
+        mask = disrupted_lines_mask(self.network, disruptions,
+                                    closed_only=True)
+        self.assertEqual(self.network.line_names(mask), {'Central'})
+
+    def test_no_disruptions(self):
+        self.assertEqual(disrupted_lines_mask(self.network, []), 0)
@@ -1,11 +1,11 @@
-from django.test import TestCase
+from meetup.tests.base import CompiledDirTestCase
 from meetup.services.graph import (
     get_graph, get_stations, get_journey, get_journey_time, get_journey_path,
     get_lines_used, get_station_lookup, reset_cache,
 )
 
 
-class GraphLoadingTest(TestCase):
+class GraphLoadingTest(CompiledDirTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -48,7 +48,7 @@ class GraphLoadingTest(TestCase):
         self.assertIn('oxford circus', lookup)
 
 
-class GraphRoutingTest(TestCase):
+class GraphRoutingTest(CompiledDirTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -0,0 +1,103 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import (
+    get_network, get_stations, get_station_matrix, get_station_oracle,
+    reset_cache,
+)
+from meetup.services.hub_labels import (
+    build_hub_labels, write_hub_labels, load_hub_labels,
+)
+from meetup.services.optimizer import calculate_meetup_spots
+
+
+class HubLabelsTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.matrix = get_station_matrix()
+        cls.labels = build_hub_labels(cls.network, get_stations())
+
+    def test_times_match_matrix(self):
+        """Label queries should give exactly the matrix times."""
+        sids = list(self.matrix.station_ids)
+        for a in sids[::7]:
+            for b in sids[::5]:
+                self.assertEqual(self.labels.time(a, b),
+                                 self.matrix.time(a, b), f'{a}->{b}')
+
+    def test_labels_sorted_by_hub(self):
+        offsets = self.labels.offsets
+        for i in range(len(self.labels)):
+            label = list(self.labels.hubs[offsets[i]:offsets[i + 1]])
+            self.assertEqual(label, sorted(label))
+
+    def test_smaller_than_dense_matrix(self):
+        n = len(self.labels)
+        self.assertLess(self.labels.number_of_entries(), n * n)
+
+    def test_unknown_station(self):
+        self.assertIsNone(self.labels.time(-1, self.matrix.station_ids[0]))
+
+    def test_journeys_from_matches_matrix(self):
+        sids = list(self.matrix.station_ids)
+        seeds = {sids[0]: 3.0, sids[10]: 5.5}
+        targets = sids[50:80]
+        label_times, tree = self.labels.journeys_from(
+            seeds, targets, self.network)
+        matrix_times, _tree = self.matrix.journeys_from(
+            seeds, targets, self.network)
+        self.assertEqual(label_times, matrix_times)
+        path = tree.path(str(targets[0]))
+        self.assertIn(int(path[0]), seeds)
+        self.assertEqual(path[-1], str(targets[0]))
+
+    def test_round_trip_through_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'labels.bin'
+            write_hub_labels(path, self.labels, b'x' * 32)
+            loaded = load_hub_labels(path, b'x' * 32)
+            self.assertIsNotNone(loaded)
+            a, b = self.matrix.station_ids[3], self.matrix.station_ids[-3]
+            self.assertEqual(loaded.time(a, b), self.labels.time(a, b))
+            self.assertIsNone(load_hub_labels(path, b'y' * 32))
+
+
+class LabelOracleTest(CompiledDirTestCase):
+    def tearDown(self):
+        reset_cache()
+
+    def test_oracle_selection(self):
+        reset_cache()
+        with patch.object(graph_module, 'DISTANCE_ORACLE', 'labels'):
+            self.assertIs(get_station_oracle(), graph_module.get_hub_labels())
+        with patch.object(graph_module, 'DISTANCE_ORACLE', 'matrix'):
+            self.assertIs(get_station_oracle(), get_station_matrix())
+
+    def test_optimizer_with_labels(self):
+        """Meetup scoring should give the same times with either oracle."""
+        people = [
+            {
+                'name': 'Alice',
+                'origin_lat': 51.5155, 'origin_lon': -0.0715,
+                'home_lat': 51.5322, 'home_lon': -0.1058,
+            },
+            {
+                'name': 'Bob',
+                'origin_lat': 51.4627, 'origin_lon': -0.1145,
+                'home_lat': 51.4694, 'home_lon': -0.0693,
+            },
+        ]
+        reset_cache()
+        with patch.object(graph_module, 'DISTANCE_ORACLE', 'matrix'):
+            with_matrix = calculate_meetup_spots(people)
+        with patch.object(graph_module, 'DISTANCE_ORACLE', 'labels'):
+            with_labels = calculate_meetup_spots(people)
+        for mode in ['fairness', 'efficiency', 'quick_arrival', 'easy_home']:
+            self.assertEqual(
+                [r['score'] for r in with_matrix[mode]],
+                [r['score'] for r in with_labels[mode]])
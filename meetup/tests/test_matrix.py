@@ -0,0 +1,188 @@
+import copy
+import os
+import tempfile
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.graph import (
+    get_graph, get_network, get_stations, get_station_matrix,
+    get_station_time, get_journey, data_checksum, reset_cache,
+)
+from meetup.services.matrix import (
+    build_station_matrix, write_station_matrix, load_station_matrix,
+    repair_station_matrix,
+)
+from meetup.services.routing import INF, RoutingNetwork, shortest_path
+
+
+class StationMatrixTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.stations = get_stations()
+        cls.matrix = build_station_matrix(cls.network, cls.stations)
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, 'matrix.bin')
+        write_station_matrix(cls.path, cls.matrix, b'x' * 32)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def _station(self, name):
+        for sid, info in self.stations.items():
+            if info['name'].lower() == name.lower():
+                return sid
+        return None
+
+    def test_times_match_search(self):
+        """Matrix times should match a point-to-point search."""
+        for a, b in [('Bank', 'Brixton'), ('Waterloo', 'Canary Wharf'),
+                     ('Whitechapel', 'Paddington')]:
+            sa, sb = self._station(a), self._station(b)
+            expected, _path = shortest_path(self.network, str(sa), str(sb))
+            self.assertAlmostEqual(self.matrix.time(sa, sb), expected,
+                                   places=6)
+
+    def test_path_reconstruction(self):
+        """Paths from the predecessor rows should join the two hubs."""
+        sa, sb = self._station('Bank'), self._station('Brixton')
+        path = self.matrix.path(sa, sb)
+        node_ids = self.network.node_ids
+        self.assertEqual(node_ids[path[0]], str(sa))
+        self.assertEqual(node_ids[path[-1]], str(sb))
+
+    def test_round_trip_through_file(self):
+        """A memory-mapped matrix should answer as the in-memory one does."""
+        loaded = load_station_matrix(self.path, b'x' * 32)
+        self.assertIsNotNone(loaded)
+        sa, sb = self._station('Angel'), self._station('Victoria')
+        self.assertEqual(loaded.time(sa, sb), self.matrix.time(sa, sb))
+        self.assertEqual(loaded.path(sa, sb), self.matrix.path(sa, sb))
+
+    def test_stale_checksum_rejected(self):
+        self.assertIsNone(load_station_matrix(self.path, b'y' * 32))
+
+    def test_missing_file_rejected(self):
+        self.assertIsNone(
+            load_station_matrix(os.path.join(self.tmpdir.name, 'nope'),
+                                b'x' * 32))
+
+    def test_unknown_station(self):
+        self.assertIsNone(self.matrix.time(-1, self._station('Bank')))
+
+
+class StationTimeLookupTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+
+    def test_checksum_is_stable(self):
+        self.assertEqual(data_checksum(), data_checksum())
+        self.assertEqual(len(data_checksum()), 32)
+
+    def test_get_station_time(self):
+        stations = get_stations()
+        lookup = {info['name']: sid for sid, info in stations.items()}
+        time = get_station_time(lookup['Bank'], lookup['Brixton'])
+        self.assertGreater(time, 10)
+        self.assertLess(time, 30)
+
+    def test_get_journey_uses_matrix_for_hubs(self):
+        """Cached-graph get_journey between hubs should match the matrix."""
+        graph = get_graph()
+        matrix = get_station_matrix()
+        a, b = matrix.station_ids[0], matrix.station_ids[-1]
+        time, path = get_journey(graph, str(a), str(b))
+        self.assertEqual(time, matrix.time(a, b))
+        self.assertEqual(path[0], str(a))
+        self.assertEqual(path[-1], str(b))
+
+
+def _edge_weight(network, u, v):
+    for e in range(network.offsets[u], network.offsets[u + 1]):
+        if network.targets[e] == v:
+            return network.weights[e]
+    raise KeyError((u, v))
+
+
+class RepairStationMatrixTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.stations = get_stations()
+        cls.network = RoutingNetwork.from_graph(cls.graph)
+        cls.matrix = build_station_matrix(cls.network, cls.stations)
+
+    def _retimed(self, changes):
+        """The network with some edges re-timed: {(u, v): minutes}."""
+        graph = copy.deepcopy(self.graph)
+        for (u, v), minutes in changes.items():
+            graph[u][v]['weight'] = minutes
+        return RoutingNetwork.from_graph(graph)
+
+    def _assert_repaired(self, network):
+        result = repair_station_matrix(self.matrix, network, self.stations)
+        self.assertIsNotNone(result)
+        repaired, rows = result
+        full = build_station_matrix(network, self.stations)
+        self.assertEqual(list(repaired.times), list(full.times))
+        # Paths through kept rows should still add up to the new times
+        sids = list(repaired.station_ids)
+        for a, b in zip(sids[::37], sids[5::41]):
+            path = repaired.path(a, b)
+            if path is None:
+                continue
+            length = sum(_edge_weight(network, u, v)
+                         for u, v in zip(path, path[1:]))
+            self.assertAlmostEqual(length, repaired.time(a, b), places=6)
+        return rows
+
+    def test_slower_connection(self):
+        rows = self._assert_repaired(
+            self._retimed({('184:Bakerloo', '10:Bakerloo'): 8}))
+        self.assertGreater(rows, 0)
+        self.assertLess(rows, len(self.matrix))
+
+    def test_faster_connection(self):
+        rows = self._assert_repaired(
+            self._retimed({('157:Bakerloo', '203:Bakerloo'): 0.5}))
+        self.assertGreater(rows, 0)
+        self.assertLess(rows, len(self.matrix))
+
+    def test_interchange_and_connection_together(self):
+        link = next((u, v) for u, v, d in self.graph.edges(data=True)
+                    if d['line'] == 'transfer')
+        self._assert_repaired(self._retimed({
+            link: self.graph[link[0]][link[1]]['weight'] + 4,
+            ('107:Bakerloo', '134:Bakerloo'): 2,
+        }))
+
+    def test_unchanged_network_searches_nothing(self):
+        network = RoutingNetwork.from_graph(self.graph)
+        self.assertEqual(self._assert_repaired(network), 0)
+
+    def test_new_connection_needs_rebuild(self):
+        graph = copy.deepcopy(self.graph)
+        graph.add_edge('107:Bakerloo', '1:Piccadilly', weight=1,
+                       line='Bakerloo')
+        network = RoutingNetwork.from_graph(graph)
+        self.assertIsNone(
+            repair_station_matrix(self.matrix, network, self.stations))
+
+    def test_repairs_a_loaded_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'matrix.bin')
+            write_station_matrix(path, self.matrix, b'a' * 32)
+            self.assertIsNone(load_station_matrix(path, b'b' * 32))
+            stale = load_station_matrix(path)
+            network = self._retimed({('107:Bakerloo', '134:Bakerloo'): 9})
+            repaired, _rows = repair_station_matrix(stale, network,
+                                                    self.stations)
+        full = build_station_matrix(network, self.stations)
+        self.assertEqual(list(repaired.times), list(full.times))
+        self.assertNotEqual(full.time(107, 134), INF)
@@ -1,9 +1,16 @@
-from django.test import TestCase
-from meetup.services.optimizer import calculate_meetup_spots
-from meetup.services.graph import reset_cache
+from unittest.mock import patch
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import optimizer
+from meetup.services.optimizer import (
+    calculate_meetup_spots, calculate_travel_times, calculate_isochrone,
+)
+from meetup.services.graph import (
+    get_network, get_stations, get_station_time, reset_cache,
+)
+from meetup.services.walking import find_nearest_stations
 
 
-class OptimizerTest(TestCase):
+class OptimizerTest(CompiledDirTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -223,3 +230,139 @@ class OptimizerTest(TestCase):
             self.assertEqual(len(r['outbound_details']), 2)
             self.assertEqual(r['outbound_details'][0]['person'], 'Alice')
             self.assertEqual(r['outbound_details'][1]['person'], 'Bob')
+
+    def test_return_details_per_person(self):
+        """Each result should have a return journey for each person."""
+        people = [
+            {
+                'name': 'Alice',
+                'origin_lat': 51.5155, 'origin_lon': -0.0715,
+                'home_lat': 51.5322, 'home_lon': -0.1058,
+            },
+            {
+                'name': 'Bob',
+                'origin_lat': 51.4627, 'origin_lon': -0.1145,
+                'home_lat': 51.4694, 'home_lon': -0.0693,
+            },
+        ]
+        results = calculate_meetup_spots(people)
+        for r in results['easy_home']:
+            self.assertEqual(len(r['return_details']), 2)
+            self.assertEqual(r['return_details'][0]['person'], 'Alice')
+            self.assertEqual(r['return_details'][0]['direction'], 'return')
+            times = [d['time_minutes'] for d in r['return_details']]
+            self.assertEqual(r['score_easy_home'], max(times))
+
+    def test_paths_only_built_for_shown_stations(self):
+        """Lines should only be looked up for stations in the results."""
+        people = [
+            {
+                'name': 'Alice',
+                'origin_lat': 51.5155, 'origin_lon': -0.0715,
+                'home_lat': 51.5322, 'home_lon': -0.1058,
+            },
+            {
+                'name': 'Bob',
+                'origin_lat': 51.4627, 'origin_lon': -0.1145,
+                'home_lat': 51.4694, 'home_lon': -0.0693,
+            },
+        ]
+        with patch.object(optimizer, '_add_journey_details',
+                          wraps=optimizer._add_journey_details) as details:
+            results = calculate_meetup_spots(people)
+        shown = {r['station_id'] for mode in results.values() for r in mode}
+        self.assertEqual(details.call_count, len(shown))
+        self.assertLessEqual(len(shown), 4 * optimizer.MAX_RESULTS)
+
+    def test_lines_mask_matches_lines_used(self):
+        """A result's line mask should decode to its lines_used."""
+        people = [
+            {
+                'name': 'Alice',
+                'origin_lat': 51.5155, 'origin_lon': -0.0715,
+                'home_lat': 51.5322, 'home_lon': -0.1058,
+            },
+            {
+                'name': 'Bob',
+                'origin_lat': 51.4627, 'origin_lon': -0.1145,
+                'home_lat': 51.4694, 'home_lon': -0.0693,
+            },
+        ]
+        network = get_network()
+        results = calculate_meetup_spots(people)
+        for r in results['fairness']:
+            self.assertEqual(sorted(network.line_names(r['lines_mask'])),
+                             r['lines_used'])
+            journey_lines = set()
+            for d in r['outbound_details'] + r['return_details']:
+                journey_lines.update(d['lines'])
+            self.assertEqual(sorted(journey_lines), r['lines_used'])
+
+
+class TravelTimesTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        network = get_network()
+        cls.station_ids = sorted(sid for sid in get_stations()
+                                 if str(sid) in network)
+
+    def test_station_times_match_point_to_point(self):
+        origins = self.station_ids[:3]
+        destinations = self.station_ids[100:105]
+        rows = calculate_travel_times(
+            [{'station_id': sid} for sid in origins],
+            [{'station_id': sid} for sid in destinations])
+        self.assertEqual(len(rows), 3)
+        for a, row in zip(origins, rows):
+            self.assertEqual(len(row), 5)
+            for b, time in zip(destinations, row):
+                self.assertEqual(time, round(get_station_time(a, b), 1))
+
+    def test_location_adds_walking(self):
+        """A location's time is the best nearby station plus the walk."""
+        lat, lon = 51.5155, -0.0715  # Whitechapel
+        target = self.station_ids[50]
+        [[time]] = calculate_travel_times([{'lat': lat, 'lon': lon}],
+                                          [{'station_id': target}])
+        expected = min(
+            walk + get_station_time(sid, target)
+            for sid, _info, _km, walk in find_nearest_stations(lat, lon)
+            if sid in self.station_ids)
+        self.assertEqual(time, round(expected, 1))
+
+    def test_same_station(self):
+        sid = self.station_ids[0]
+        self.assertEqual(
+            calculate_travel_times([{'station_id': sid}],
+                                   [{'station_id': sid}]), [[0.0]])
+
+
+class IsochroneTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+
+    def test_within_budget_and_sorted(self):
+        origin, stations = calculate_isochrone(51.51553, -0.07147, 20)
+        self.assertEqual(origin, (51.516, -0.071))
+        self.assertGreater(len(stations), 5)
+        times = [s['minutes'] for s in stations]
+        self.assertEqual(times, sorted(times))
+        self.assertLessEqual(times[-1], 20)
+
+    def test_larger_budget_reaches_more(self):
+        _origin, near = calculate_isochrone(51.5155, -0.0715, 15)
+        _origin, far = calculate_isochrone(51.5155, -0.0715, 40)
+        self.assertLess({s['station_id'] for s in near},
+                        {s['station_id'] for s in far})
+
+    def test_snapped_origins_share_results(self):
+        with patch.object(optimizer, 'get_stations_within',
+                          wraps=optimizer.get_stations_within) as within:
+            calculate_isochrone(51.51521, -0.07171, 30)
+            calculate_isochrone(51.51479, -0.07229, 30)
+        first, second = within.call_args_list
+        self.assertEqual(first, second)
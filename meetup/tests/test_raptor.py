@@ -0,0 +1,92 @@
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.graph import (
+    get_network, get_stations, get_pattern_network, get_earliest_arrivals,
+    reset_cache,
+)
+from meetup.services.raptor import _line_chains, raptor
+from meetup.services.routing import journeys_from
+
+
+class RaptorTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.patterns = get_pattern_network()
+        cls.station_ids = [sid for sid in get_stations()
+                           if str(sid) in cls.network]
+
+    def _search_times(self, seeds):
+        hub_seeds = {str(sid): cost for sid, cost in seeds.items()}
+        times, _tree = journeys_from(
+            self.network, hub_seeds, [str(sid) for sid in self.station_ids])
+        return {int(node): time for node, time in times.items()}
+
+    def test_times_match_graph_search(self):
+        """Earliest arrivals should equal a Dijkstra over the full graph."""
+        for origin in self.station_ids[::40]:
+            result = get_earliest_arrivals(origin)
+            expected = self._search_times({origin: 0.0})
+            self.assertEqual(set(result.times), set(expected))
+            for sid, time in expected.items():
+                self.assertAlmostEqual(result.times[sid], time, places=6)
+
+    def test_many_origins(self):
+        seeds = {self.station_ids[3]: 4.5, self.station_ids[120]: 1.5,
+                 self.station_ids[250]: 6.0}
+        result = get_earliest_arrivals(seeds)
+        expected = self._search_times(seeds)
+        for sid, time in expected.items():
+            self.assertAlmostEqual(result.times[sid], time, places=6)
+
+    def test_origin_has_no_transfers(self):
+        origin = self.station_ids[0]
+        result = get_earliest_arrivals(origin)
+        self.assertEqual(result.times[origin], 0.0)
+        self.assertEqual(result.transfers[origin], 0)
+
+    def test_no_changes_stays_on_origin_lines(self):
+        """With max_transfers=0, only stations on the origin's lines count."""
+        origin = self.station_ids[10]
+        origin_lines = {self.patterns.slot_line[slot]
+                        for slot in self.patterns.station_slots[origin]}
+        result = get_earliest_arrivals(origin, max_transfers=0)
+        for sid in result.times:
+            lines = {self.patterns.slot_line[slot]
+                     for slot in self.patterns.station_slots[sid]}
+            self.assertTrue(lines & origin_lines)
+        self.assertEqual(max(result.transfers.values()), 0)
+
+    def test_fewer_changes_never_faster(self):
+        """Capping changes can only make arrivals later or unreachable."""
+        origin = self.station_ids[5]
+        full = get_earliest_arrivals(origin)
+        capped = get_earliest_arrivals(origin, max_transfers=1)
+        for sid, time in capped.times.items():
+            self.assertGreaterEqual(time, full.times[sid] - 1e-9)
+            self.assertLessEqual(capped.transfers[sid], 1)
+        for sid, changes in full.transfers.items():
+            if changes <= 1:
+                self.assertAlmostEqual(capped.times[sid], full.times[sid],
+                                       places=6)
+
+    def test_unknown_origin(self):
+        result = raptor(self.patterns, {-1: 0.0})
+        self.assertEqual(result.times, {})
+        self.assertEqual(result.rounds, 0)
+
+    def test_chains_cover_every_track_once(self):
+        """Branches and loops should be cut without dropping or repeating."""
+        adjacency = {
+            'a': {'b'}, 'b': {'a', 'c', 'x'}, 'c': {'b', 'd'},
+            'd': {'c', 'e', 'f'}, 'e': {'d', 'f'}, 'f': {'d', 'e'},
+            'x': {'b'}, 'p': {'q', 'r'}, 'q': {'p', 'r'}, 'r': {'p', 'q'},
+        }
+        tracks = []
+        for chain in _line_chains(adjacency):
+            tracks.extend(frozenset(pair) for pair in zip(chain, chain[1:]))
+        expected = {frozenset((u, v)) for u in adjacency
+                    for v in adjacency[u]}
+        self.assertEqual(len(tracks), len(expected))
+        self.assertEqual(set(tracks), expected)
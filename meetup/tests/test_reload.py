@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from django.test import TestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import (
+    get_network, get_journey, get_station_matrix, get_station_time,
+    data_checksum, reload_if_changed, reset_cache,
+)
+from meetup.services.matrix import load_station_matrix
+from meetup.tests.base import compiled_path_patches
+
+
+class DataDirTestCase(TestCase):
+    """Runs against a temporary copy of the data files."""
+
+    def setUp(self):
+        reset_cache()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmpdir.name)
+        for filename in graph_module.DATA_FILES:
+            shutil.copy(graph_module.DATA_DIR / filename, self.data_dir)
+        self.patches = [
+            patch.object(graph_module, 'DATA_DIR', self.data_dir),
+            *compiled_path_patches(self.data_dir / 'compiled'),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmpdir.cleanup()
+        reset_cache()
+
+    def _edit_connections(self, transform):
+        path = self.data_dir / 'connections.csv'
+        path.write_text(transform(path.read_text()))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class HotReloadTest(DataDirTestCase):
+    def test_unchanged_files_not_reloaded(self):
+        network = get_network()
+        self.assertFalse(reload_if_changed())
+        self.assertIs(get_network(), network)
+
+    def test_reload_swaps_in_new_network(self):
+        """Edited data should be swapped in once the files have settled."""
+        old_network = get_network()
+        # First row is 107 -> 134 on the Bakerloo in 3 minutes
+        old_time, _ = get_journey(old_network, '107:Bakerloo', '134:Bakerloo')
+        self.assertEqual(old_time, 3.0)
+
+        self._edit_connections(
+            lambda text: text.replace('107,134,Bakerloo,3',
+                                      '107,134,Bakerloo,1', 1))
+        self.assertFalse(reload_if_changed())  # waits for a second look
+        self.assertTrue(reload_if_changed())
+
+        new_network = get_network()
+        self.assertIsNot(new_network, old_network)
+        new_time, _ = get_journey(new_network, '107:Bakerloo', '134:Bakerloo')
+        self.assertEqual(new_time, 1.0)
+        # Requests still holding the old network keep getting old answers
+        time, _ = get_journey(old_network, '107:Bakerloo', '134:Bakerloo')
+        self.assertEqual(time, 3.0)
+
+    def test_touched_files_not_reloaded(self):
+        network = get_network()
+        self._edit_connections(lambda text: text)
+        self.assertFalse(reload_if_changed())
+        self.assertFalse(reload_if_changed())
+        self.assertIs(get_network(), network)
+
+    def test_broken_data_keeps_current_network(self):
+        network = get_network()
+        self._edit_connections(lambda text: text + '1,2,Central,oops\n')
+        with self.assertLogs('meetup.services.graph', level='ERROR'):
+            reload_if_changed()
+            self.assertFalse(reload_if_changed())
+        self.assertIs(get_network(), network)
+
+
+class IncrementalRebuildTest(DataDirTestCase):
+    def test_retimed_connection_repairs_matrix(self):
+        """A re-timed connection shouldn't rebuild the whole matrix."""
+        # Hub to hub includes the change onto and off the Bakerloo
+        old_time = get_station_time(184, 10)
+        self._edit_connections(
+            lambda text: text.replace('184,10,Bakerloo,3',
+                                      '184,10,Bakerloo,1', 1))
+        reset_cache()
+        with patch.object(graph_module, 'build_station_matrix') as build:
+            matrix = get_station_matrix()
+        build.assert_not_called()
+        self.assertEqual(matrix.time(184, 10), old_time - 2.0)
+        self.assertIsNotNone(
+            load_station_matrix(graph_module.MATRIX_PATH, data_checksum()))
+
+    def test_new_connection_rebuilds_matrix(self):
+        old_time = get_station_matrix().time(184, 1)
+        self._edit_connections(lambda text: text + '184,1,Bakerloo,5\n')
+        reset_cache()
+        with patch.object(graph_module, 'build_station_matrix',
+                          wraps=graph_module.build_station_matrix) as build:
+            matrix = get_station_matrix()
+        build.assert_called_once()
+        self.assertLess(matrix.time(184, 1), old_time)
@@ -0,0 +1,604 @@
+import threading
+from unittest.mock import patch
+import networkx as nx
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.graph import (
+    get_graph, get_network, get_journey, get_journeys_from, get_lines_used,
+    find_journey, get_station_oracle, get_stations_within, reset_cache,
+)
+from meetup.services import graph as graph_module
+from meetup.services.routing import (
+    RoutingNetwork, shortest_path, journeys_from, dijkstra, point_to_point,
+    geographic_potential, landmark_potential, select_landmarks,
+    path_line_mask, stations_within, INF, LANDMARK_COUNT,
+)
+
+
+class RoutingNetworkTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.network = get_network()
+
+    def test_matches_graph_size(self):
+        """Compiled network should have the graph's nodes and edges."""
+        self.assertEqual(self.network.number_of_nodes(),
+                         self.graph.number_of_nodes())
+        self.assertEqual(self.network.number_of_edges(),
+                         self.graph.number_of_edges())
+
+    def test_offsets_cover_all_edges(self):
+        self.assertEqual(self.network.offsets[0], 0)
+        self.assertEqual(self.network.offsets[-1], len(self.network.targets))
+        self.assertEqual(len(self.network.weights), len(self.network.targets))
+
+    def test_edge_line_lookup(self):
+        """Line lookup should agree with the graph's edge attributes."""
+        u, v, data = next(iter(self.graph.edges(data=True)))
+        index = self.network.index
+        self.assertEqual(self.network.edge_line(index[u], index[v]),
+                         data['line'])
+        self.assertEqual(self.network.edge_line(index[v], index[u]),
+                         data['line'])
+
+    def test_node_ids_round_trip(self):
+        """Every graph node should render and parse back to one index."""
+        nodes = list(self.graph.nodes())
+        self.assertEqual(list(self.network.node_ids), nodes)
+        for u, node in enumerate(nodes):
+            self.assertEqual(self.network.node_index(node), u)
+        self.assertEqual(self.network.other_ids, {})
+
+    def test_node_ids_index_like_a_list(self):
+        """Negative indices and slices should match a list of the IDs."""
+        nodes = list(self.graph.nodes())
+        node_ids = self.network.node_ids
+        self.assertEqual(node_ids[-1], nodes[-1])
+        self.assertEqual(node_ids[-len(nodes)], nodes[0])
+        self.assertEqual(node_ids[2:7], nodes[2:7])
+        self.assertEqual(node_ids[-5:], nodes[-5:])
+        self.assertEqual(node_ids[::-100], nodes[::-100])
+        with self.assertRaises(IndexError):
+            node_ids[len(nodes)]
+        with self.assertRaises(IndexError):
+            node_ids[-len(nodes) - 1]
+
+    def test_node_tables(self):
+        """Nodes should point into one station table and one line table."""
+        network = self.network
+        for u, node in enumerate(network.node_ids):
+            attrs = self.graph.nodes[node]
+            sid = network.station_ids[network.node_station[u]]
+            self.assertEqual(sid, attrs['station_id'])
+            if attrs.get('is_hub'):
+                self.assertEqual(network.node_line[u], -1)
+                self.assertEqual(network.hub(sid), u)
+                self.assertEqual(network.node_coordinates(u),
+                                 (attrs['lat'], attrs['lon']))
+            else:
+                self.assertEqual(network.lines[network.node_line[u]],
+                                 attrs['line'])
+        self.assertEqual(len(network.station_ids),
+                         len(set(network.station_ids)))
+
+    def test_unknown_node_ids(self):
+        hub = next(n for n in self.network.node_ids if n.isdigit())
+        for node in ('nope', '0' + hub, f'{hub}:Nope', f'{hub}:', '', 12.0,
+                     '-1', '99999'):
+            self.assertIsNone(self.network.node_index(node))
+            self.assertNotIn(node, self.network)
+        self.assertIsNone(self.network.hub(-1))
+
+    def test_times_match_networkx(self):
+        """Shortest times should match NetworkX's Dijkstra exactly."""
+        hubs = sorted(n for n, d in self.graph.nodes(data=True)
+                      if d.get('is_hub'))[:40]
+        for a, b in zip(hubs, reversed(hubs)):
+            expected = nx.dijkstra_path_length(self.graph, a, b)
+            time, path = shortest_path(self.network, a, b)
+            self.assertAlmostEqual(time, expected, places=6)
+            self.assertEqual(path[0], a)
+            self.assertEqual(path[-1], b)
+
+    def test_path_is_connected(self):
+        """Every step of a returned path should be a real graph edge."""
+        hubs = [n for n, d in self.graph.nodes(data=True) if d.get('is_hub')]
+        _time, path = shortest_path(self.network, hubs[0], hubs[-1])
+        for a, b in zip(path, path[1:]):
+            self.assertTrue(self.graph.has_edge(a, b))
+
+    def test_missing_node(self):
+        self.assertEqual(shortest_path(self.network, 'nope', '12'),
+                         (None, None))
+
+    def test_disconnected_nodes(self):
+        """Nodes in different components should have no path."""
+        g = nx.Graph()
+        g.add_edge('a', 'b', weight=1, line='X')
+        g.add_node('c')
+        network = RoutingNetwork.from_graph(g)
+        self.assertEqual(shortest_path(network, 'a', 'c'), (None, None))
+        self.assertEqual(shortest_path(network, 'a', 'b'), (1.0, ['a', 'b']))
+
+    def test_get_journey_accepts_compiled_network(self):
+        """get_journey and get_lines_used should work on a RoutingNetwork."""
+        hubs = [n for n, d in self.graph.nodes(data=True) if d.get('is_hub')]
+        time_g, path_g = get_journey(self.graph, hubs[0], hubs[1])
+        time_n, path_n = get_journey(self.network, hubs[0], hubs[1])
+        self.assertAlmostEqual(time_g, time_n, places=6)
+        self.assertEqual(get_lines_used(self.graph, path_n),
+                         get_lines_used(self.network, path_n))
+
+
+class JourneysFromTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.network = get_network()
+        cls.hubs = sorted(n for n, d in cls.graph.nodes(data=True)
+                          if d.get('is_hub'))
+
+    def test_times_match_point_to_point(self):
+        """One-to-many times should equal separate point-to-point searches."""
+        source = self.hubs[0]
+        targets = self.hubs[1:30]
+        times, tree = journeys_from(self.network, source, targets)
+        self.assertEqual(set(times), set(targets))
+        for target in targets:
+            expected, _path = shortest_path(self.network, source, target)
+            self.assertAlmostEqual(times[target], expected, places=6)
+
+    def test_tree_paths_reach_targets(self):
+        source = self.hubs[0]
+        targets = self.hubs[-5:]
+        times, tree = journeys_from(self.network, source, targets)
+        for target in targets:
+            path = tree.path(target)
+            self.assertEqual(path[0], source)
+            self.assertEqual(path[-1], target)
+            length = sum(self.graph[a][b]['weight']
+                         for a, b in zip(path, path[1:]))
+            self.assertAlmostEqual(length, times[target], places=6)
+
+    def test_line_node_source(self):
+        """Sources and targets don't have to be hubs."""
+        line_node = next(n for n in self.network.node_ids if ':' in n)
+        times, tree = get_journeys_from(self.graph, line_node, self.hubs[:3])
+        self.assertEqual(len(times), 3)
+
+    def test_seeded_search(self):
+        """A multi-seed search should take the best seed cost plus travel."""
+        a, b, target = self.hubs[0], self.hubs[1], self.hubs[50]
+        seeds = {a: 5.0, b: 2.0}
+        times, tree = journeys_from(self.network, seeds, [target])
+        via_a, _ = shortest_path(self.network, a, target)
+        via_b, _ = shortest_path(self.network, b, target)
+        self.assertAlmostEqual(times[target], min(5.0 + via_a, 2.0 + via_b),
+                               places=6)
+        self.assertIn(tree.path(target)[0], seeds)
+
+    def test_seeded_matches_matrix_composition(self):
+        """Hub seeds on the cached graph should agree with a plain search."""
+        seeds = {self.hubs[3]: 4.5, self.hubs[7]: 1.5, self.hubs[9]: 6.0}
+        targets = self.hubs[20:40]
+        cached_times, cached_tree = get_journeys_from(
+            self.graph, seeds, targets)
+        times, _tree = journeys_from(self.network, seeds, targets)
+        self.assertEqual(set(cached_times), set(times))
+        for target in targets:
+            self.assertAlmostEqual(cached_times[target], times[target],
+                                   places=6)
+            self.assertIn(cached_tree.path(target)[0], seeds)
+
+    def test_unknown_source(self):
+        times, tree = journeys_from(self.network, 'nope', self.hubs[:3])
+        self.assertEqual(times, {})
+        self.assertIsNone(tree)
+
+    def test_unknown_targets_skipped(self):
+        times, _tree = journeys_from(self.network, self.hubs[0],
+                                     ['nope', self.hubs[1]])
+        self.assertEqual(list(times), [self.hubs[1]])
+
+    def test_cached_graph_matches_search(self):
+        """Matrix-backed answers on the cached graph should match a search."""
+        source = self.hubs[5]
+        targets = self.hubs[10:20]
+        cached_times, cached_tree = get_journeys_from(
+            self.graph, source, targets)
+        times, _tree = journeys_from(self.network, source, targets)
+        for target in targets:
+            self.assertAlmostEqual(cached_times[target], times[target],
+                                   places=6)
+            self.assertEqual(cached_tree.path(target)[-1], target)
+
+
+class AStarTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.hubs = [n for n in cls.network.node_ids if n.isdigit()]
+        cls.pairs = list(zip(cls.hubs[::9], cls.hubs[::-7]))
+
+    def test_max_speed_is_finite(self):
+        """The network's fastest edge should run at a plausible speed."""
+        self.assertGreater(self.network.max_speed * 60, 30)
+        self.assertLess(self.network.max_speed * 60, 300)
+
+    def test_heuristic_is_admissible(self):
+        """The potential must never exceed the true time to the target."""
+        index = self.network.index
+        target = index[self.hubs[0]]
+        dist, _pred = dijkstra(self.network, {target: 0.0})
+        potential = geographic_potential(self.network, target)
+        for v in range(len(self.network)):
+            if dist[v] != float('inf'):
+                self.assertLessEqual(potential(v), dist[v] + 1e-9)
+
+    def test_times_match_dijkstra(self):
+        for a, b in self.pairs:
+            expected = point_to_point(self.network, a, b, 'dijkstra')
+            result = point_to_point(self.network, a, b, 'astar')
+            self.assertAlmostEqual(result.time, expected.time, places=6)
+            self.assertEqual(result.path[0], a)
+            self.assertEqual(result.path[-1], b)
+
+    def test_settles_fewer_nodes(self):
+        """A* should expand fewer nodes than Dijkstra across many queries."""
+        dijkstra_settled = sum(
+            point_to_point(self.network, a, b, 'dijkstra').settled
+            for a, b in self.pairs)
+        astar_settled = sum(
+            point_to_point(self.network, a, b, 'astar').settled
+            for a, b in self.pairs)
+        self.assertLess(astar_settled, dijkstra_settled)
+
+    def test_find_journey_reports_settled(self):
+        graph = get_graph()
+        result = find_journey(graph, self.hubs[0], self.hubs[1])
+        self.assertIsNotNone(result.time)
+        self.assertGreater(result.settled, 0)
+
+    def test_no_route(self):
+        result = find_journey(self.network, 'nope', self.hubs[0])
+        self.assertIsNone(result.time)
+        self.assertIsNone(result.path)
+
+
+class LandmarkTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.landmarks, cls.landmark_dist = cls.network.landmark_tables()
+        cls.hubs = [n for n in cls.network.node_ids if n.isdigit()]
+        cls.pairs = list(zip(cls.hubs[::9], cls.hubs[::-7]))
+
+    def test_landmarks_are_distinct_hubs(self):
+        landmarks = list(self.landmarks)
+        self.assertEqual(len(landmarks), LANDMARK_COUNT)
+        self.assertEqual(len(set(landmarks)), len(landmarks))
+        for u in landmarks:
+            self.assertTrue(self.network.node_id(u).isdigit())
+        self.assertEqual(len(self.landmark_dist),
+                         len(landmarks) * len(self.network))
+
+    def test_landmarks_are_spread_out(self):
+        """Each landmark should be far from the ones picked before it."""
+        n = len(self.network)
+        landmarks = list(self.landmarks)
+        for i, u in enumerate(landmarks[1:], 1):
+            nearest = min(self.landmark_dist[j * n + u] for j in range(i))
+            self.assertGreater(nearest, 15)
+
+    def test_potential_is_consistent(self):
+        """No edge may drop the bound by more than its weight."""
+        network = self.network
+        target = network.index[self.hubs[0]]
+        potential = landmark_potential(network, target)
+        self.assertEqual(potential(target), 0.0)
+        for u in range(len(network)):
+            for e in range(network.offsets[u], network.offsets[u + 1]):
+                v = network.targets[e]
+                self.assertLessEqual(potential(u),
+                                     network.weights[e] + potential(v) + 1e-9)
+
+    def test_times_match_dijkstra(self):
+        for a, b in self.pairs:
+            expected = point_to_point(self.network, a, b, 'dijkstra')
+            result = point_to_point(self.network, a, b, 'alt')
+            self.assertAlmostEqual(result.time, expected.time, places=6)
+            self.assertEqual(result.path[0], a)
+            self.assertEqual(result.path[-1], b)
+
+    def test_settles_fewer_nodes_than_other_methods(self):
+        settled = {
+            method: sum(point_to_point(self.network, a, b, method).settled
+                        for a, b in self.pairs)
+            for method in ('astar', 'alt', 'bidirectional')
+        }
+        self.assertLess(settled['alt'], settled['astar'])
+        self.assertLess(settled['alt'], settled['bidirectional'])
+
+    def test_single_target_search_uses_landmarks(self):
+        source, target = self.hubs[3], self.hubs[-3]
+        expected = point_to_point(self.network, source, target, 'dijkstra')
+        with patch('meetup.services.routing.landmark_potential',
+                   wraps=landmark_potential) as potential:
+            times, tree = journeys_from(self.network, source, [target])
+        potential.assert_called_once()
+        self.assertAlmostEqual(times[target], expected.time, places=6)
+        path = tree.path(target)
+        self.assertEqual((path[0], path[-1]), (source, target))
+
+    def test_no_landmarks_searches_bidirectionally(self):
+        """An ad-hoc network shouldn't pick landmarks for one query."""
+        network = RoutingNetwork.from_graph(get_graph())
+        a, b = self.hubs[0], self.hubs[1]
+        result = point_to_point(network, a, b, 'alt')
+        self.assertIsNone(network.landmarks)
+        self.assertEqual(result,
+                         point_to_point(network, a, b, 'bidirectional'))
+
+        network.landmark_tables()
+        self.assertEqual(list(network.landmarks), list(self.landmarks))
+        with_landmarks = point_to_point(network, a, b, 'alt')
+        self.assertAlmostEqual(with_landmarks.time, result.time, places=6)
+
+    def test_every_component_gets_a_landmark(self):
+        g = nx.Graph()
+        for sid in (1, 2, 3, 4):
+            g.add_node(str(sid), station_id=sid, is_hub=True)
+        g.add_edge('1', '2', weight=2, line='X')
+        g.add_edge('3', '4', weight=5, line='X')
+        network = RoutingNetwork.from_graph(g)
+        landmarks, _dist = select_landmarks(network, 2)
+        components = {network.node_id(u) in ('1', '2') for u in landmarks}
+        self.assertEqual(components, {True, False})
+        result = point_to_point(network, '1', '4', 'alt')
+        self.assertIsNone(result.time)
+
+
+class BidirectionalSearchTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.network = get_network()
+        cls.hubs = [n for n in cls.network.node_ids if n.isdigit()]
+        cls.pairs = list(zip(cls.hubs[::11], cls.hubs[::-5]))
+
+    def test_times_match_dijkstra(self):
+        for a, b in self.pairs:
+            expected = point_to_point(self.network, a, b, 'dijkstra')
+            result = point_to_point(self.network, a, b, 'bidirectional')
+            self.assertAlmostEqual(result.time, expected.time, places=6)
+
+    def test_path_sums_to_time(self):
+        """The joined forward and backward halves should be a real path."""
+        for a, b in self.pairs[:10]:
+            result = point_to_point(self.network, a, b, 'bidirectional')
+            self.assertEqual(result.path[0], a)
+            self.assertEqual(result.path[-1], b)
+            length = sum(self.graph[u][v]['weight']
+                         for u, v in zip(result.path, result.path[1:]))
+            self.assertAlmostEqual(length, result.time, places=6)
+
+    def test_settles_fewer_nodes(self):
+        dijkstra_settled = sum(
+            point_to_point(self.network, a, b, 'dijkstra').settled
+            for a, b in self.pairs)
+        settled = sum(
+            point_to_point(self.network, a, b, 'bidirectional').settled
+            for a, b in self.pairs)
+        self.assertLess(settled, dijkstra_settled)
+
+    def test_same_node(self):
+        result = point_to_point(self.network, self.hubs[0], self.hubs[0],
+                                'bidirectional')
+        self.assertEqual((result.time, result.path), (0.0, [self.hubs[0]]))
+
+    def test_disconnected_nodes(self):
+        g = nx.Graph()
+        g.add_edge('a', 'b', weight=1, line='X')
+        g.add_edge('c', 'd', weight=1, line='X')
+        network = RoutingNetwork.from_graph(g)
+        result = point_to_point(network, 'a', 'd', 'bidirectional')
+        self.assertIsNone(result.time)
+        self.assertIsNone(result.path)
+
+
+class LineMaskTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.network = get_network()
+        cls.hubs = sorted(n for n in cls.network.node_ids if n.isdigit())
+
+    def test_names_round_trip(self):
+        mask = self.network.line_mask(['Central', 'Jubilee', 'Nope'])
+        self.assertEqual(self.network.line_names(mask), {'Central', 'Jubilee'})
+
+    def test_service_mask_excludes_transfers(self):
+        names = self.network.line_names(self.network.service_mask)
+        self.assertNotIn('transfer', names)
+        self.assertIn('Central', names)
+
+    def test_path_mask_matches_lines_used(self):
+        for target in self.hubs[1:20]:
+            _time, path = shortest_path(self.network, self.hubs[0], target)
+            self.assertEqual(
+                self.network.line_names(path_line_mask(self.network, path)),
+                get_lines_used(self.graph, path))
+
+    def test_tree_masks_match_paths(self):
+        """Masks propagated down a tree should match each path's lines."""
+        targets = self.hubs[100:140]
+        _times, tree = journeys_from(self.network, self.hubs[0], targets)
+        for target in targets:
+            self.assertEqual(tree.line_mask(target),
+                             path_line_mask(self.network, tree.path(target)))
+
+    def test_cached_tree_masks_match_paths(self):
+        """Oracle-backed trees should report the same masks as their paths."""
+        seeds = {self.hubs[3]: 4.5, self.hubs[7]: 1.5}
+        targets = self.hubs[20:40]
+        _times, tree = get_journeys_from(self.graph, seeds, targets)
+        for target in targets:
+            self.assertEqual(tree.line_mask(target),
+                             path_line_mask(self.network, tree.path(target)))
+
+
+class ExcludedLinesTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.graph = get_graph()
+        cls.network = get_network()
+        cls.hubs = sorted(n for n in cls.network.node_ids if n.isdigit())
+        cls.closed = cls.network.line_mask(['Central', 'Northern'])
+
+    def test_paths_avoid_excluded_lines(self):
+        for target in self.hubs[1:60:3]:
+            for method in ('dijkstra', 'astar', 'alt', 'bidirectional'):
+                result = point_to_point(self.network, self.hubs[0], target,
+                                        method, self.closed)
+                if result.path is None:
+                    continue
+                mask = path_line_mask(self.network, result.path)
+                self.assertFalse(mask & self.closed)
+
+    def test_methods_agree(self):
+        for target in self.hubs[1:60:3]:
+            expected = point_to_point(self.network, self.hubs[0], target,
+                                      'dijkstra', self.closed)
+            for method in ('astar', 'alt', 'bidirectional'):
+                result = point_to_point(self.network, self.hubs[0], target,
+                                        method, self.closed)
+                self.assertEqual(result.time is None, expected.time is None)
+                if expected.time is not None:
+                    self.assertAlmostEqual(result.time, expected.time,
+                                           places=6)
+
+    def test_never_faster_than_open_network(self):
+        targets = self.hubs[100:140]
+        open_times, _ = journeys_from(self.network, self.hubs[5], targets)
+        closed_times, tree = journeys_from(self.network, self.hubs[5],
+                                           targets, self.closed)
+        for target, time in closed_times.items():
+            self.assertGreaterEqual(time, open_times[target] - 1e-9)
+            self.assertFalse(tree.line_mask(target) & self.closed)
+
+    def test_cached_network_respects_disruptions(self):
+        """Cached hub queries should agree with a masked search."""
+        seeds = {self.hubs[3]: 4.5, self.hubs[7]: 1.5}
+        targets = self.hubs[20:40]
+        cached, tree = get_journeys_from(self.graph, seeds, targets,
+                                         self.closed)
+        expected, _ = journeys_from(self.network, seeds, targets,
+                                    self.closed)
+        self.assertEqual(set(cached), set(expected))
+        for target, time in expected.items():
+            self.assertAlmostEqual(cached[target], time, places=6)
+            self.assertFalse(tree.line_mask(target) & self.closed)
+
+        time, path = get_journey(self.graph, self.hubs[0], self.hubs[50],
+                                 self.closed)
+        expected_time, _ = shortest_path(self.network, self.hubs[0],
+                                         self.hubs[50], self.closed)
+        self.assertAlmostEqual(time, expected_time, places=6)
+        self.assertFalse(path_line_mask(self.network, path) & self.closed)
+
+    def test_one_variant_per_disruption_state(self):
+        oracle = get_station_oracle(self.closed)
+        self.assertIs(get_station_oracle(self.closed), oracle)
+        self.assertIsNot(get_station_oracle(0), oracle)
+
+    def test_variant_built_outside_state_lock(self):
+        """Other lookups shouldn't wait for a disruption matrix build."""
+        state = graph_module._current_state()
+        build = graph_module.build_station_matrix
+        acquired = []
+
+        def try_lock():
+            if state.lock.acquire(timeout=5):
+                state.lock.release()
+                acquired.append(True)
+
+        def build_and_check(*args):
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return build(*args)
+
+        mask = self.network.line_mask(['Jubilee'])
+        with patch.object(graph_module, 'build_station_matrix',
+                          side_effect=build_and_check):
+            oracle = get_station_oracle(mask)
+        self.assertEqual(acquired, [True])
+        self.assertIs(get_station_oracle(mask), oracle)
+
+    def test_variants_are_bounded(self):
+        for line in self.network.lines[:graph_module.MAX_DISRUPTION_VARIANTS
+                                       + 2]:
+            get_station_oracle(self.network.line_mask([line]))
+        variants = graph_module._current_state().oracle_variants
+        self.assertLessEqual(len(variants),
+                             graph_module.MAX_DISRUPTION_VARIANTS)
+
+
+class StationsWithinTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.hubs = sorted(n for n in cls.network.node_ids if n.isdigit())
+
+    def test_matches_full_search(self):
+        """A cut-off search should find exactly the hubs within the limit."""
+        seeds = {self.hubs[0]: 2.0, self.hubs[30]: 6.5}
+        sources = {self.network.index[n]: c for n, c in seeds.items()}
+        dist, _pred = dijkstra(self.network, sources)
+        for limit in (5, 20, 45):
+            expected = {int(n): dist[self.network.index[n]]
+                        for n in self.hubs
+                        if dist[self.network.index[n]] <= limit}
+            within = stations_within(self.network, seeds, limit)
+            self.assertEqual(set(within), set(expected))
+            for sid, time in expected.items():
+                self.assertAlmostEqual(within[sid], time, places=6)
+
+    def test_cutoff_leaves_far_nodes_unreached(self):
+        source = self.network.index[self.hubs[0]]
+        dist, pred = dijkstra(self.network, {source: 0.0}, max_time=10)
+        for u, d in enumerate(dist):
+            self.assertTrue(d <= 10 or (d == INF and pred[u] == -1))
+
+    def test_seed_beyond_budget(self):
+        self.assertEqual(
+            stations_within(self.network, {self.hubs[0]: 31.0}, 30), {})
+
+    def test_results_are_cached(self):
+        seeds = {self.hubs[5]: 3.0}
+        times = get_stations_within(seeds, 25)
+        self.assertIs(get_stations_within(dict(seeds), 25), times)
+        self.assertIsNot(get_stations_within(seeds, 26), times)
+
+    def test_cache_is_bounded(self):
+        with patch.object(graph_module, 'MAX_ISOCHRONES', 3):
+            for minutes in range(1, 8):
+                get_stations_within({self.hubs[0]: 0.0}, minutes)
+            self.assertEqual(
+                len(graph_module._current_state().isochrones), 3)
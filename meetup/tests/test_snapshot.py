@@ -0,0 +1,128 @@
+import mmap
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import (
+    get_network, get_stations, data_checksum, reset_cache,
+    write_network_snapshot, memory_report,
+)
+from meetup.services.routing import shortest_path
+from meetup.services.snapshot import load_snapshot
+
+
+class SnapshotTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.tmpdir.name) / 'network.bin'
+        cls.network = write_network_snapshot(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        reset_cache()
+        super().tearDownClass()
+
+    def test_round_trip(self):
+        """A loaded snapshot should reproduce the compiled network."""
+        snapshot = load_snapshot(self.path, data_checksum())
+        self.assertIsNotNone(snapshot)
+        network = snapshot.network
+        self.assertEqual(list(network.node_ids), list(self.network.node_ids))
+        self.assertEqual(list(network.offsets), list(self.network.offsets))
+        self.assertEqual(list(network.targets), list(self.network.targets))
+        self.assertEqual(list(network.weights), list(self.network.weights))
+        self.assertEqual(network.lines, self.network.lines)
+        for u in range(len(network)):
+            self.assertEqual(network.node_coordinates(u),
+                             self.network.node_coordinates(u))
+        self.assertEqual(network.max_speed, self.network.max_speed)
+        self.assertEqual(list(network.landmarks),
+                         list(self.network.landmarks))
+        self.assertEqual(list(network.landmark_dist),
+                         list(self.network.landmark_dist))
+
+    def test_stations_round_trip(self):
+        snapshot = load_snapshot(self.path, data_checksum())
+        self.assertEqual(snapshot.stations, get_stations())
+
+    def test_routes_match(self):
+        snapshot = load_snapshot(self.path, data_checksum())
+        a, b = self.network.node_ids[0], self.network.node_ids[-1]
+        self.assertEqual(shortest_path(snapshot.network, a, b),
+                         shortest_path(self.network, a, b))
+
+    def test_stale_checksum_rejected(self):
+        self.assertIsNone(load_snapshot(self.path, b'\0' * 32))
+
+    def test_truncated_file_rejected(self):
+        truncated = Path(self.tmpdir.name) / 'truncated.bin'
+        truncated.write_bytes(self.path.read_bytes()[:-10])
+        self.assertIsNone(load_snapshot(truncated, data_checksum()))
+
+    def test_corrupt_metadata_rejected(self):
+        corrupt = Path(self.tmpdir.name) / 'corrupt.bin'
+        data = self.path.read_bytes()
+        corrupt.write_bytes(data[:-1] + b'!')
+        mappings = []
+        real_mmap = mmap.mmap
+
+        def mapped(*args, **kwargs):
+            mappings.append(real_mmap(*args, **kwargs))
+            return mappings[-1]
+
+        with patch('meetup.services.snapshot.mmap.mmap', side_effect=mapped):
+            self.assertIsNone(load_snapshot(corrupt, data_checksum()))
+        self.assertTrue(mappings[0].closed)
+
+    def test_missing_file_rejected(self):
+        self.assertIsNone(
+            load_snapshot(Path(self.tmpdir.name) / 'nope', data_checksum()))
+
+    def test_get_network_prefers_snapshot(self):
+        """Workers should load from the snapshot without building the graph."""
+        reset_cache()
+        with patch.object(graph_module, 'SNAPSHOT_PATH', self.path), \
+                patch.object(graph_module, '_build_graph') as build:
+            network = get_network()
+            stations = get_stations()
+        build.assert_not_called()
+        self.assertEqual(list(network.node_ids), list(self.network.node_ids))
+        self.assertGreater(len(stations), 300)
+        reset_cache()
+
+    def test_get_network_falls_back_to_csv(self):
+        """A missing snapshot should fall back to parsing the CSVs."""
+        reset_cache()
+        missing = Path(self.tmpdir.name) / 'missing.bin'
+        with patch.object(graph_module, 'SNAPSHOT_PATH', missing):
+            network = get_network()
+        self.assertEqual(list(network.node_ids), list(self.network.node_ids))
+        # ...and write one for other workers to map
+        self.assertIsNotNone(load_snapshot(missing, data_checksum()))
+        reset_cache()
+
+    def test_arrays_are_mapped(self):
+        """Loaded arrays should be views into the shared file mapping."""
+        snapshot = load_snapshot(self.path, data_checksum())
+        network = snapshot.network
+        for part in (network.offsets, network.targets, network.weights,
+                     network.edge_lines, network.station_lat,
+                     network.node_station, network.node_line,
+                     network.landmarks, network.landmark_dist):
+            self.assertIsInstance(part, memoryview)
+        self.assertEqual(snapshot.mapped_bytes, self.path.stat().st_size)
+
+    def test_memory_report(self):
+        reset_cache()
+        with patch.object(graph_module, 'SNAPSHOT_PATH', self.path):
+            get_network()
+            report = memory_report()
+        self.assertGreaterEqual(report['shared_bytes'],
+                                self.path.stat().st_size)
+        self.assertGreater(report['private_bytes'], 0)
+        reset_cache()
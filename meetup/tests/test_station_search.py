@@ -0,0 +1,72 @@
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services.graph import get_station_index, get_stations, reset_cache
+from meetup.services.station_search import (
+    EXACT, PREFIX, WORD_PREFIX, FUZZY, StationIndex, normalise_name,
+)
+
+
+class NormaliseNameTest(CompiledDirTestCase):
+    def test_punctuation_and_ampersands(self):
+        self.assertEqual(normalise_name("King's Cross St. Pancras"),
+                         'kings cross st pancras')
+        self.assertEqual(normalise_name('Elephant & Castle'),
+                         'elephant and castle')
+        self.assertEqual(normalise_name('Bromley-by-Bow'), 'bromley by bow')
+
+    def test_noise_words_dropped(self):
+        self.assertEqual(normalise_name('Old Street Station'), 'old street')
+        self.assertEqual(normalise_name('Saint Pauls tube'), 'st pauls')
+        self.assertEqual(normalise_name('station'), '')
+
+
+class StationIndexTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.index = get_station_index()
+        cls.stations = get_stations()
+
+    def _names(self, query, limit=5):
+        return [m.name for m in self.index.search(query, limit)]
+
+    def test_every_station_finds_itself(self):
+        for sid, info in self.stations.items():
+            match = self.index.search(info['name'], limit=1)[0]
+            self.assertEqual(match.tier, EXACT)
+            self.assertEqual(self.index.find(info['name']), sid)
+
+    def test_aliases(self):
+        kx = self.index.find("King's Cross St. Pancras")
+        for alias in ('Kings Cross', 'St Pancras', 'kx'):
+            self.assertEqual(self.index.find(alias), kx)
+
+    def test_prefix_ranked_before_word_prefix(self):
+        matches = self.index.search('harrow', limit=10)
+        tiers = [m.tier for m in matches]
+        self.assertEqual(tiers, sorted(tiers))
+        self.assertIn('North Harrow', [m.name for m in matches
+                                       if m.tier == WORD_PREFIX])
+        self.assertEqual(self.index.search('oxford')[0].tier, PREFIX)
+
+    def test_typos(self):
+        match = self.index.search('Padington', limit=1)[0]
+        self.assertEqual(match.name, 'Paddington')
+        self.assertEqual(match.tier, FUZZY)
+        self.assertEqual(self._names('Wimbeldon', 1), ['Wimbledon'])
+
+    def test_one_result_per_station(self):
+        matches = self.index.search('kings cross', limit=10)
+        ids = [m.station_id for m in matches]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('10 Downing Street'), [])
+        self.assertEqual(self.index.search('   '), [])
+        self.assertIsNone(self.index.find('Oxford'))
+
+    def test_alias_for_missing_station_ignored(self):
+        index = StationIndex({1: {'name': 'Bank'}},
+                             aliases={'Nowhere': ['Elsewhere']})
+        self.assertEqual(index.search('Elsewhere'), [])
+        self.assertEqual(index.find('bank'), 1)
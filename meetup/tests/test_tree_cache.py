@@ -0,0 +1,128 @@
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import (
+    get_network, get_journey, get_journeys_from, get_tree_cache,
+    reset_cache,
+)
+from meetup.services.routing import (
+    dijkstra, journeys_from, path_line_mask, shortest_path,
+)
+from meetup.services.tree_cache import TreeCache
+
+
+class TreeCacheTest(CompiledDirTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reset_cache()
+        cls.network = get_network()
+        cls.hubs = sorted(n for n in cls.network.node_ids if n.isdigit())
+        cls.closed = cls.network.line_mask(['Central', 'Northern'])
+
+    def test_tree_matches_full_search(self):
+        cache = TreeCache(self.network, 4)
+        source = self.network.index[self.hubs[0]]
+        dist, pred = cache.tree(source, self.closed)
+        expected_dist, expected_pred = dijkstra(
+            self.network, {source: 0.0}, excluded_lines=self.closed)
+        self.assertEqual(list(dist), expected_dist)
+        self.assertEqual(list(pred), expected_pred)
+
+    def test_hits_and_misses(self):
+        cache = TreeCache(self.network, 4)
+        source = self.network.index[self.hubs[0]]
+        first = cache.tree(source)
+        self.assertIs(cache.tree(source), first)
+        self.assertIsNot(cache.tree(source, self.closed), first)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['hit_rate'], round(1 / 3, 4))
+        self.assertEqual(stats['trees'], 2)
+
+    def test_least_recently_used_evicted(self):
+        cache = TreeCache(self.network, 2)
+        a, b, c = (self.network.index[h] for h in self.hubs[:3])
+        cache.tree(a)
+        cache.tree(b)
+        cache.tree(a)
+        cache.tree(c)  # evicts b
+        self.assertEqual(len(cache), 2)
+        cache.tree(a)
+        cache.tree(b)
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual((stats['hits'], stats['misses']), (2, 4))
+        self.assertEqual(stats['bytes'], 2 * 12 * len(self.network))
+
+    def test_empty_stats(self):
+        stats = TreeCache(self.network, 8).stats()
+        self.assertIsNone(stats['hit_rate'])
+        self.assertEqual(stats['bytes'], 0)
+
+    def test_composition_matches_search(self):
+        """Times from cached trees should match a multi-source search."""
+        cache = TreeCache(self.network, 8)
+        seeds = {self.hubs[3]: 4.5, self.hubs[7]: 1.5}
+        targets = self.hubs[20:40] + ['134:Bakerloo']
+        times, tree = cache.journeys_from(seeds, targets, self.closed)
+        expected, _ = journeys_from(self.network, seeds, targets,
+                                    self.closed)
+        self.assertEqual(set(times), set(expected))
+        for target, time in expected.items():
+            self.assertAlmostEqual(times[target], time, places=6)
+            path = tree.path(target)
+            self.assertIn(path[0], seeds)
+            self.assertEqual(path[-1], target)
+            self.assertFalse(tree.line_mask(target) & self.closed)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_unknown_seed(self):
+        cache = TreeCache(self.network, 8)
+        self.assertIsNone(cache.journeys_from({'nope': 0.0}, self.hubs[:3]))
+
+
+class CachedJourneysTest(CompiledDirTestCase):
+    def setUp(self):
+        reset_cache()
+        self.network = get_network()
+        self.hubs = sorted(n for n in self.network.node_ids if n.isdigit())
+        self.closed = self.network.line_mask(['Victoria'])
+
+    def tearDown(self):
+        reset_cache()
+
+    def test_disrupted_journeys_reuse_trees(self):
+        """A disruption shouldn't build a whole station matrix."""
+        seeds = {self.hubs[3]: 2.0, self.hubs[9]: 6.0}
+        targets = self.hubs[100:120]
+        times, _tree = get_journeys_from(self.network, seeds, targets,
+                                         self.closed)
+        again, _tree = get_journeys_from(self.network, seeds, targets,
+                                         self.closed)
+        self.assertEqual(again, times)
+        stats = get_tree_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+        self.assertEqual(
+            len(graph_module._current_state().oracle_variants), 0)
+
+    def test_line_node_targets_use_trees(self):
+        targets = ['134:Bakerloo', '107:Bakerloo']
+        times, tree = get_journeys_from(self.network, self.hubs[0], targets)
+        expected, _ = journeys_from(self.network, self.hubs[0], targets)
+        self.assertEqual(times, expected)
+        self.assertEqual(tree.path(targets[0])[-1], targets[0])
+        self.assertEqual(get_tree_cache().stats()['misses'], 1)
+
+    def test_disrupted_journey(self):
+        time, path = get_journey(self.network, self.hubs[0], self.hubs[50],
+                                 self.closed)
+        expected, _ = shortest_path(self.network, self.hubs[0],
+                                    self.hubs[50], self.closed)
+        self.assertAlmostEqual(time, expected, places=6)
+        self.assertFalse(path_line_mask(self.network, path) & self.closed)
+        self.assertEqual(get_tree_cache().stats()['misses'], 1)
+
+    def test_unreachable_journey(self):
+        time, path = get_journey(self.network, self.hubs[0], 'nope',
+                                 self.closed)
+        self.assertEqual((time, path), (None, None))
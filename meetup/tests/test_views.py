@@ -1,10 +1,11 @@
 import json
 from unittest.mock import patch
-from django.test import TestCase, Client
+from meetup.tests.base import CompiledDirTestCase
 from meetup.models import MeetupSession, Person, MeetupResult
+from meetup.services.graph import get_stations
 
 
-class IndexViewTest(TestCase):
+class IndexViewTest(CompiledDirTestCase):
     def test_index_returns_200(self):
         response = self.client.get('/meetup/')
         self.assertEqual(response.status_code, 200)
@@ -18,7 +19,7 @@ class IndexViewTest(TestCase):
         self.assertIn('calculate-btn', content)
 
 
-class AutocompleteViewTest(TestCase):
+class AutocompleteViewTest(CompiledDirTestCase):
     def test_autocomplete_requires_query(self):
         response = self.client.get('/meetup/api/autocomplete/')
         data = json.loads(response.content)
@@ -32,19 +33,176 @@ class AutocompleteViewTest(TestCase):
     @patch('meetup.views.geocode_autocomplete')
     def test_autocomplete_returns_results(self, mock_autocomplete):
         mock_autocomplete.return_value = [
-            {'label': 'Old Street', 'lat': 51.5263, 'lon': -0.0876},
+            {'label': 'Downing Street', 'lat': 51.5034, 'lon': -0.1276},
         ]
-        response = self.client.get('/meetup/api/autocomplete/?q=Old+Street')
+        response = self.client.get(
+            '/meetup/api/autocomplete/?q=10+Downing+Street')
         data = json.loads(response.content)
         self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['results'][0]['label'], 'Downing Street')
+
+    @patch('meetup.views.geocode_autocomplete')
+    def test_autocomplete_station_skips_geocoder(self, mock_autocomplete):
+        """A query naming a station is answered from the station index."""
+        response = self.client.get(
+            '/meetup/api/autocomplete/?q=Old+Street+Station')
+        data = json.loads(response.content)
+        mock_autocomplete.assert_not_called()
         self.assertEqual(data['results'][0]['label'], 'Old Street')
+        self.assertIn('station_id', data['results'][0])
+
+    @patch('meetup.views.geocode_autocomplete')
+    def test_autocomplete_falls_back_to_near_misses(self, mock_autocomplete):
+        """Misspelt stations are offered if the geocoder finds nothing."""
+        mock_autocomplete.return_value = []
+        response = self.client.get('/meetup/api/autocomplete/?q=Padington')
+        data = json.loads(response.content)
+        mock_autocomplete.assert_called_once()
+        self.assertEqual(data['results'][0]['label'], 'Paddington')
+
+    @patch('meetup.views.geocode_autocomplete')
+    def test_autocomplete_word_prefix_still_geocodes(self, mock_autocomplete):
+        """A word like "street" isn't a station name; places still show."""
+        mock_autocomplete.return_value = [
+            {'label': 'Baker Street, London', 'lat': 51.52, 'lon': -0.157},
+            {'label': 'Oxford Street, London', 'lat': 51.515, 'lon': -0.14},
+        ]
+        response = self.client.get('/meetup/api/autocomplete/?q=street')
+        data = json.loads(response.content)
+        mock_autocomplete.assert_called_once()
+        labels = [r['label'] for r in data['results']]
+        self.assertIn('Oxford Street, London', labels)
+        self.assertIn('Baker Street, London', labels)
+        stations = [r for r in data['results'] if 'station_id' in r]
+        self.assertEqual(len(stations), 2)
+        self.assertLessEqual(len(labels), 5)
+
+    @patch('meetup.views.geocode_autocomplete')
+    def test_autocomplete_alias_skips_geocoder(self, mock_autocomplete):
+        response = self.client.get('/meetup/api/autocomplete/?q=KX')
+        data = json.loads(response.content)
+        mock_autocomplete.assert_not_called()
+        self.assertEqual(data['results'][0]['label'],
+                         "King's Cross St. Pancras")
 
     def test_autocomplete_rejects_post(self):
         response = self.client.post('/meetup/api/autocomplete/')
         self.assertEqual(response.status_code, 405)
 
 
-class CalculateViewTest(TestCase):
+class MatrixViewTest(CompiledDirTestCase):
+    def setUp(self):
+        patcher = patch('meetup.views.get_line_disruptions', return_value=[])
+        self.mock_disruptions = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        return self.client.post('/meetup/api/matrix/', json.dumps(body),
+                                content_type='application/json')
+
+    def test_matrix_shape(self):
+        response = self._post({
+            'origins': [1, {'lat': 51.5155, 'lon': -0.0715}],
+            'destinations': [{'station_id': 2}, 3, 4],
+        })
+        self.assertEqual(response.status_code, 200)
+        times = json.loads(response.content)['times']
+        self.assertEqual(len(times), 2)
+        for row in times:
+            self.assertEqual(len(row), 3)
+            for time in row:
+                self.assertGreater(time, 0)
+
+    def test_routes_around_closed_lines(self):
+        """Times should avoid suspended lines, as calculate does."""
+        stations = get_stations()
+        by_name = {info['name']: sid for sid, info in stations.items()}
+        body = {'origins': [by_name['Stockwell']],
+                'destinations': [by_name['Warren Street']]}
+        [[normal]] = json.loads(self._post(body).content)['times']
+        self.mock_disruptions.return_value = [
+            {'line': 'Victoria', 'status': 'Suspended', 'severity': 2,
+             'reason': 'Strike'},
+        ]
+        [[closed]] = json.loads(self._post(body).content)['times']
+        self.assertGreater(closed, normal)
+
+    def test_nothing_saved(self):
+        self._post({'origins': [1], 'destinations': [2]})
+        self.assertEqual(MeetupSession.objects.count(), 0)
+
+    def test_rejects_bad_points(self):
+        for body in ({'origins': [1]},
+                     {'origins': [], 'destinations': [2]},
+                     {'origins': [99999], 'destinations': [2]},
+                     {'origins': [{'lat': 'x', 'lon': 0}],
+                      'destinations': [2]},
+                     {'origins': [True], 'destinations': [2]},
+                     {'origins': [{'station_id': [1]}], 'destinations': [2]},
+                     {'origins': [{'station_id': 1.0}], 'destinations': [2]},
+                     {'origins': [{'station_id': '1'}], 'destinations': [2]},
+                     {'origins': [{'lat': float('nan'), 'lon': 0}],
+                      'destinations': [2]},
+                     {'origins': [{'lat': 51.5, 'lon': float('inf')}],
+                      'destinations': [2]},
+                     [1, 2]):
+            response = self._post(body)
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_rejects_too_many_points(self):
+        response = self._post({'origins': [1] * 101, 'destinations': [2]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_post(self):
+        response = self.client.get('/meetup/api/matrix/')
+        self.assertEqual(response.status_code, 405)
+
+
+class IsochroneViewTest(CompiledDirTestCase):
+    def setUp(self):
+        patcher = patch('meetup.views.get_line_disruptions', return_value=[])
+        self.mock_disruptions = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_isochrone(self):
+        response = self.client.get(
+            '/meetup/api/isochrone/?lat=51.5153&lon=-0.0717&minutes=30')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data['minutes'], 30)
+        self.assertEqual(data['origin'], {'lat': 51.515, 'lon': -0.072})
+        self.assertGreater(len(data['stations']), 0)
+        for station in data['stations']:
+            self.assertLessEqual(station['minutes'], 30)
+
+    def test_routes_around_closed_lines(self):
+        """Suspended lines should not extend the reachable stations."""
+        url = '/meetup/api/isochrone/?lat=51.4627&lon=-0.1145&minutes=20'
+        normal = json.loads(self.client.get(url).content)['stations']
+        self.mock_disruptions.return_value = [
+            {'line': 'Victoria', 'status': 'Suspended', 'severity': 2,
+             'reason': 'Strike'},
+        ]
+        closed = json.loads(self.client.get(url).content)['stations']
+        self.assertIn('Oxford Circus', {s['name'] for s in normal})
+        self.assertLess(len(closed), len(normal))
+        self.assertNotIn('Oxford Circus', {s['name'] for s in closed})
+
+    def test_rejects_bad_parameters(self):
+        for query in ('', 'lat=51.5&lon=-0.1', 'lat=x&lon=-0.1&minutes=30',
+                      'lat=51.5&lon=-0.1&minutes=0',
+                      'lat=51.5&lon=-0.1&minutes=500',
+                      'lat=nan&lon=-0.1&minutes=30',
+                      'lat=51.5&lon=-0.1&minutes=2.5'):
+            response = self.client.get(f'/meetup/api/isochrone/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_rejects_post(self):
+        response = self.client.post('/meetup/api/isochrone/')
+        self.assertEqual(response.status_code, 405)
+
+
+class CalculateViewTest(CompiledDirTestCase):
     def test_calculate_requires_post(self):
         response = self.client.get('/meetup/calculate/')
         self.assertEqual(response.status_code, 405)
@@ -189,8 +347,45 @@ class CalculateViewTest(TestCase):
         self.assertEqual(len(result['disruptions']), 1)
         self.assertEqual(result['disruptions'][0]['line'], 'Central')
 
+    @patch('meetup.views.get_line_disruptions')
+    def test_calculate_routes_around_closed_lines(self, mock_disruptions):
+        """Suspended lines should be avoided and still reported."""
+        mock_disruptions.return_value = [
+            {'line': 'Victoria', 'status': 'Suspended', 'severity': 2,
+             'reason': 'Strike'},
+        ]
+        data = {
+            'people': [
+                {
+                    'name': 'Alice',
+                    'origin_lat': 51.5155, 'origin_lon': -0.0715,
+                    'origin_label': 'Whitechapel',
+                    'home_lat': 51.5322, 'home_lon': -0.1058,
+                    'home_label': 'Angel',
+                },
+                {
+                    'name': 'Bob',
+                    'origin_lat': 51.4627, 'origin_lon': -0.1145,
+                    'origin_label': 'Brixton',
+                    'home_lat': 51.4694, 'home_lon': -0.0693,
+                    'home_label': 'Peckham',
+                },
+            ],
+        }
+        response = self.client.post(
+            '/meetup/calculate/',
+            json.dumps(data),
+            content_type='application/json',
+        )
+        result = json.loads(response.content)
+        for mode_results in result['results'].values():
+            for r in mode_results:
+                self.assertNotIn('Victoria', r['lines_used'])
+        self.assertEqual([d['line'] for d in result['disruptions']],
+                         ['Victoria'])
+
 
-class ResultsViewTest(TestCase):
+class ResultsViewTest(CompiledDirTestCase):
     def _create_session_with_results(self):
         """Helper: create a session with people and saved MeetupResult records."""
         session = MeetupSession.objects.create()
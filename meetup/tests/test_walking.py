@@ -1,11 +1,11 @@
-from django.test import TestCase
+from meetup.tests.base import CompiledDirTestCase
 from meetup.services.walking import (
     haversine_distance, estimate_walking_time, find_nearest_stations,
 )
 from meetup.services.graph import reset_cache
 
 
-class HaversineTest(TestCase):
+class HaversineTest(CompiledDirTestCase):
     def test_same_point_zero_distance(self):
         dist = haversine_distance(51.5, -0.1, 51.5, -0.1)
         self.assertAlmostEqual(dist, 0, places=5)
@@ -23,7 +23,7 @@ class HaversineTest(TestCase):
         self.assertAlmostEqual(d1, d2, places=5)
 
 
-class WalkingTimeTest(TestCase):
+class WalkingTimeTest(CompiledDirTestCase):
     def test_walking_time_1km(self):
         """1km straight line at 5km/h with 1.3x multiplier ~ 15.6 min."""
         time = estimate_walking_time(1.0)
@@ -35,7 +35,7 @@ class WalkingTimeTest(TestCase):
         self.assertEqual(time, 0)
 
 
-class NearestStationsTest(TestCase):
+class NearestStationsTest(CompiledDirTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -0,0 +1,68 @@
+import threading
+import time
+from unittest.mock import patch
+from meetup.tests.base import CompiledDirTestCase
+from meetup.services import graph as graph_module
+from meetup.services.graph import (
+    get_network, readiness, reset_cache, start_warm_up, warm_up,
+)
+
+
+class WarmUpTest(CompiledDirTestCase):
+    def setUp(self):
+        reset_cache()
+
+    def tearDown(self):
+        warm_up()  # leave the worker ready for other tests
+        reset_cache()
+
+    def test_warm_up_loads_network(self):
+        start_warm_up().join()
+        self.assertEqual(readiness(), (True, None))
+        state = graph_module._current_state()
+        self.assertIsNotNone(state.network)
+        self.assertIsNotNone(state.station_lookup)
+        self.assertIsNotNone(graph_module._oracle_for(state))
+
+    def test_failed_warm_up_not_ready(self):
+        with patch.object(graph_module, '_warm',
+                          side_effect=RuntimeError('boom')), \
+                self.assertLogs('meetup.services.graph', level='ERROR'):
+            start_warm_up().join()
+        self.assertEqual(readiness(), (False, 'boom'))
+
+    def test_concurrent_first_calls_build_once(self):
+        """Callers racing on a cold cache should share a single load."""
+        real_load = graph_module._load_network
+
+        def slow_load(state):
+            time.sleep(0.05)
+            real_load(state)
+
+        results = []
+        with patch.object(graph_module, '_load_network',
+                          side_effect=slow_load) as load:
+            threads = [threading.Thread(
+                target=lambda: results.append(get_network()))
+                for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+class ReadyViewTest(CompiledDirTestCase):
+    def test_ready(self):
+        with patch('meetup.views.readiness', return_value=(True, None)):
+            response = self.client.get('/meetup/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ready': True})
+
+    def test_not_ready(self):
+        with patch('meetup.views.readiness', return_value=(False, 'boom')):
+            response = self.client.get('/meetup/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'ready': False, 'error': 'boom'})
@@ -8,4 +8,7 @@ urlpatterns = [
     path('calculate/', views.calculate, name='calculate'),
     path('results/<uuid:session_uuid>/', views.results, name='results'),
     path('api/autocomplete/', views.autocomplete, name='autocomplete'),
+    path('api/matrix/', views.travel_time_matrix, name='matrix'),
+    path('api/isochrone/', views.isochrone, name='isochrone'),
+    path('ready/', views.ready, name='ready'),
 ]
@@ -1,4 +1,5 @@
 import json
+import math
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -6,8 +7,25 @@ from django.views.decorators.http import require_GET, require_POST
 
 from .models import MeetupSession, Person, MeetupResult
 from .services.geocoding import autocomplete as geocode_autocomplete
-from .services.optimizer import calculate_meetup_spots
-from .services.disruptions import get_line_disruptions
+from .services.optimizer import (
+    calculate_meetup_spots, calculate_travel_times, calculate_isochrone,
+)
+from .services.disruptions import get_line_disruptions, disrupted_lines_mask
+from .services.graph import (
+    get_network, get_stations, get_station_index, readiness,
+)
+from .services.station_search import EXACT, WORD_PREFIX
+
+# Suggestions returned by autocomplete, and how many of them may be
+# stations when the query doesn't name one exactly
+AUTOCOMPLETE_LIMIT = 5
+MERGED_STATION_RESULTS = 2
+
+# Most origins or destinations accepted by the matrix endpoint
+MAX_MATRIX_POINTS = 100
+
+# Largest time budget accepted by the isochrone endpoint, in minutes
+MAX_ISOCHRONE_MINUTES = 120
 
 
 @ensure_csrf_cookie
@@ -68,21 +86,28 @@ def calculate(request):
         for p in people_data
     ]
 
-    results = calculate_meetup_spots(people_for_calc)
+    # One status check up front: closed lines are routed around, and
+    # other disruptions are reported if the results use them
+    network = get_network()
+    line_status = get_line_disruptions()
+    closed_lines = disrupted_lines_mask(network, line_status,
+                                        closed_only=True)
+
+    results = calculate_meetup_spots(people_for_calc, closed_lines)
 
     if 'error' in results:
         return JsonResponse({'error': results['error']}, status=400)
 
     # Collect all lines used across all results for disruption check
-    all_lines = set()
+    lines_mask = 0
     for mode_results in results.values():
         for r in mode_results:
-            all_lines.update(r.get('lines_used', []))
+            lines_mask |= r['lines_mask']
 
-    # Check for disruptions
-    disruptions = []
-    if all_lines:
-        disruptions = get_line_disruptions(all_lines)
+    disruptions = [
+        d for d in line_status
+        if disrupted_lines_mask(network, [d]) & (lines_mask | closed_lines)
+    ]
 
     # Save results — all unique stations across all 4 scoring modes
     station_data = {}
@@ -181,12 +206,158 @@ def results(request, session_uuid):
     return render(request, 'meetup/results.html', context)
 
 
+@require_GET
+def ready(request):
+    """Readiness check: 200 once the network is warm, 503 until then."""
+    is_ready, error = readiness()
+    body = {'ready': is_ready}
+    if error:
+        body['error'] = error
+    return JsonResponse(body, status=200 if is_ready else 503)
+
+
+def _station_result(match, stations):
+    station = stations[match.station_id]
+    return {
+        'label': station['name'],
+        'lat': station['lat'],
+        'lon': station['lon'],
+        'station_id': match.station_id,
+    }
+
+
 @require_GET
 def autocomplete(request):
-    """API endpoint for location autocomplete."""
+    """
+    API endpoint for location autocomplete. A query that names a station
+    exactly (or by an alias) is answered from the local station index
+    without calling the geocoder. Otherwise the best station prefix
+    matches are listed ahead of the geocoder's places; near misses are
+    only offered if the geocoder finds nothing.
+    """
     query = request.GET.get('q', '').strip()
     if len(query) < 2:
         return JsonResponse({'results': []})
 
-    results = geocode_autocomplete(query, limit=5)
+    stations = get_stations()
+    matches = get_station_index().search(query, limit=AUTOCOMPLETE_LIMIT)
+    named = [m for m in matches if m.tier <= WORD_PREFIX]
+    if named and named[0].tier == EXACT:
+        return JsonResponse(
+            {'results': [_station_result(m, stations) for m in named]})
+
+    places = geocode_autocomplete(query, limit=AUTOCOMPLETE_LIMIT)
+    if not places:
+        return JsonResponse(
+            {'results': [_station_result(m, stations) for m in matches]})
+
+    results = [_station_result(m, stations)
+               for m in named[:MERGED_STATION_RESULTS]]
+    labels = {r['label'].lower() for r in results}
+    for place in places:
+        if len(results) == AUTOCOMPLETE_LIMIT:
+            break
+        if place['label'].lower() not in labels:
+            results.append(place)
     return JsonResponse({'results': results})
+
+
+def _matrix_point(value, stations):
+    """
+    Parse a matrix point: a station ID, or an object with either a
+    station_id or lat and lon. Returns None if it isn't valid.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = {'station_id': value}
+    if not isinstance(value, dict):
+        return None
+    if 'station_id' in value:
+        sid = value['station_id']
+        if not isinstance(sid, int) or isinstance(sid, bool):
+            return None
+        return {'station_id': sid} if sid in stations else None
+    lat = value.get('lat')
+    lon = value.get('lon')
+    for coord in (lat, lon):
+        if (not isinstance(coord, (int, float)) or isinstance(coord, bool)
+                or not math.isfinite(coord)):
+            return None
+    return {'lat': float(lat), 'lon': float(lon)}
+
+
+def _closed_lines():
+    """Bitmask of the lines currently closed, to route around."""
+    return disrupted_lines_mask(get_network(), get_line_disruptions(),
+                                closed_only=True)
+
+
+@require_POST
+def travel_time_matrix(request):
+    """
+    API endpoint for an origin-destination travel-time matrix. Takes
+    {"origins": [...], "destinations": [...]}, each point a station ID or
+    {"lat": ..., "lon": ...}, and returns {"times": rows of minutes}, with
+    null where there is no route. Closed lines are routed around, as in
+    calculate. Nothing is stored.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    stations = get_stations()
+    points = {}
+    for key in ('origins', 'destinations'):
+        values = data.get(key)
+        if not isinstance(values, list) or not values:
+            return JsonResponse(
+                {'error': f'{key} must be a non-empty list'}, status=400)
+        if len(values) > MAX_MATRIX_POINTS:
+            return JsonResponse(
+                {'error': f'At most {MAX_MATRIX_POINTS} {key} allowed'},
+                status=400)
+        points[key] = []
+        for i, value in enumerate(values):
+            point = _matrix_point(value, stations)
+            if point is None:
+                return JsonResponse(
+                    {'error': f'Invalid point {key}[{i}]'}, status=400)
+            points[key].append(point)
+
+    times = calculate_travel_times(points['origins'], points['destinations'],
+                                   _closed_lines())
+    return JsonResponse({'times': times})
+
+
+@require_GET
+def isochrone(request):
+    """
+    API endpoint listing every station reachable from a location within a
+    time budget: ?lat=...&lon=...&minutes=... (whole minutes). Closed lines
+    are routed around, as in calculate.
+    """
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+        minutes = int(request.GET['minutes'])
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {'error': 'lat, lon and minutes are required numbers'},
+            status=400)
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return JsonResponse({'error': 'Invalid location'}, status=400)
+    if not 1 <= minutes <= MAX_ISOCHRONE_MINUTES:
+        return JsonResponse(
+            {'error': f'minutes must be between 1 and '
+                      f'{MAX_ISOCHRONE_MINUTES}'},
+            status=400)
+
+    (lat, lon), stations = calculate_isochrone(lat, lon, minutes,
+                                               _closed_lines())
+    return JsonResponse({
+        'origin': {'lat': lat, 'lon': lon},
+        'minutes': minutes,
+        'stations': stations,
+    })
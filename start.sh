@@ -2,4 +2,7 @@
 set -o errexit
 
 python manage.py migrate --no-input
+# Each worker loads the network in the background; /meetup/ready/ returns
+# 200 once it has
+export MEETUP_WARM_UP="${MEETUP_WARM_UP:-True}"
 exec gunicorn mysite.wsgi:application